@@ -0,0 +1,455 @@
+"""Kazoo Zookeeper Admin Client
+
+An :class:`AdminClient` reads the monitoring commands of every member
+of an ensemble, the four letter words or the JSON commands of the
+AdminServer, and parses their reports into dicts of typed values::
+
+    from kazoo.admin import AdminClient
+
+    admin = AdminClient(hosts="zk1:2181,zk2:2181,zk3:2181")
+    for server, stats in admin.mntr().items():
+        print(server, stats["zk_server_state"], stats["zk_avg_latency"])
+    admin.close()
+
+"""
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+import json
+import logging
+import re
+import socket
+import threading
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+import urllib.parse
+
+from kazoo.exceptions import ConfigurationError
+from kazoo.handlers.utils import (
+    create_ssl_context,
+    create_tcp_connection,
+    send_command,
+)
+from kazoo.hosts import collect_hosts
+
+
+log = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+Server = Tuple[str, int]
+Value = Union[int, float, str]
+Stats = Dict[str, Value]
+Results = Dict[Server, Union[_T, Exception]]
+
+_CONNECTION_RE = re.compile(
+    r"^/(?P<address>.+):(?P<port>\d+)\[(?P<interest_ops>\d+)\]"
+    r"\((?P<stats>.*)\)$"
+)
+_WATCHES_RE = re.compile(
+    r"^(?P<connections>\d+) connections watching (?P<paths>\d+) paths\s*"
+    r"Total watches:\s*(?P<watches>\d+)"
+)
+
+
+def _value(text: str) -> Value:
+    """Convert a reported value to an int or a float when it is one"""
+    text = text.strip()
+    try:
+        return int(text, 16) if text.startswith("0x") else int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def _check_allowed(cmd: str, report: str) -> None:
+    if "is not executed because it is not in the whitelist" in report:
+        raise ConfigurationError(
+            "%s is not allowed by the server, see 4lw.commands.whitelist"
+            % (cmd,)
+        )
+
+
+def parse_mntr(report: str) -> Stats:
+    """Parse the report of the ``mntr`` command
+
+    :returns: The value of each key, converted to a number when it is
+              one, such as ``{"zk_server_state": "leader",
+              "zk_avg_latency": 0.1, ...}``.
+    :rtype: dict
+
+    """
+    _check_allowed("mntr", report)
+    stats: Stats = {}
+    for line in report.splitlines():
+        key, sep, value = line.partition("\t")
+        if sep:
+            stats[key.strip()] = _value(value)
+    return stats
+
+
+def parse_cons(report: str) -> List[Stats]:
+    """Parse the report of the ``cons`` command
+
+    :returns: A dict per connection, with its ``address``, ``port``
+              and ``interest_ops``, and the statistics of the server
+              such as ``queued``, ``sid`` or ``avglat``.
+    :rtype: list
+
+    """
+    _check_allowed("cons", report)
+    connections = []
+    for line in report.splitlines():
+        match = _CONNECTION_RE.match(line.strip())
+        if match is None:
+            continue
+        connection: Stats = {
+            "address": match.group("address"),
+            "port": int(match.group("port")),
+            "interest_ops": int(match.group("interest_ops")),
+        }
+        for stat in match.group("stats").split(","):
+            key, sep, value = stat.partition("=")
+            if sep:
+                connection[key] = _value(value)
+        connections.append(connection)
+    return connections
+
+
+def parse_srvr(report: str) -> Dict[str, Union[Value, List[Stats]]]:
+    """Parse the report of the ``srvr`` or ``stat`` commands
+
+    :returns: The values of the report under lower case keys, such as
+              ``version``, ``mode``, ``zxid``, ``node_count``, or
+              ``latency_min``, ``latency_avg`` and ``latency_max`` for
+              ``Latency min/avg/max``. The report of ``stat`` also has
+              the ``clients`` of the server, parsed as with
+              :func:`parse_cons`.
+    :rtype: dict
+
+    """
+    _check_allowed("srvr", report)
+    stats: Dict[str, Union[Value, List[Stats]]] = {}
+    lines = iter(report.splitlines())
+    for line in lines:
+        if line.strip() == "Clients:":
+            clients = []
+            for line in lines:
+                if not line.strip():
+                    break
+                clients.append(line)
+            stats["clients"] = parse_cons("\n".join(clients))
+            continue
+        key, sep, value = line.partition(":")
+        if not sep:
+            continue
+        key = key.strip().lower()
+        if key == "zookeeper version":
+            stats["version"] = value.strip()
+        elif "/" in key:
+            # Latency min/avg/max: 0/0.1/3
+            prefix, _, names = key.rpartition(" ")
+            prefix = prefix.replace(" ", "_")
+            for name, part in zip(names.split("/"), value.split("/")):
+                stats["%s_%s" % (prefix, name)] = _value(part)
+        else:
+            stats[key.replace(" ", "_")] = _value(value)
+    return stats
+
+
+parse_stat = parse_srvr
+
+
+def parse_wchs(report: str) -> Dict[str, int]:
+    """Parse the report of the ``wchs`` command
+
+    :returns: The number of ``connections`` with watches, of watched
+              ``paths`` and of ``watches``.
+    :rtype: dict
+
+    """
+    _check_allowed("wchs", report)
+    match = _WATCHES_RE.search(report)
+    if match is None:
+        raise ValueError("Unexpected wchs report: %r" % (report,))
+    return dict((key, int(value)) for key, value in match.groupdict().items())
+
+
+def parse_envi(report: str) -> Dict[str, str]:
+    """Parse the report of the ``envi`` command
+
+    :returns: The value of each property of the server environment.
+    :rtype: dict
+
+    """
+    _check_allowed("envi", report)
+    environment: Dict[str, str] = {}
+    for line in report.splitlines():
+        key, sep, value = line.partition("=")
+        if sep:
+            environment[key.strip()] = value.strip()
+    return environment
+
+
+PARSERS: Dict[str, Callable[[str], object]] = {
+    "mntr": parse_mntr,
+    "cons": parse_cons,
+    "srvr": parse_srvr,
+    "stat": parse_stat,
+    "wchs": parse_wchs,
+    "envi": parse_envi,
+}
+
+
+class AdminClient(object):
+    """A client of the monitoring commands of an ensemble
+
+    The four letter words are sent to each server on a connection of
+    its own, the way :meth:`~kazoo.client.KazooClient.command` does,
+    and their whole report is read. The commands of the AdminServer
+    reuse one HTTP connection per server. The servers of an ensemble
+    are queried concurrently by a pool of threads kept by the client,
+    so that polling every few seconds doesn't start new ones.
+
+    The methods querying the ensemble return a dict of the result of
+    each server, keyed by its ``(host, port)``. The result of a server
+    that couldn't be queried is the exception raised, such as a
+    :exc:`socket.error`, so that one server being down doesn't hide
+    the others.
+
+    """
+
+    def __init__(
+        self,
+        hosts: Union[str, List[str]] = "127.0.0.1:2181",
+        timeout: float = 10.0,
+        use_ssl: bool = False,
+        verify_certs: bool = True,
+        ca: Optional[str] = None,
+        certfile: Optional[str] = None,
+        keyfile: Optional[str] = None,
+        keyfile_password: Optional[str] = None,
+        admin_port: int = 8080,
+        admin_use_ssl: bool = False,
+    ) -> None:
+        """Create an :class:`AdminClient` instance.
+
+        :param hosts: Comma-separated list of hosts to query, see
+                      :class:`~kazoo.client.KazooClient`. A chroot is
+                      ignored.
+        :param timeout: The timeout of each command, in seconds.
+        :param use_ssl: Send the four letter words over SSL, with the
+                        `verify_certs`, `ca`, `certfile`, `keyfile` and
+                        `keyfile_password` options of
+                        :class:`~kazoo.client.KazooClient`.
+        :param admin_port: The port of the AdminServer of the servers.
+        :param admin_use_ssl: Query the AdminServer over HTTPS, with
+                              the same certificates.
+
+        """
+        self.hosts: List[Server] = collect_hosts(hosts)[0]
+        self.timeout = timeout
+        self.use_ssl = use_ssl
+        self.verify_certs = verify_certs
+        self.ca = ca
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.keyfile_password = keyfile_password
+        self.admin_port = admin_port
+        self.admin_use_ssl = admin_use_ssl
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._http: Dict[
+            str, Tuple[http.client.HTTPConnection, threading.Lock]
+        ] = {}
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Stop the threads and close the HTTP connections of the
+        client"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            connections, self._http = self._http, {}
+        if executor is not None:
+            executor.shutdown(wait=True)
+        for connection, _ in connections.values():
+            connection.close()
+
+    def command(self, server: Server, cmd: Union[bytes, str] = b"ruok") -> str:
+        """Send a four letter word to a server.
+
+        :param server: The ``(host, port)`` of the server.
+        :param cmd: The command, such as `ruok`, `mntr` or `cons`.
+        :returns: The whole textual report of the server.
+        :rtype: str
+
+        """
+        sock = create_tcp_connection(
+            socket,
+            server,
+            timeout=self.timeout,
+            use_ssl=self.use_ssl,
+            ca=self.ca,
+            certfile=self.certfile,
+            keyfile=self.keyfile,
+            keyfile_password=self.keyfile_password,
+            verify_certs=self.verify_certs,
+        )
+        return send_command(sock, cmd)
+
+    def query(self, cmd: Union[bytes, str]) -> Results[object]:
+        """Send a four letter word to every server of the ensemble.
+
+        :param cmd: The command, parsed if it is one of `mntr`, `cons`,
+                    `srvr`, `stat`, `wchs` or `envi`.
+        :returns: The result of each server.
+        :rtype: dict
+
+        """
+        if isinstance(cmd, bytes):
+            cmd = cmd.decode("ascii")
+        return self._parsed(cmd, PARSERS.get(cmd, str))
+
+    def _parsed(self, cmd: str, parse: Callable[[str], _T]) -> Results[_T]:
+        return self._map(lambda server: parse(self.command(server, cmd)))
+
+    def mntr(self) -> Results[Stats]:
+        """Query the ``mntr`` statistics of the servers, see
+        :func:`parse_mntr`."""
+        return self._parsed("mntr", parse_mntr)
+
+    def cons(self) -> Results[List[Stats]]:
+        """Query the connections of the servers, see :func:`parse_cons`."""
+        return self._parsed("cons", parse_cons)
+
+    def srvr(self) -> Results[Dict[str, Union[Value, List[Stats]]]]:
+        """Query the ``srvr`` statistics of the servers, see
+        :func:`parse_srvr`."""
+        return self._parsed("srvr", parse_srvr)
+
+    def stat(self) -> Results[Dict[str, Union[Value, List[Stats]]]]:
+        """Query the ``stat`` statistics of the servers, with their
+        clients, see :func:`parse_srvr`."""
+        return self._parsed("stat", parse_stat)
+
+    def wchs(self) -> Results[Dict[str, int]]:
+        """Query the watch summary of the servers, see
+        :func:`parse_wchs`."""
+        return self._parsed("wchs", parse_wchs)
+
+    def envi(self) -> Results[Dict[str, str]]:
+        """Query the environment of the servers, see :func:`parse_envi`."""
+        return self._parsed("envi", parse_envi)
+
+    def admin_command(
+        self, server: Server, name: str, **params: object
+    ) -> Dict[str, object]:
+        """Run a command of the AdminServer of a server.
+
+        :param server: The ``(host, port)`` of the server, its client
+                       port. The AdminServer is reached on
+                       `admin_port`.
+        :param name: The name of the command, such as `monitor`,
+                     `connections` or `leader`.
+        :param params: The query parameters of the command.
+        :returns: The decoded JSON response.
+        :rtype: dict
+
+        """
+        path = "/commands/%s" % (name,)
+        if params:
+            path += "?" + urllib.parse.urlencode(params)
+        connection, lock = self._http_connection(server[0])
+        with lock:
+            for attempt in (1, 2):
+                try:
+                    connection.request("GET", path)
+                    response = connection.getresponse()
+                    body = response.read()
+                    break
+                except (http.client.HTTPException, OSError):
+                    connection.close()
+                    # The server may have closed an idle connection
+                    if attempt == 2:
+                        raise
+        if response.status != 200:
+            raise http.client.HTTPException(
+                "%s %s: %s"
+                % (
+                    response.status,
+                    response.reason,
+                    body.decode("utf-8", "replace"),
+                )
+            )
+        result: Dict[str, object] = json.loads(body.decode("utf-8"))
+        return result
+
+    def admin_query(
+        self, name: str, **params: object
+    ) -> Results[Dict[str, object]]:
+        """Run a command of the AdminServer of every server of the
+        ensemble, see :meth:`admin_command`.
+
+        :returns: The result of each server.
+        :rtype: dict
+
+        """
+        return self._map(
+            lambda server: self.admin_command(server, name, **params)
+        )
+
+    def _http_connection(
+        self, host: str
+    ) -> Tuple[http.client.HTTPConnection, threading.Lock]:
+        with self._lock:
+            if host not in self._http:
+                if self.admin_use_ssl:
+                    context = create_ssl_context(
+                        ca=self.ca,
+                        certfile=self.certfile,
+                        keyfile=self.keyfile,
+                        keyfile_password=self.keyfile_password,
+                        verify_certs=self.verify_certs,
+                    )
+                    connection: http.client.HTTPConnection = (
+                        http.client.HTTPSConnection(
+                            host,
+                            self.admin_port,
+                            timeout=self.timeout,
+                            context=context,
+                        )
+                    )
+                else:
+                    connection = http.client.HTTPConnection(
+                        host, self.admin_port, timeout=self.timeout
+                    )
+                self._http[host] = (connection, threading.Lock())
+            return self._http[host]
+
+    def _map(self, func: Callable[[Server], _T]) -> Results[_T]:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=len(self.hosts),
+                    thread_name_prefix="kazoo-admin",
+                )
+            futures = [
+                (server, self._executor.submit(func, server))
+                for server in self.hosts
+            ]
+        results: Results[_T] = {}
+        for server, future in futures:
+            try:
+                results[server] = future.result()
+            except Exception as e:
+                log.debug("Cannot query %s:%s: %s", server[0], server[1], e)
+                results[server] = e
+        return results
@@ -0,0 +1,4 @@
+from kazoo.aio.client import AioKazooClient
+
+
+__all__ = ("AioKazooClient",)
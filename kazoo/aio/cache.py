@@ -0,0 +1,90 @@
+"""asyncio TreeCache
+
+The :class:`~kazoo.recipe.cache.TreeCache` of an
+:class:`~kazoo.aio.client.AioKazooClient`, processing the ZooKeeper
+results and delivering its events in a task of the loop it was created on.
+
+"""
+from __future__ import absolute_import
+
+import asyncio
+from typing import TYPE_CHECKING, Dict, Tuple, cast
+
+from kazoo.exceptions import KazooException
+from kazoo.recipe import cache
+from kazoo.recipe.cache import handle_exception
+
+if TYPE_CHECKING:
+    from typing_extensions import Protocol
+
+    from kazoo.aio.client import AioKazooClient
+
+    class _Call(Protocol):
+        def __call__(self, *args: object, **kwargs: object) -> object:
+            ...
+
+
+class _LoopQueue(object):
+    """A queue fed from any thread and consumed by a task of `loop`"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._queue: "asyncio.Queue[object]" = asyncio.Queue()
+
+    def put(self, item: object) -> None:
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    async def get(self) -> object:
+        return await self._queue.get()
+
+
+class TreeCache(cache.TreeCache):
+    """The cache of a ZooKeeper subtree, see
+    :class:`kazoo.recipe.cache.TreeCache`.
+
+    :param client: A :class:`~kazoo.aio.client.AioKazooClient` instance.
+    :param path: The root path of subtree.
+    """
+
+    def __init__(self, client: "AioKazooClient", path: str) -> None:
+        super(TreeCache, self).__init__(client.client, path)
+        self._aio_client = client
+        self._task_queue = _LoopQueue(asyncio.get_running_loop())
+
+    async def start(self) -> None:
+        """Starts the cache, see :meth:`kazoo.recipe.cache.TreeCache.start`.
+
+        .. note::
+
+            This method is not thread safe.
+        """
+        if self._state == self.STATE_LATENT:
+            self._state = self.STATE_STARTED
+        elif self._state == self.STATE_CLOSED:
+            raise KazooException("already closed")
+        else:
+            raise KazooException("already started")
+
+        self._task_thread = asyncio.ensure_future(self._do_background())
+        self._client.add_listener(self._session_watcher)
+        await self._aio_client.ensure_path(self._root._path)
+
+        if self._client.connected:
+            # The on_created and other on_* methods must not be invoked outside
+            # the background task. This is the key to keep concurrency safe
+            # without lock.
+            self._in_background(self._root.on_created)
+
+    async def _do_background(self) -> None:
+        while True:
+            with handle_exception(self._error_listeners):
+                cb = await self._task_queue.get()
+                if cb is self._STOP:
+                    break
+                func, args, kwargs = cast(
+                    "Tuple[_Call, Tuple[object, ...], Dict[str, object]]", cb
+                )
+                func(*args, **kwargs)
+
+                # release before possible idle
+                del cb, func, args, kwargs
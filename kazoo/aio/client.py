@@ -0,0 +1,477 @@
+"""Kazoo asyncio Zookeeper Client"""
+import asyncio
+from types import TracebackType
+from typing import (
+    TYPE_CHECKING,
+    Awaitable,
+    Callable,
+    List,
+    Literal,
+    NoReturn,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+    overload,
+)
+
+from kazoo.client import KazooClient, TransactionRequest, _RecipeDescriptor
+from kazoo.exceptions import NoNodeError
+from kazoo.handlers.utils import as_asyncio_future
+from kazoo.protocol.states import LazyZnodeStat, WatchedEvent, ZnodeStat
+from kazoo.security import ACL
+
+if TYPE_CHECKING:
+    from functools import partial
+
+    from typing_extensions import ParamSpec
+
+    from kazoo.aio import cache, lock, watchers
+
+    from kazoo.handlers.asyncio import AsyncioHandler, AsyncResult
+
+    _P = ParamSpec("_P")
+
+_T = TypeVar("_T")
+_Stat = Union[ZnodeStat, LazyZnodeStat]
+_Watch = Callable[[WatchedEvent], object]
+
+
+class AioKazooClient(object):
+    """An asyncio front-end to :class:`~kazoo.client.KazooClient`
+
+    Every ZooKeeper operation is a coroutine, resolved from the completion
+    of the underlying request without blocking any thread:
+
+    .. code-block:: python
+
+        async def main():
+            zk = AioKazooClient(hosts="127.0.0.1:2181")
+            await zk.start()
+            await zk.create("/my/favorite/node", b"a value", makepath=True)
+            data, stat = await zk.get("/my/favorite/node")
+            await zk.stop()
+            zk.close()
+
+    By default the client uses an
+    :class:`~kazoo.handlers.asyncio.AsyncioHandler` on the running loop.
+    With any other handler, results are transferred to the loop of the
+    awaiting coroutine as they complete, and :meth:`start` and :meth:`stop`
+    wait for the connection in the default executor.
+
+    The recipes bound to this client, such as :attr:`Lock`, are the asyncio
+    recipes of :mod:`kazoo.aio` and must be created from a coroutine.
+
+    """
+
+    if TYPE_CHECKING:
+        ChildrenWatch: "partial[watchers.ChildrenWatch]"
+        DataWatch: "partial[watchers.DataWatch]"
+        Lock: "partial[lock.Lock]"
+        ReadLock: "partial[lock.ReadLock]"
+        WriteLock: "partial[lock.WriteLock]"
+        TreeCache: "partial[cache.TreeCache]"
+    else:
+        ChildrenWatch = _RecipeDescriptor(
+            "ChildrenWatch", "kazoo.aio.watchers"
+        )
+        DataWatch = _RecipeDescriptor("DataWatch", "kazoo.aio.watchers")
+        Lock = _RecipeDescriptor("Lock", "kazoo.aio.lock")
+        ReadLock = _RecipeDescriptor("ReadLock", "kazoo.aio.lock")
+        WriteLock = _RecipeDescriptor("WriteLock", "kazoo.aio.lock")
+        TreeCache = _RecipeDescriptor("TreeCache", "kazoo.aio.cache")
+
+    def __init__(
+        self,
+        hosts: str = "127.0.0.1:2181",
+        client: Optional[KazooClient] = None,
+        **kwargs: object,
+    ) -> None:
+        """Create an :class:`AioKazooClient` instance.
+
+        :param hosts: Comma-separated list of hosts to connect to.
+        :param client: An existing :class:`~kazoo.client.KazooClient` to
+                       drive, instead of creating one.
+
+        The other keyword arguments are those of
+        :class:`~kazoo.client.KazooClient`.
+
+        """
+        if client is None:
+            if kwargs.get("handler") is None:
+                from kazoo.handlers.asyncio import AsyncioHandler
+
+                kwargs["handler"] = AsyncioHandler()
+            client = KazooClient(hosts, **kwargs)
+        self.client = client
+
+    @property
+    def handler(self) -> object:
+        return self.client.handler
+
+    @property
+    def state(self) -> str:
+        return self.client.state
+
+    @property
+    def connected(self) -> bool:
+        """Returns whether the Zookeeper connection has been
+        established."""
+        return bool(self.client.connected)
+
+    @property
+    def client_id(self) -> Optional[Tuple[int, bytes]]:
+        return cast(Optional[Tuple[int, bytes]], self.client.client_id)
+
+    @property
+    def chroot(self) -> Optional[str]:
+        return self.client.chroot
+
+    def add_listener(self, listener: Callable[[str], object]) -> None:
+        """Add a function to be called for connection state changes, see
+        :meth:`~kazoo.client.KazooClient.add_listener`."""
+        self.client.add_listener(listener)
+
+    def remove_listener(self, listener: Callable[[str], object]) -> None:
+        """Remove a listener function"""
+        self.client.remove_listener(listener)
+
+    def _in_loop(self) -> bool:
+        in_loop = getattr(self.client.handler, "in_loop", None)
+        return in_loop is not None and bool(in_loop())
+
+    async def _result(self, async_result: object) -> object:
+        """Wait for `async_result` without blocking the loop"""
+        if self._in_loop():
+            return await cast("AsyncResult", async_result)
+        future: "asyncio.Future[object]" = as_asyncio_future(async_result)
+        return await future
+
+    async def retry(
+        self,
+        func: "Callable[_P, Awaitable[_T]]",
+        *args: "_P.args",
+        **kwargs: "_P.kwargs",
+    ) -> _T:
+        """Await a coroutine function with the retry policy of the
+        client, see :meth:`~kazoo.retry.KazooRetry.acall`."""
+        result: _T = await self.client._retry.copy().acall(
+            func, *args, **kwargs
+        )
+        return result
+
+    async def start(self, timeout: float = 15) -> None:
+        """Initiate connection to ZK, see
+        :meth:`~kazoo.client.KazooClient.start`."""
+        if self._in_loop():
+            handler = cast("AsyncioHandler", self.handler)
+            await handler.start_client(self.client, timeout)
+        else:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.client.start, timeout)
+
+    async def stop(self) -> None:
+        """Gracefully stop this Zookeeper session, see
+        :meth:`~kazoo.client.KazooClient.stop`."""
+        if self._in_loop():
+            handler = cast("AsyncioHandler", self.handler)
+            await handler.stop_client(self.client)
+        else:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.client.stop)
+
+    async def restart(self) -> None:
+        """Stop and restart the Zookeeper session."""
+        await self.stop()
+        await self.start()
+
+    def close(self) -> None:
+        """Free any resources held by the client."""
+        self.client.close()
+
+    async def add_auth(self, scheme: str, credential: str) -> bool:
+        """Send credentials to server, see
+        :meth:`~kazoo.client.KazooClient.add_auth`."""
+        return cast(
+            bool,
+            await self._result(self.client.add_auth_async(scheme, credential)),
+        )
+
+    async def sync(self, path: str) -> str:
+        """Sync, blocks until response is acknowledged, see
+        :meth:`~kazoo.client.KazooClient.sync`."""
+        return cast(str, await self._result(self.client.sync_async(path)))
+
+    @overload
+    async def create(
+        self,
+        path: str,
+        value: bytes = ...,
+        acl: Optional[Sequence[ACL]] = ...,
+        ephemeral: bool = ...,
+        sequence: bool = ...,
+        makepath: bool = ...,
+        include_data: Literal[False] = ...,
+    ) -> str:
+        ...
+
+    @overload
+    async def create(
+        self,
+        path: str,
+        value: bytes = ...,
+        acl: Optional[Sequence[ACL]] = ...,
+        ephemeral: bool = ...,
+        sequence: bool = ...,
+        makepath: bool = ...,
+        *,
+        include_data: Literal[True],
+    ) -> Tuple[str, _Stat]:
+        ...
+
+    async def create(
+        self,
+        path: str,
+        value: bytes = b"",
+        acl: Optional[Sequence[ACL]] = None,
+        ephemeral: bool = False,
+        sequence: bool = False,
+        makepath: bool = False,
+        include_data: bool = False,
+    ) -> Union[str, Tuple[str, _Stat]]:
+        """Create a node with the given value as its data. Takes the same
+        arguments as :meth:`~kazoo.client.KazooClient.create`."""
+        return cast(
+            Union[str, Tuple[str, _Stat]],
+            await self._result(
+                self.client.create_async(
+                    path,
+                    value,
+                    acl=acl,
+                    ephemeral=ephemeral,
+                    sequence=sequence,
+                    makepath=makepath,
+                    include_data=include_data,
+                )
+            ),
+        )
+
+    async def ensure_path(
+        self, path: str, acl: Optional[Sequence[ACL]] = None
+    ) -> bool:
+        """Recursively create a path if it doesn't exist."""
+        return cast(
+            bool, await self._result(self.client.ensure_path_async(path, acl))
+        )
+
+    async def exists(
+        self, path: str, watch: Optional[_Watch] = None
+    ) -> Optional[_Stat]:
+        """Check if a node exists. Takes the same arguments as
+        :meth:`~kazoo.client.KazooClient.exists`."""
+        return cast(
+            Optional[_Stat],
+            await self._result(self.client.exists_async(path, watch)),
+        )
+
+    @overload
+    async def get(
+        self,
+        path: str,
+        watch: Optional[_Watch] = ...,
+        zero_copy: Literal[False] = ...,
+    ) -> Tuple[bytes, _Stat]:
+        ...
+
+    @overload
+    async def get(
+        self, path: str, watch: Optional[_Watch], zero_copy: Literal[True]
+    ) -> Tuple[memoryview, _Stat]:
+        ...
+
+    @overload
+    async def get(
+        self,
+        path: str,
+        watch: Optional[_Watch] = ...,
+        *,
+        zero_copy: Literal[True],
+    ) -> Tuple[memoryview, _Stat]:
+        ...
+
+    async def get(
+        self,
+        path: str,
+        watch: Optional[_Watch] = None,
+        zero_copy: bool = False,
+    ) -> Tuple[Union[bytes, memoryview], _Stat]:
+        """Get the value of a node. Takes the same arguments as
+        :meth:`~kazoo.client.KazooClient.get`."""
+        return cast(
+            Tuple[Union[bytes, memoryview], _Stat],
+            await self._result(self.client.get_async(path, watch, zero_copy)),
+        )
+
+    @overload
+    async def get_children(
+        self,
+        path: str,
+        watch: Optional[_Watch] = ...,
+        include_data: Literal[False] = ...,
+    ) -> List[str]:
+        ...
+
+    @overload
+    async def get_children(
+        self, path: str, watch: Optional[_Watch], include_data: Literal[True]
+    ) -> Tuple[List[str], _Stat]:
+        ...
+
+    @overload
+    async def get_children(
+        self,
+        path: str,
+        watch: Optional[_Watch] = ...,
+        *,
+        include_data: Literal[True],
+    ) -> Tuple[List[str], _Stat]:
+        ...
+
+    async def get_children(
+        self,
+        path: str,
+        watch: Optional[_Watch] = None,
+        include_data: bool = False,
+    ) -> Union[List[str], Tuple[List[str], _Stat]]:
+        """Get a list of child nodes of a path. Takes the same arguments
+        as :meth:`~kazoo.client.KazooClient.get_children`."""
+        return cast(
+            Union[List[str], Tuple[List[str], _Stat]],
+            await self._result(
+                self.client.get_children_async(path, watch, include_data)
+            ),
+        )
+
+    async def get_acls(self, path: str) -> Tuple[List[ACL], _Stat]:
+        """Return the ACL and stat of the node of the given path."""
+        return cast(
+            Tuple[List[ACL], _Stat],
+            await self._result(self.client.get_acls_async(path)),
+        )
+
+    async def set_acls(
+        self, path: str, acls: Sequence[ACL], version: int = -1
+    ) -> _Stat:
+        """Set the ACL for the node of the given path. Takes the same
+        arguments as :meth:`~kazoo.client.KazooClient.set_acls`."""
+        return cast(
+            _Stat,
+            await self._result(
+                self.client.set_acls_async(path, acls, version)
+            ),
+        )
+
+    async def set(self, path: str, value: bytes, version: int = -1) -> _Stat:
+        """Set the value of a node. Takes the same arguments as
+        :meth:`~kazoo.client.KazooClient.set`."""
+        return cast(
+            _Stat,
+            await self._result(self.client.set_async(path, value, version)),
+        )
+
+    def transaction(self) -> "AioTransactionRequest":
+        """Create and return a :class:`AioTransactionRequest` object"""
+        return AioTransactionRequest(self)
+
+    async def delete(
+        self, path: str, version: int = -1, recursive: bool = False
+    ) -> Optional[bool]:
+        """Delete a node. Takes the same arguments as
+        :meth:`~kazoo.client.KazooClient.delete`."""
+        if not isinstance(recursive, bool):
+            raise TypeError("Invalid type for 'recursive' (bool expected)")
+        if recursive:
+            return await self._delete_recursive(path)
+        else:
+            return cast(
+                bool,
+                await self._result(self.client.delete_async(path, version)),
+            )
+
+    async def _delete_recursive(self, path: str) -> Optional[bool]:
+        try:
+            children = await self.get_children(path)
+        except NoNodeError:
+            return True
+
+        if children:
+            if path == "/":
+                child_paths = [path + child for child in children]
+            else:
+                child_paths = [path + "/" + child for child in children]
+            await asyncio.gather(*map(self._delete_recursive, child_paths))
+        try:
+            await self.delete(path)
+        except NoNodeError:  # pragma: nocover
+            pass
+        return None
+
+    async def command(self, cmd: bytes = b"ruok") -> str:
+        """Sent a management command to the current ZK server, see
+        :meth:`~kazoo.client.KazooClient.command`."""
+        loop = asyncio.get_running_loop()
+        report: str = await loop.run_in_executor(
+            None, self.client.command, cmd
+        )
+        return report
+
+
+class AioTransactionRequest(TransactionRequest):
+    """A Zookeeper Transaction Request committed with ``await``
+
+    .. code-block:: python
+
+        async with zk.transaction() as tx:
+            tx.create("/node/a", b"a")
+            tx.delete("/node/b")
+
+        tx = zk.transaction()
+        tx.check("/node/a", 0)
+        tx.set_data("/node/a", b"b")
+        results = await tx.commit()
+
+    """
+
+    def __init__(self, client: AioKazooClient) -> None:
+        super(AioTransactionRequest, self).__init__(client.client)
+        self._aio_client = client
+
+    async def commit(self) -> List[object]:
+        """Commit the transaction.
+
+        :returns: A list of the results for each operation in the
+                  transaction.
+
+        """
+        return cast(
+            List[object], await self._aio_client._result(self.commit_async())
+        )
+
+    def __enter__(self) -> NoReturn:
+        raise TypeError("Use async with to commit on exit")
+
+    async def __aenter__(self) -> "AioTransactionRequest":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        """Commit and cleanup accumulated transaction data."""
+        if not exc_type:
+            await self.commit()
@@ -0,0 +1,277 @@
+"""asyncio Zookeeper Locking Implementations
+
+The locks of :mod:`kazoo.recipe.lock`, acquired with coroutines of an
+:class:`~kazoo.aio.client.AioKazooClient`. They must be created from a
+coroutine, and waiting for a lock only suspends the awaiting task.
+
+.. code-block:: python
+
+    lock = zk.Lock("/lockpath", "my-identifier")
+    async with lock:  # waits for lock acquisition
+        # do something with the lock
+
+"""
+import asyncio
+from types import TracebackType
+from typing import TYPE_CHECKING, List, NoReturn, Optional, Sequence, Type
+
+from kazoo.exceptions import (
+    CancelledError,
+    KazooException,
+    LockTimeout,
+    NoNodeError,
+)
+from kazoo.recipe import lock
+from kazoo.protocol.states import WatchedEvent
+from kazoo.retry import ForceRetryError, RetryFailedError
+
+if TYPE_CHECKING:
+    from kazoo.aio.client import AioKazooClient
+
+
+class Lock(lock.Lock):
+    """Kazoo Lock, see :class:`kazoo.recipe.lock.Lock`
+
+    This is an exclusive lock. For a read/write lock, see :class:`WriteLock`
+    and :class:`ReadLock`.
+
+    """
+
+    def __init__(
+        self,
+        client: "AioKazooClient",
+        path: str,
+        identifier: Optional[str] = None,
+        extra_lock_patterns: Sequence[str] = (),
+    ) -> None:
+        super(Lock, self).__init__(
+            client, path, identifier, extra_lock_patterns=extra_lock_patterns
+        )
+        self._loop = asyncio.get_running_loop()
+        self.wake_event = asyncio.Event()
+        self._acquire_method_lock = asyncio.Lock()
+
+    async def _ensure_path(self) -> None:
+        await self.client.ensure_path(self.path)
+        self.assured_path = True
+
+    def _wake(self) -> None:
+        self._loop.call_soon_threadsafe(self.wake_event.set)
+
+    def cancel(self) -> None:
+        """Cancel a pending lock acquire."""
+        self.cancelled = True
+        self._wake()
+
+    async def acquire(
+        self,
+        blocking: bool = True,
+        timeout: Optional[float] = None,
+        ephemeral: bool = True,
+    ) -> bool:
+        """Acquire the lock. Takes the same arguments as
+        :meth:`kazoo.recipe.lock.Lock.acquire`.
+
+        :returns: Was the lock acquired?
+        :rtype: bool
+
+        :raises: :exc:`~kazoo.exceptions.LockTimeout` if the lock
+                 wasn't acquired within `timeout` seconds.
+
+        """
+        retry = self._retry.copy()
+        retry.deadline = timeout
+
+        # Ensure we are locked so that we avoid multiple tasks in
+        # this acquisition routine at the same time...
+        if not blocking and self._acquire_method_lock.locked():
+            return False
+        try:
+            await asyncio.wait_for(
+                self._acquire_method_lock.acquire(), timeout
+            )
+        except asyncio.TimeoutError:
+            return False
+
+        already_acquired = self.is_acquired
+        try:
+            gotten: bool = False
+            try:
+                gotten = await retry.acall(
+                    self._inner_acquire,
+                    blocking=blocking,
+                    timeout=timeout,
+                    ephemeral=ephemeral,
+                )
+            except RetryFailedError:
+                pass
+            except KazooException:
+                # if we did ultimately fail, attempt to clean up
+                if not already_acquired:
+                    await self._best_effort_cleanup()
+                    self.cancelled = False
+                raise
+            if gotten:
+                self.is_acquired = gotten
+            if not gotten and not already_acquired:
+                await self._best_effort_cleanup()
+            return gotten
+        finally:
+            self._acquire_method_lock.release()
+
+    def _watch_session(self, state: str) -> bool:
+        self._wake()
+        return True
+
+    async def _inner_acquire(
+        self, blocking: bool, timeout: Optional[float], ephemeral: bool = True
+    ) -> bool:
+        # wait until it's our chance to get it..
+        if self.is_acquired:
+            if not blocking:
+                return False
+            raise ForceRetryError()
+
+        # make sure our election parent node exists
+        if not self.assured_path:
+            await self._ensure_path()
+
+        node: Optional[str] = None
+        if self.create_tried:
+            node = await self._find_node()
+        else:
+            self.create_tried = True
+
+        if not node:
+            node = await self.client.create(
+                self.create_path, self.data, ephemeral=ephemeral, sequence=True
+            )
+            # strip off path to node
+            node = node[len(self.path) + 1 :]
+
+        self.node = node
+
+        while True:
+            self.wake_event.clear()
+
+            # bail out with an exception if cancellation has been requested
+            if self.cancelled:
+                raise CancelledError()
+
+            predecessor = await self._get_predecessor(node)
+            if predecessor is None:
+                return True
+
+            if not blocking:
+                return False
+
+            # otherwise we are in the mix. watch predecessor and bide our time
+            predecessor = self.path + "/" + predecessor
+            self.client.add_listener(self._watch_session)
+            try:
+                await self.client.get(predecessor, self._watch_predecessor)
+            except NoNodeError:
+                pass  # predecessor has already been deleted
+            else:
+                try:
+                    await asyncio.wait_for(self.wake_event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    raise LockTimeout(
+                        "Failed to acquire lock on %s after %s seconds"
+                        % (self.path, timeout)
+                    )
+            finally:
+                self.client.remove_listener(self._watch_session)
+
+    def _watch_predecessor(self, event: WatchedEvent) -> None:
+        self._wake()
+
+    async def _get_predecessor(self, node: str) -> Optional[str]:
+        """returns `node`'s predecessor or None"""
+        children = await self.client.get_children(self.path)
+        return self._select_predecessor(node, children)
+
+    async def _find_node(self) -> Optional[str]:
+        children: List[str] = await self.client.get_children(self.path)
+        for child in children:
+            if child.startswith(self.prefix):
+                return child
+        return None
+
+    async def _delete_node(self, node: str) -> None:
+        await self.client.delete(self.path + "/" + node)
+
+    async def _best_effort_cleanup(self) -> None:
+        try:
+            node = self.node or await self._find_node()
+            if node:
+                await self._delete_node(node)
+        except KazooException:  # pragma: nocover
+            pass
+
+    async def release(self) -> bool:
+        """Release the lock immediately."""
+        released: bool = await self.client.retry(self._inner_release)
+        return released
+
+    async def _inner_release(self) -> bool:
+        if not self.is_acquired:
+            return False
+
+        assert self.node is not None
+        try:
+            await self._delete_node(self.node)
+        except NoNodeError:  # pragma: nocover
+            pass
+
+        self.is_acquired = False
+        self.node = None
+        return True
+
+    async def contenders(self) -> List[str]:
+        """Return an ordered list of the current contenders for the
+        lock, see :meth:`kazoo.recipe.lock.Lock.contenders`."""
+        # make sure our election parent node exists
+        if not self.assured_path:
+            await self._ensure_path()
+
+        children = await self.client.get_children(self.path)
+        # Retrieve all the contender nodes data (preserving order).
+        contenders = []
+        for node in self._contender_nodes(children):
+            try:
+                data, stat = await self.client.get(self.path + "/" + node)
+                if data is not None:
+                    contenders.append(data.decode("utf-8"))
+            except NoNodeError:  # pragma: nocover
+                pass
+
+        return contenders
+
+    def __enter__(self) -> NoReturn:
+        raise TypeError("Use async with to acquire the lock")
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.release()
+
+
+class WriteLock(Lock):
+    """Kazoo Write Lock, see :class:`kazoo.recipe.lock.WriteLock`"""
+
+    _NODE_NAME = lock.WriteLock._NODE_NAME
+    _EXCLUDE_NAMES = lock.WriteLock._EXCLUDE_NAMES
+
+
+class ReadLock(Lock):
+    """Kazoo Read Lock, see :class:`kazoo.recipe.lock.ReadLock`"""
+
+    _NODE_NAME = lock.ReadLock._NODE_NAME
+    _EXCLUDE_NAMES = lock.ReadLock._EXCLUDE_NAMES
@@ -0,0 +1,254 @@
+"""asyncio child and data watching API's.
+
+The watchers of :mod:`kazoo.recipe.watchers`, fetching the node with
+coroutines of an :class:`~kazoo.aio.client.AioKazooClient`. They must be
+created from a coroutine and call their function on the loop it runs on.
+The function may be a coroutine function.
+
+.. code-block:: python
+
+    @zk.DataWatch("/path/to/watch")
+    async def my_func(data, stat):
+        print("Data is %s" % data)
+
+"""
+import asyncio
+import inspect
+import logging
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Coroutine,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from kazoo.exceptions import ConnectionClosedError, NoNodeError
+from kazoo.protocol.states import (
+    KazooState,
+    LazyZnodeStat,
+    WatchedEvent,
+    ZnodeStat,
+)
+from kazoo.recipe import watchers
+
+if TYPE_CHECKING:
+    from typing_extensions import TypeVarTuple, Unpack
+
+    from kazoo.aio.client import AioKazooClient
+
+    _Ts = TypeVarTuple("_Ts")
+
+
+log = logging.getLogger(__name__)
+
+_Stat = Union[ZnodeStat, LazyZnodeStat]
+_Event = Optional[WatchedEvent]
+_DataFunc = Union[
+    Callable[[Optional[bytes], Optional[_Stat]], object],
+    Callable[[Optional[bytes], Optional[_Stat], _Event], object],
+]
+_ChildrenFunc = Union[
+    Callable[[List[str]], object],
+    Callable[[List[str], _Event], object],
+]
+
+
+class _LoopWatch(object):
+    """Runs the fetches of a watcher as tasks of the loop it was created
+    on, whichever thread the watches and session events come from."""
+
+    def _init_loop(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    def _schedule(
+        self,
+        coro_func: "Callable[[Unpack[_Ts]], Coroutine[object, object, None]]",
+        *args: "Unpack[_Ts]",
+    ) -> None:
+        self._loop.call_soon_threadsafe(self._create_task, coro_func, args)
+
+    def _create_task(
+        self,
+        coro_func: "Callable[[Unpack[_Ts]], Coroutine[object, object, None]]",
+        args: "Tuple[Unpack[_Ts]]",
+    ) -> None:
+        task = self._loop.create_task(coro_func(*args))
+        # Keep a reference to the task until it is done
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _call(
+        self, func: "Callable[[Unpack[_Ts]], object]", *args: "Unpack[_Ts]"
+    ) -> object:
+        result = func(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+
+class DataWatch(_LoopWatch, watchers.DataWatch):
+    """Watches a node for data updates and calls the specified
+    function each time it changes, see
+    :class:`kazoo.recipe.watchers.DataWatch`.
+
+    """
+
+    def __init__(
+        self,
+        client: "AioKazooClient",
+        path: str,
+        func: Optional[_DataFunc] = None,
+        *args: object,
+        **kwargs: object,
+    ) -> None:
+        self._init_loop()
+        super(DataWatch, self).__init__(client, path, func, *args, **kwargs)
+        self._run_lock = asyncio.Lock()
+
+    def _get_data(self, event: _Event = None) -> None:
+        self._schedule(self._fetch_data, event)
+
+    async def _fetch_data(self, event: _Event = None) -> None:
+        # Ensure this runs one at a time, possible because the session
+        # watcher may trigger a run
+        async with self._run_lock:
+            if self._stopped:
+                return
+
+            initial_version = self._version
+
+            try:
+                try:
+                    data, stat = await self._retry.acall(
+                        self._client.get, self._path, self._watcher
+                    )
+                except NoNodeError:
+                    data = None
+
+                    # This will set 'stat' to None if the node does not yet
+                    # exist.
+                    stat = await self._retry.acall(
+                        self._client.exists, self._path, self._watcher
+                    )
+                    if stat:
+                        self._get_data()
+                        return
+            except ConnectionClosedError:
+                return
+
+            # No node data, clear out version
+            if stat is None:
+                self._version = None
+            else:
+                self._version = stat.mzxid
+
+            # Call our function if its the first time ever, or if the
+            # version has changed
+            if initial_version != self._version or not self._ever_called:
+                await self._log_func_exception(data, stat, event)
+
+    async def _log_func_exception(
+        self,
+        data: Optional[bytes],
+        stat: Optional[_Stat],
+        event: _Event = None,
+    ) -> None:
+        self._ever_called = True
+        try:
+            try:
+                result = await self._call(self._func, data, stat, event)
+            except TypeError:
+                result = await self._call(self._func, data, stat)
+            if result is False:
+                self._stopped = True
+                self._func = None
+                self._client.remove_listener(self._session_watcher)
+        except Exception as exc:
+            log.exception(exc)
+
+    def _session_watcher(self, state: str) -> None:
+        if state == KazooState.CONNECTED:
+            self._get_data()
+
+
+class ChildrenWatch(_LoopWatch, watchers.ChildrenWatch):
+    """Watches a node for children updates and calls the specified
+    function each time it changes, see
+    :class:`kazoo.recipe.watchers.ChildrenWatch`.
+
+    """
+
+    def __init__(
+        self,
+        client: "AioKazooClient",
+        path: str,
+        func: Optional[_ChildrenFunc] = None,
+        allow_session_lost: bool = True,
+        send_event: bool = False,
+    ) -> None:
+        self._init_loop()
+        super(ChildrenWatch, self).__init__(
+            client,
+            path,
+            func,
+            allow_session_lost=allow_session_lost,
+            send_event=send_event,
+        )
+        self._run_lock = asyncio.Lock()
+
+    def _get_children(self, event: _Event = None) -> None:
+        self._schedule(self._fetch_children, event)
+
+    async def _fetch_children(self, event: _Event = None) -> None:
+        async with self._run_lock:  # Ensure this runs one at a time
+            if self._stopped:
+                return
+
+            try:
+                children = await self._client.retry(
+                    self._client.get_children, self._path, self._watcher
+                )
+            except NoNodeError:
+                self._stopped = True
+                return
+            except ConnectionClosedError:
+                return
+
+            if not self._watch_established:
+                self._watch_established = True
+
+                if (
+                    self._prior_children is not None
+                    and self._prior_children == children
+                ):
+                    return
+
+            self._prior_children = children
+
+            try:
+                if self._send_event:
+                    result = await self._call(self._func, children, event)
+                else:
+                    result = await self._call(self._func, children)
+                if result is False:
+                    self._stopped = True
+                    self._func = None
+                    if self._allow_session_lost:
+                        self._client.remove_listener(self._session_watcher)
+            except Exception as exc:
+                log.exception(exc)
+
+    def _session_watcher(self, state: str) -> None:
+        if state in (KazooState.LOST, KazooState.SUSPENDED):
+            self._watch_established = False
+        elif (
+            state == KazooState.CONNECTED
+            and not self._watch_established
+            and not self._stopped
+        ):
+            self._get_children()
@@ -0,0 +1,128 @@
+"""Kazoo benchmarks
+
+Run ``python -m kazoo.bench --help`` for the available benchmarks.
+Every benchmark prints a human readable report and can export its
+results as JSON, so that runs of different kazoo releases or handlers
+can be diffed.
+
+"""
+import json
+import math
+import platform
+import sys
+import time
+from typing import (
+    Dict,
+    Iterable,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+)
+
+from kazoo.version import __version__
+
+
+class Summary(TypedDict):
+    """The latencies of one operation type, see :func:`summarize`"""
+
+    count: int
+    errors: int
+    ops_per_sec: Optional[float]
+    mean_ms: Optional[float]
+    p50_ms: Optional[float]
+    p99_ms: Optional[float]
+    p999_ms: Optional[float]
+    max_ms: Optional[float]
+
+
+def percentile(ordered: Sequence[float], fraction: float) -> Optional[float]:
+    """Return the nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    index = int(math.ceil(fraction * len(ordered))) - 1
+    return ordered[max(0, min(index, len(ordered) - 1))]
+
+
+def summarize(
+    latencies: Iterable[float], elapsed: float, errors: int = 0
+) -> Summary:
+    """Summarize the latencies, in seconds, of the operations of one
+    type completed in `elapsed` seconds.
+
+    Latencies are reported in milliseconds.
+
+    """
+    ordered = sorted(latencies)
+    count = len(ordered)
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return None if value is None else round(value * 1000.0, 4)
+
+    return {
+        "count": count,
+        "errors": errors,
+        "ops_per_sec": round(count / elapsed, 2) if elapsed > 0 else None,
+        "mean_ms": ms(sum(ordered) / count) if count else None,
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "p999_ms": ms(percentile(ordered, 0.999)),
+        "max_ms": ms(ordered[-1]) if count else None,
+    }
+
+
+def environment() -> Dict[str, str]:
+    """Describe the environment a benchmark ran in"""
+    return {
+        "kazoo": __version__,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def write_json(path: str, document: Mapping[str, object]) -> None:
+    """Write a benchmark document to `path`, or stdout for ``-``"""
+    text = json.dumps(document, indent=2, sort_keys=True) + "\n"
+    if path == "-":
+        sys.stdout.write(text)
+    else:
+        with open(path, "w") as fh:
+            fh.write(text)
+
+
+def format_table(
+    rows: Iterable[Mapping[str, object]], columns: Sequence[Tuple[str, str]]
+) -> str:
+    """Format a list of dicts as a plain text table"""
+    header = [name for name, _ in columns]
+    lines = [header]
+    for row in rows:
+        lines.append(
+            [
+                "-" if row.get(key) is None else str(row.get(key))
+                for _, key in columns
+            ]
+        )
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    return "\n".join(
+        "  ".join(cell.rjust(width) for cell, width in zip(line, widths))
+        for line in lines
+    )
+
+
+def write_report(
+    report: str, document: Mapping[str, object], path: Optional[str] = None
+) -> None:
+    """Print the text `report` of a benchmark and write its `document`
+    to `path`, if any, see :func:`write_json`.
+
+    The report goes to stderr when the document is written to stdout,
+    so that the output of ``--json -`` stays valid JSON.
+
+    """
+    print(report, file=sys.stderr if path == "-" else sys.stdout)
+    if path:
+        write_json(path, document)
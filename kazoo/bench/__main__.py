@@ -0,0 +1,33 @@
+import argparse
+import logging
+import sys
+from typing import Callable, Optional, Sequence
+
+from kazoo.bench import imports, load, serialization
+
+
+BENCHMARKS = [load, serialization, imports]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m kazoo.bench", description="Kazoo benchmarks"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Enable debug logging"
+    )
+    subparsers = parser.add_subparsers(dest="benchmark", metavar="BENCHMARK")
+    subparsers.required = True
+    for module in BENCHMARKS:
+        module.register(subparsers)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING
+    )
+    func: Callable[[argparse.Namespace], int] = args.func
+    return func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
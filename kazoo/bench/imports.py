@@ -0,0 +1,136 @@
+"""Import time benchmark
+
+Measures, in fresh interpreters, how long importing kazoo modules and
+creating a :class:`~kazoo.client.KazooClient` take, and how many modules
+they load. This is the startup cost paid by short lived processes.
+
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple, TypedDict
+
+from kazoo.bench import environment, format_table, summarize, write_report
+
+
+DEFAULT_TARGETS = ("kazoo.client", "kazoo.client:KazooClient()")
+
+_PROBE = """
+import json, sys, time
+before = set(sys.modules)
+started = time.perf_counter()
+import %(module)s
+%(statement)s
+elapsed = time.perf_counter() - started
+print(json.dumps([elapsed, sorted(set(sys.modules) - before)]))
+"""
+
+
+class ImportsResult(TypedDict):
+    """The import time and the modules loaded of one target"""
+
+    target: str
+    min_ms: float
+    p50_ms: Optional[float]
+    mean_ms: Optional[float]
+    modules: int
+    kazoo_modules: List[str]
+
+
+class ImportsDocument(TypedDict):
+    """The results document of :func:`run`"""
+
+    benchmark: str
+    environment: Dict[str, str]
+    config: Dict[str, object]
+    results: List[ImportsResult]
+
+
+def probe(target: str) -> Tuple[float, List[str]]:
+    """Import `target` in a fresh interpreter and return the time it took
+    and the modules it loaded.
+
+    `target` is a module name, optionally followed by ``:`` and a
+    statement run in that module namespace, e.g.
+    ``kazoo.client:KazooClient()``.
+
+    """
+    module, _, statement = target.partition(":")
+    if statement:
+        statement = "from %s import *; %s" % (module, statement)
+    code = _PROBE % dict(module=module, statement=statement)
+    output = subprocess.check_output([sys.executable, "-c", code])
+    elapsed, modules = json.loads(output.decode("utf-8").splitlines()[-1])
+    return elapsed, modules
+
+
+def run(
+    targets: Sequence[str] = DEFAULT_TARGETS, repeat: int = 20
+) -> ImportsDocument:
+    """Probe each of `targets` `repeat` times and return the results
+    document"""
+    results: List[ImportsResult] = []
+    for target in targets:
+        timings: List[float] = []
+        for _ in range(repeat):
+            elapsed, modules = probe(target)
+            timings.append(elapsed)
+        summary = summarize(timings, sum(timings))
+        results.append(
+            {
+                "target": target,
+                "min_ms": round(min(timings) * 1000.0, 3),
+                "p50_ms": summary["p50_ms"],
+                "mean_ms": summary["mean_ms"],
+                "modules": len(modules),
+                "kazoo_modules": sorted(
+                    m for m in modules if m.split(".")[0] == "kazoo"
+                ),
+            }
+        )
+    return {
+        "benchmark": "imports",
+        "environment": environment(),
+        "config": {"targets": list(targets), "repeat": repeat},
+        "results": results,
+    }
+
+
+COLUMNS = [
+    ("target", "target"),
+    ("min ms", "min_ms"),
+    ("p50 ms", "p50_ms"),
+    ("mean ms", "mean_ms"),
+    ("modules", "modules"),
+]
+
+
+def register(
+    subparsers: "argparse._SubParsersAction[argparse.ArgumentParser]",
+) -> None:
+    parser = subparsers.add_parser(
+        "imports",
+        help="Measure import and client creation time",
+        description=__doc__.split("\n\n")[1],
+    )
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        metavar="TARGET",
+        default=list(DEFAULT_TARGETS),
+        help="Module to import, optionally followed by :statement",
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--json", metavar="PATH", help="Write the results as JSON to PATH"
+    )
+    parser.set_defaults(func=main)
+
+
+def main(args: argparse.Namespace) -> int:
+    document = run(args.targets, args.repeat)
+    write_report(
+        format_table(document["results"], COLUMNS), document, args.json
+    )
+    return 0
@@ -0,0 +1,524 @@
+"""Load and latency benchmark
+
+Drives a configurable workload from N clients, each keeping M requests in
+flight, and reports throughput and latency percentiles per operation type.
+
+Workloads:
+
+``read``
+    ``get`` of random nodes from a pre-populated set, optionally mixed
+    with ``set`` calls (see ``--write-ratio``).
+``churn``
+    ``create`` followed by ``delete`` of a node.
+``watch``
+    One writer updates a node while every other worker keeps a data watch
+    on it; reports the ``set`` latency and the ``notify`` latency from the
+    start of the ``set`` to the delivery of the watch event.
+``lock``
+    Every worker contends on a single :class:`~kazoo.recipe.lock.Lock`.
+``queue``
+    ``put`` followed by ``get`` on a shared
+    :class:`~kazoo.recipe.queue.Queue`.
+
+Without ``--hosts`` the benchmark runs against a local
+:class:`~kazoo.testing.fakeserver.FakeZooKeeperCluster`, which is useful to
+compare client side costs but says nothing about a real ensemble.
+
+"""
+import argparse
+from collections import defaultdict
+import contextlib
+from functools import partial
+import logging
+import random
+import time
+from typing import (
+    Callable,
+    DefaultDict,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    TypedDict,
+    TypeVar,
+)
+import uuid
+
+from kazoo.bench import (
+    Summary,
+    environment,
+    format_table,
+    summarize,
+    write_report,
+)
+from kazoo.client import KazooClient
+from kazoo.exceptions import NoNodeError
+from kazoo.protocol.states import WatchedEvent
+
+
+log = logging.getLogger(__name__)
+
+WORKLOADS = ("read", "churn", "watch", "lock", "queue")
+
+HANDLERS = ("threading", "gevent", "eventlet", "asyncio", "reactor")
+
+_T = TypeVar("_T")
+
+
+class LoadConfig(TypedDict):
+    """The parameters of a :class:`LoadBenchmark` run"""
+
+    hosts: str
+    workload: str
+    clients: int
+    concurrency: int
+    duration: float
+    warmup: float
+    handler: str
+    value_size: int
+    keys: int
+    write_ratio: float
+
+
+class LoadDocument(TypedDict):
+    """The results document of a :class:`LoadBenchmark` run"""
+
+    benchmark: str
+    environment: Dict[str, str]
+    config: LoadConfig
+    elapsed: float
+    results: Dict[str, Summary]
+
+
+class _Event(Protocol):
+    def set(self) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        ...
+
+
+@contextlib.contextmanager
+def _handler_factory(name: str) -> Iterator[Callable[[], object]]:
+    """Yield the factory of the handlers of the clients, stopping the
+    event loop shared by the asyncio and reactor handlers once done"""
+    if name in ("asyncio", "reactor"):
+        from kazoo.handlers.asyncio import AsyncioHandler
+        from kazoo.handlers.reactor import Reactor
+
+        # The clients share the loop of one reactor, which runs their
+        # watch callbacks with the asyncio handler
+        reactor = Reactor()
+        reactor.start()
+        try:
+            if name == "reactor":
+                yield reactor.handler
+            else:
+                yield partial(AsyncioHandler, loop=reactor.loop)
+        finally:
+            reactor.stop()
+        return
+    factory: Callable[[], object]
+    if name == "threading":
+        from kazoo.handlers.threading import SequentialThreadingHandler
+
+        factory = SequentialThreadingHandler
+    elif name == "gevent":
+        from kazoo.handlers.gevent import SequentialGeventHandler
+
+        factory = SequentialGeventHandler
+    elif name == "eventlet":
+        from kazoo.handlers.eventlet import SequentialEventletHandler
+
+        factory = SequentialEventletHandler
+    else:
+        raise ValueError("Unknown handler: %r" % (name,))
+    yield factory
+
+
+class Recorder(object):
+    """Collects the latencies of one worker.
+
+    Operations started before `measure_from` are part of the warmup and
+    are not recorded.
+
+    """
+
+    __slots__ = ("measure_from", "latencies", "errors")
+
+    def __init__(self, measure_from: float) -> None:
+        self.measure_from = measure_from
+        self.latencies: DefaultDict[str, List[float]] = defaultdict(list)
+        self.errors: DefaultDict[str, int] = defaultdict(int)
+
+    def record(
+        self, op: str, started: float, finished: Optional[float] = None
+    ) -> None:
+        if started < self.measure_from:
+            return
+        if finished is None:
+            finished = time.monotonic()
+        self.latencies[op].append(finished - started)
+
+    def error(self, op: str, started: float) -> None:
+        if started >= self.measure_from:
+            self.errors[op] += 1
+
+    def timed(self, op: str, func: Callable[[], _T]) -> Optional[_T]:
+        started = time.monotonic()
+        try:
+            result = func()
+        except Exception:
+            self.error(op, started)
+            log.debug("%s failed", op, exc_info=True)
+            return None
+        self.record(op, started)
+        return result
+
+
+class LoadBenchmark(object):
+    """Run one workload and collect its results.
+
+    :param hosts: Comma separated ``host:port`` pairs of the ensemble.
+    :param workload: One of :data:`WORKLOADS`.
+    :param clients: Number of client sessions.
+    :param concurrency: Number of requests each client keeps in flight.
+    :param duration: Measured run time in seconds.
+    :param warmup: Unmeasured run time in seconds before `duration`.
+    :param handler: One of :data:`HANDLERS`.
+    :param value_size: Size of the node values written.
+    :param keys: Number of nodes read by the ``read`` workload.
+    :param write_ratio: Fraction of ``set`` calls in the ``read`` workload.
+    :param root: Parent node of the nodes created by the benchmark.
+
+    """
+
+    def __init__(
+        self,
+        hosts: str,
+        workload: str = "read",
+        clients: int = 4,
+        concurrency: int = 8,
+        duration: float = 10.0,
+        warmup: float = 1.0,
+        handler: str = "threading",
+        value_size: int = 64,
+        keys: int = 100,
+        write_ratio: float = 0.0,
+        root: str = "/kazoo-bench",
+    ) -> None:
+        if workload not in WORKLOADS:
+            raise ValueError("Unknown workload: %r" % (workload,))
+        self.hosts = hosts
+        self.workload = workload
+        self.clients = clients
+        self.concurrency = concurrency
+        self.duration = duration
+        self.warmup = warmup
+        self.handler = handler
+        self.value_size = value_size
+        self.keys = keys
+        self.write_ratio = write_ratio
+        self.path = "%s/%s" % (root.rstrip("/"), uuid.uuid4().hex)
+        self.value = b"x" * value_size
+        self._running = False
+        self._set_started: Dict[int, float] = {}
+
+    def config(self) -> LoadConfig:
+        return {
+            "hosts": self.hosts,
+            "workload": self.workload,
+            "clients": self.clients,
+            "concurrency": self.concurrency,
+            "duration": self.duration,
+            "warmup": self.warmup,
+            "handler": self.handler,
+            "value_size": self.value_size,
+            "keys": self.keys,
+            "write_ratio": self.write_ratio,
+        }
+
+    def run(self) -> LoadDocument:
+        """Run the benchmark and return its results document"""
+        with _handler_factory(self.handler) as handler_class:
+            clients = [
+                KazooClient(hosts=self.hosts, handler=handler_class())
+                for _ in range(self.clients)
+            ]
+            for client in clients:
+                client.start()
+            try:
+                self._setup(clients[0])
+                results, elapsed = self._run(clients)
+            finally:
+                try:
+                    clients[0].delete(self.path, recursive=True)
+                except NoNodeError:
+                    pass
+                for client in clients:
+                    client.stop()
+                    client.close()
+        return {
+            "benchmark": "load",
+            "environment": environment(),
+            "config": self.config(),
+            "elapsed": round(elapsed, 4),
+            "results": results,
+        }
+
+    def _setup(self, client: KazooClient) -> None:
+        client.ensure_path(self.path)
+        if self.workload == "read":
+            for i in range(self.keys):
+                client.create("%s/k%d" % (self.path, i), self.value)
+        elif self.workload == "watch":
+            client.create(self.path + "/watched", self.value)
+
+    def _run(
+        self, clients: List[KazooClient]
+    ) -> Tuple[Dict[str, Summary], float]:
+        measure_from = time.monotonic() + self.warmup
+        self._running = True
+        workers: List[Tuple[KazooClient, Recorder, _Event]] = []
+        for index, client in enumerate(clients):
+            for slot in range(self.concurrency):
+                recorder = Recorder(measure_from)
+                done = client.handler.event_object()
+                workers.append((client, recorder, done))
+                worker_id = index * self.concurrency + slot
+                client.handler.spawn(
+                    self._worker, client, worker_id, recorder, done
+                )
+
+        sleep_func = clients[0].handler.sleep_func
+        sleep_func(self.warmup + self.duration)
+        self._running = False
+        elapsed = time.monotonic() - measure_from
+
+        for client, _, done in workers:
+            if not done.wait(30):
+                log.warning("A worker did not stop in time")
+
+        latencies: DefaultDict[str, List[float]] = defaultdict(list)
+        errors: DefaultDict[str, int] = defaultdict(int)
+        for _, recorder, _ in workers:
+            for op, values in recorder.latencies.items():
+                latencies[op].extend(values)
+            for op, count in recorder.errors.items():
+                errors[op] += count
+        results = {
+            op: summarize(latencies[op], elapsed, errors[op])
+            for op in sorted(set(latencies) | set(errors))
+        }
+        return results, elapsed
+
+    def _worker(
+        self,
+        client: KazooClient,
+        worker_id: int,
+        recorder: Recorder,
+        done: _Event,
+    ) -> None:
+        try:
+            getattr(self, "_%s_worker" % self.workload)(
+                client, worker_id, recorder
+            )
+        except Exception:
+            log.exception("Worker %d crashed", worker_id)
+        finally:
+            done.set()
+
+    def _read_worker(
+        self, client: KazooClient, worker_id: int, recorder: Recorder
+    ) -> None:
+        rand = random.Random(worker_id)
+        paths = ["%s/k%d" % (self.path, i) for i in range(self.keys)]
+        while self._running:
+            path = rand.choice(paths)
+            if rand.random() < self.write_ratio:
+                recorder.timed("set", partial(client.set, path, self.value))
+            else:
+                recorder.timed("get", partial(client.get, path))
+
+    def _churn_worker(
+        self, client: KazooClient, worker_id: int, recorder: Recorder
+    ) -> None:
+        path = "%s/w%d-" % (self.path, worker_id)
+        while self._running:
+            created = recorder.timed(
+                "create",
+                partial(client.create, path, self.value, sequence=True),
+            )
+            if created is not None:
+                recorder.timed("delete", partial(client.delete, created))
+
+    def _watch_worker(
+        self, client: KazooClient, worker_id: int, recorder: Recorder
+    ) -> None:
+        path = self.path + "/watched"
+        if worker_id == 0:
+            self._watch_writer(client, path, recorder)
+            return
+
+        fired: _Event = client.handler.event_object()
+        received: List[float] = []
+
+        def watcher(event: WatchedEvent) -> None:
+            received.append(time.monotonic())
+            fired.set()
+
+        while self._running:
+            fired.clear()
+            del received[:]
+            _, stat = client.get(path, watch=watcher)
+            if not fired.wait(1.0):
+                continue
+            # The watch fires for the first update after the version read
+            version = stat.version + 1
+            started = self._set_started.get(version)
+            if started is not None:
+                recorder.record("notify", started, received[0])
+            # The other watchers got the events of the previous updates
+            # by now, forget them so the map doesn't grow with the run
+            for previous in list(self._set_started):
+                if previous < version:
+                    self._set_started.pop(previous, None)
+
+    def _watch_writer(
+        self, client: KazooClient, path: str, recorder: Recorder
+    ) -> None:
+        version = client.exists(path).version
+        while self._running:
+            started = time.monotonic()
+            self._set_started[version + 1] = started
+            try:
+                version = client.set(path, self.value).version
+            except Exception:
+                recorder.error("set", started)
+                version = client.exists(path).version
+                continue
+            recorder.record("set", started)
+            client.handler.sleep_func(0.001)
+
+    def _lock_worker(
+        self, client: KazooClient, worker_id: int, recorder: Recorder
+    ) -> None:
+        lock = client.Lock(self.path + "/lock", str(worker_id))
+        while self._running:
+            if (
+                recorder.timed("acquire", partial(lock.acquire, timeout=5))
+                is None
+            ):
+                continue
+            recorder.timed("release", lock.release)
+
+    def _queue_worker(
+        self, client: KazooClient, worker_id: int, recorder: Recorder
+    ) -> None:
+        queue = client.Queue(self.path + "/queue")
+        while self._running:
+            recorder.timed("put", partial(queue.put, self.value))
+            recorder.timed("get", queue.get)
+
+
+COLUMNS = [
+    ("op", "op"),
+    ("count", "count"),
+    ("errors", "errors"),
+    ("ops/s", "ops_per_sec"),
+    ("mean ms", "mean_ms"),
+    ("p50 ms", "p50_ms"),
+    ("p99 ms", "p99_ms"),
+    ("p999 ms", "p999_ms"),
+    ("max ms", "max_ms"),
+]
+
+
+def report(document: LoadDocument) -> str:
+    """Format a results document as a text table"""
+    rows = [dict(result, op=op) for op, result in document["results"].items()]
+    config = document["config"]
+    title = "%s: %d clients x %d in flight, %.1fs, %s handler" % (
+        config["workload"],
+        config["clients"],
+        config["concurrency"],
+        document["elapsed"],
+        config["handler"],
+    )
+    return title + "\n" + format_table(rows, COLUMNS)
+
+
+def register(
+    subparsers: "argparse._SubParsersAction[argparse.ArgumentParser]",
+) -> None:
+    parser = subparsers.add_parser(
+        "load",
+        help="Measure throughput and latency under load",
+        description=__doc__.split("\n\n")[1],
+    )
+    parser.add_argument(
+        "--hosts",
+        help="Ensemble to benchmark; a local in-memory cluster if omitted",
+    )
+    parser.add_argument(
+        "--servers",
+        type=int,
+        default=3,
+        help="Size of the local cluster used without --hosts",
+    )
+    parser.add_argument("--workload", choices=WORKLOADS, default="read")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Requests in flight per client",
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--handler", choices=HANDLERS, default="threading")
+    parser.add_argument("--value-size", type=int, default=64)
+    parser.add_argument("--keys", type=int, default=100)
+    parser.add_argument("--write-ratio", type=float, default=0.0)
+    parser.add_argument("--root", default="/kazoo-bench")
+    parser.add_argument(
+        "--json", metavar="PATH", help="Write the results as JSON to PATH"
+    )
+    parser.set_defaults(func=main)
+
+
+def main(args: argparse.Namespace) -> int:
+    cluster = None
+    hosts = args.hosts
+    if hosts is None:
+        from kazoo.testing.fakeserver import FakeZooKeeperCluster
+
+        cluster = FakeZooKeeperCluster(size=args.servers)
+        cluster.start()
+        hosts = cluster.hosts
+    try:
+        document = LoadBenchmark(
+            hosts,
+            workload=args.workload,
+            clients=args.clients,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            warmup=args.warmup,
+            handler=args.handler,
+            value_size=args.value_size,
+            keys=args.keys,
+            write_ratio=args.write_ratio,
+            root=args.root,
+        ).run()
+    finally:
+        if cluster is not None:
+            cluster.terminate()
+    if cluster is not None:
+        document["config"]["hosts"] = "local in-memory cluster"
+    write_report(report(document), document, args.json)
+    return 0
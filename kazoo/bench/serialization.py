@@ -0,0 +1,461 @@
+"""Serialization microbenchmarks
+
+Times the serialization of every request type and the deserialization of
+every response type of :mod:`kazoo.protocol.serialization`, including large
+``GetChildren`` replies, large transactions and lazily read stats, and
+profiles their allocations with :mod:`tracemalloc`.
+
+Three allocation figures are reported per operation:
+
+``blocks`` and ``bytes``
+    Memory blocks, and their size, still allocated by one call once it
+    returned, i.e. the cost of the objects it produced.
+``peak``
+    The highest amount of memory held during one call, including
+    temporaries freed before it returned.
+
+"""
+import argparse
+import re
+import time
+import tracemalloc
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    TypedDict,
+)
+
+from kazoo.bench import environment, format_table, write_report
+from kazoo.protocol.serialization import (
+    Auth,
+    CheckVersion,
+    Connect,
+    Create,
+    Create2,
+    CreateFromTemplate,
+    CreateTemplate,
+    Delete,
+    Exists,
+    GetACL,
+    GetChildren,
+    GetChildren2,
+    GetData,
+    GetDataView,
+    MultiHeader,
+    Reconfig,
+    ReplyHeader,
+    SASL,
+    SetACL,
+    SetData,
+    SetWatches,
+    Sync,
+    Transaction,
+    Watch,
+    int_int_long_struct,
+    int_int_struct,
+    int_struct,
+    multiheader_struct,
+    read_lazy_stat,
+    read_stat,
+    reply_header_struct,
+    stat_struct,
+    write_buffer,
+    write_string,
+)
+from kazoo.security import ACL, OPEN_ACL_UNSAFE, make_digest_acl
+
+
+STAT = stat_struct.pack(
+    4294967310, 4294967320, 1700000000000, 1700000000500, 3, 2, 0, 0, 64, 1, 4
+)
+ACLS = OPEN_ACL_UNSAFE + [make_digest_acl("user", "secret", all=True)]
+PATH = "/kazoo/benchmark/some/node"
+TEMPLATE = CreateTemplate(PATH + "/member-", OPEN_ACL_UNSAFE, 0)
+
+
+class _Request(Protocol):
+    def serialize(self) -> object:
+        ...
+
+
+class _Response(Protocol):
+    def deserialize(self, bytes: bytes, offset: int) -> object:
+        ...
+
+
+class SerializationResult(TypedDict, total=False):
+    """The timing and, unless disabled, the allocations of one
+    benchmark"""
+
+    name: str
+    ns_per_op: float
+    ops_per_sec: Optional[float]
+    iterations: int
+    alloc_blocks: float
+    alloc_bytes: float
+    peak_bytes: int
+
+
+class SerializationDocument(TypedDict):
+    """The results document of :func:`run`"""
+
+    benchmark: str
+    environment: Dict[str, str]
+    config: Dict[str, object]
+    results: List[SerializationResult]
+
+
+def _acl_bytes(acls: Sequence[ACL]) -> bytes:
+    b = bytearray(int_struct.pack(len(acls)))
+    for acl in acls:
+        b.extend(int_struct.pack(acl.perms))
+        b.extend(write_string(acl.id.scheme))
+        b.extend(write_string(acl.id.id))
+    return bytes(b)
+
+
+def _children_bytes(count: int) -> bytes:
+    b = bytearray(int_struct.pack(count))
+    for i in range(count):
+        b.extend(write_string("member-%010d" % i))
+    return bytes(b)
+
+
+def _transaction_ops(count: int) -> List[_Request]:
+    ops: List[_Request] = []
+    for i in range(count // 4):
+        path = "%s/%d" % (PATH, i)
+        ops.append(Create(path, b"x" * 32, OPEN_ACL_UNSAFE, 0))
+        ops.append(SetData(path, b"y" * 32, -1))
+        ops.append(CheckVersion(path, 1))
+        ops.append(Delete(path, -1))
+    return ops
+
+
+def _transaction_reply(count: int) -> bytes:
+    b = bytearray()
+    for i in range(count // 4):
+        b.extend(multiheader_struct.pack(Create.type, False, 0))
+        b.extend(write_string("%s/%d" % (PATH, i)))
+        b.extend(multiheader_struct.pack(SetData.type, False, 0))
+        b.extend(STAT)
+        b.extend(multiheader_struct.pack(CheckVersion.type, False, 0))
+        b.extend(multiheader_struct.pack(Delete.type, False, 0))
+    b.extend(multiheader_struct.pack(-1, True, -1))
+    return bytes(b)
+
+
+def _set_watches(count: int) -> SetWatches:
+    """Return the SetWatches restoring `count` watches after a
+    reconnect, most of them data watches"""
+    paths = ["%s/member-%010d" % (PATH, i) for i in range(count)]
+    data, exist, child = count // 2, count // 4, count - count * 3 // 4
+    return SetWatches(
+        4294967310,
+        paths[:data],
+        paths[data : data + exist],
+        paths[data + exist : data + exist + child],
+    )
+
+
+class _GetDataStat(object):
+    """Deserializes ``GetData`` replies reading their stat with
+    `read_stat`, then reading its `field` if given"""
+
+    def __init__(
+        self,
+        read_stat: Callable[[bytes, int], object],
+        field: Optional[str] = None,
+    ) -> None:
+        self.read_stat = read_stat
+        self.field = field
+
+    def deserialize(self, bytes: bytes, offset: int) -> object:
+        data, stat = GetData.deserialize(
+            bytes, offset, read_stat=self.read_stat
+        )
+        if self.field is not None:
+            getattr(stat, self.field)
+        return data, stat
+
+
+def serialize_cases() -> List[Tuple[str, _Request]]:
+    """Return (name, request) pairs whose serialization is measured"""
+    big = b"x" * 1024 * 1024
+    return [
+        ("Connect", Connect(0, 12345, 10000, 0, b"\0" * 16, False)),
+        ("Create", Create(PATH, b"x" * 64, OPEN_ACL_UNSAFE, 0)),
+        ("Create[1MiB]", Create(PATH, big, OPEN_ACL_UNSAFE, 0)),
+        ("Create[2 acls]", Create(PATH, b"x" * 64, ACLS, 0)),
+        ("Create2", Create2(PATH, b"x" * 64, OPEN_ACL_UNSAFE, 3)),
+        (
+            "CreateFromTemplate",
+            CreateFromTemplate(TEMPLATE, "0000000001", b"x" * 64),
+        ),
+        ("Delete", Delete(PATH, -1)),
+        ("Exists", Exists(PATH, True)),
+        ("GetData", GetData(PATH, True)),
+        ("SetData", SetData(PATH, b"x" * 64, -1)),
+        ("SetData[1MiB]", SetData(PATH, big, -1)),
+        ("GetACL", GetACL(PATH)),
+        ("SetACL", SetACL(PATH, ACLS, -1)),
+        ("GetChildren", GetChildren(PATH, True)),
+        ("GetChildren2", GetChildren2(PATH, True)),
+        ("Sync", Sync(PATH)),
+        ("CheckVersion", CheckVersion(PATH, 1)),
+        ("SetWatches[4]", _set_watches(4)),
+        ("SetWatches[1000]", _set_watches(1000)),
+        ("Transaction[4]", Transaction(_transaction_ops(4))),
+        ("Transaction[1000]", Transaction(_transaction_ops(1000))),
+        ("Reconfig", Reconfig("server.4=h:1:2;3", "3", None, -1)),
+        ("Auth", Auth(0, "digest", "user:secret")),
+        ("SASL", SASL(b"\0" * 64)),
+        ("MultiHeader", MultiHeader(Create.type, False, -1)),
+    ]
+
+
+def deserialize_cases() -> List[Tuple[str, _Response, bytes]]:
+    """Return (name, response, reply bytes) triples whose
+    deserialization is measured, the response being a class or the
+    request of a type deserializing per request"""
+    return [
+        (
+            "Connect",
+            Connect,
+            int_int_long_struct.pack(0, 10000, 0x1234)
+            + write_buffer(b"\0" * 16)
+            + b"\0",
+        ),
+        ("Create", Create, write_string(PATH)),
+        ("Create2", Create2, write_string(PATH) + STAT),
+        (
+            "CreateFromTemplate",
+            CreateFromTemplate(TEMPLATE, "0000000001", b"x" * 64),
+            write_string(PATH + "/member-0000000001"),
+        ),
+        ("Delete", Delete, b""),
+        ("Exists", Exists, STAT),
+        ("GetData", GetData, write_buffer(b"x" * 64) + STAT),
+        (
+            "GetData[eager stat]",
+            _GetDataStat(read_stat),
+            write_buffer(b"x" * 64) + STAT,
+        ),
+        (
+            "GetData[eager stat, 1 field]",
+            _GetDataStat(read_stat, "mzxid"),
+            write_buffer(b"x" * 64) + STAT,
+        ),
+        (
+            "GetData[lazy stat]",
+            _GetDataStat(read_lazy_stat),
+            write_buffer(b"x" * 64) + STAT,
+        ),
+        (
+            "GetData[lazy stat, 1 field]",
+            _GetDataStat(read_lazy_stat, "mzxid"),
+            write_buffer(b"x" * 64) + STAT,
+        ),
+        (
+            "GetData[1MiB]",
+            GetData,
+            write_buffer(b"x" * 1024 * 1024) + STAT,
+        ),
+        ("GetDataView", GetDataView, write_buffer(b"x" * 64) + STAT),
+        (
+            "GetDataView[1MiB]",
+            GetDataView,
+            write_buffer(b"x" * 1024 * 1024) + STAT,
+        ),
+        ("SetData", SetData, STAT),
+        ("GetACL", GetACL, _acl_bytes(ACLS) + STAT),
+        ("SetACL", SetACL, STAT),
+        ("GetChildren[10]", GetChildren, _children_bytes(10)),
+        ("GetChildren[10000]", GetChildren, _children_bytes(10000)),
+        ("GetChildren2[10]", GetChildren2, _children_bytes(10) + STAT),
+        (
+            "GetChildren2[10000]",
+            GetChildren2,
+            _children_bytes(10000) + STAT,
+        ),
+        ("Sync", Sync, write_string(PATH)),
+        ("Transaction[4]", Transaction, _transaction_reply(4)),
+        ("Transaction[1000]", Transaction, _transaction_reply(1000)),
+        ("Reconfig", Reconfig, write_buffer(b"server.1=h:1:2;3") + STAT),
+        ("SASL", SASL, write_buffer(b"\0" * 64)),
+        (
+            "Watch",
+            Watch,
+            int_int_struct.pack(3, 3) + write_string(PATH),
+        ),
+        (
+            "ReplyHeader",
+            ReplyHeader,
+            reply_header_struct.pack(1, 4294967310, 0),
+        ),
+        (
+            "MultiHeader",
+            MultiHeader,
+            multiheader_struct.pack(Create.type, False, 0),
+        ),
+    ]
+
+
+def _time(func: Callable[[], object], min_time: float) -> Tuple[float, int]:
+    """Return the mean duration of `func` in seconds, calling it in
+    growing batches until a batch takes at least `min_time`"""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return elapsed / number, number
+        number *= 2 if elapsed <= 0 else max(2, int(min_time / elapsed))
+
+
+def _allocations(
+    func: Callable[[], object], repeat: int = 16
+) -> SerializationResult:
+    """Return the blocks and bytes retained by one call to `func`, and
+    its peak memory, all measured with tracemalloc"""
+    func()  # Fill caches before measuring
+    results: List[object] = [None] * repeat
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        for i in range(repeat):
+            results[i] = func()
+        after = tracemalloc.take_snapshot()
+
+        tracemalloc.clear_traces()
+        current = tracemalloc.get_traced_memory()[0]
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        func()
+        peak = tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(filters).compare_to(
+        before.filter_traces(filters), "filename"
+    )
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    return {
+        "alloc_blocks": round(blocks / repeat, 2),
+        "alloc_bytes": round(size / repeat, 1),
+        "peak_bytes": peak,
+    }
+
+
+def _measure(
+    name: str,
+    func: Callable[[], object],
+    min_time: float,
+    allocations: bool,
+) -> SerializationResult:
+    mean, number = _time(func, min_time)
+    result: SerializationResult = {
+        "name": name,
+        "ns_per_op": round(mean * 1e9, 1),
+        "ops_per_sec": round(1.0 / mean, 1) if mean > 0 else None,
+        "iterations": number,
+    }
+    if allocations:
+        result.update(_allocations(func))
+    return result
+
+
+def run(
+    pattern: Optional[str] = None,
+    min_time: float = 0.2,
+    allocations: bool = True,
+) -> SerializationDocument:
+    """Run the benchmarks whose name matches the `pattern` regular
+    expression and return their results document"""
+    match = re.compile(pattern or "").search
+    results: List[SerializationResult] = []
+    for name, request in serialize_cases():
+        name = "serialize " + name
+        if match(name):
+            results.append(
+                _measure(name, request.serialize, min_time, allocations)
+            )
+    for name, response, reply in deserialize_cases():
+        name = "deserialize " + name
+
+        def deserialize(
+            response: _Response = response, reply: bytes = reply
+        ) -> object:
+            return response.deserialize(reply, 0)
+
+        if match(name):
+            results.append(_measure(name, deserialize, min_time, allocations))
+    return {
+        "benchmark": "serialization",
+        "environment": environment(),
+        "config": {
+            "pattern": pattern,
+            "min_time": min_time,
+            "allocations": allocations,
+        },
+        "results": results,
+    }
+
+
+COLUMNS = [
+    ("benchmark", "name"),
+    ("ns/op", "ns_per_op"),
+    ("ops/s", "ops_per_sec"),
+    ("blocks", "alloc_blocks"),
+    ("bytes", "alloc_bytes"),
+    ("peak", "peak_bytes"),
+]
+
+
+def register(
+    subparsers: "argparse._SubParsersAction[argparse.ArgumentParser]",
+) -> None:
+    parser = subparsers.add_parser(
+        "serialization",
+        help="Measure request and response (de)serialization",
+        description=__doc__.split("\n\n")[1],
+    )
+    parser.add_argument(
+        "-k",
+        dest="pattern",
+        metavar="REGEX",
+        help="Only run the benchmarks matching REGEX",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="Minimum time spent timing each benchmark",
+    )
+    parser.add_argument(
+        "--no-allocations",
+        dest="allocations",
+        action="store_false",
+        help="Skip the tracemalloc allocation profile",
+    )
+    parser.add_argument(
+        "--json", metavar="PATH", help="Write the results as JSON to PATH"
+    )
+    parser.set_defaults(func=main)
+
+
+def main(args: argparse.Namespace) -> int:
+    document = run(args.pattern, args.min_time, args.allocations)
+    write_report(
+        format_table(document["results"], COLUMNS), document, args.json
+    )
+    return 0
@@ -1,10 +1,11 @@
 """Kazoo Zookeeper Client"""
-from collections import defaultdict, deque
+from collections import deque
 from functools import partial
-import inspect
+import importlib
 import logging
 from os.path import split
 import re
+from typing import TYPE_CHECKING
 import warnings
 
 from kazoo.exceptions import (
@@ -20,7 +21,7 @@ from kazoo.exceptions import (
 )
 from kazoo.handlers.threading import SequentialThreadingHandler
 from kazoo.handlers.utils import capture_exceptions, wrap
-from kazoo.hosts import collect_hosts
+from kazoo.hosts import collect_hosts, config_hosts
 from kazoo.loggingsupport import BLATHER
 from kazoo.protocol.connection import ConnectionHandler
 from kazoo.protocol.paths import _prefix_root, normpath
@@ -30,6 +31,8 @@ from kazoo.protocol.serialization import (
     CloseInstance,
     Create,
     Create2,
+    CreateFromTemplate,
+    CreateTemplate,
     Delete,
     Exists,
     GetChildren,
@@ -37,6 +40,7 @@ from kazoo.protocol.serialization import (
     GetACL,
     SetACL,
     GetData,
+    GetDataView,
     Reconfig,
     SetData,
     Sync,
@@ -49,19 +53,12 @@ from kazoo.protocol.states import (
     KeeperState,
     WatchedEvent,
 )
+from kazoo.protocol.watches import WatchRegistry
 from kazoo.retry import KazooRetry
 from kazoo.security import ACL, OPEN_ACL_UNSAFE
 
-# convenience API
-from kazoo.recipe.barrier import Barrier, DoubleBarrier
-from kazoo.recipe.counter import Counter
-from kazoo.recipe.election import Election
-from kazoo.recipe.lease import NonBlockingLease, MultiNonBlockingLease
-from kazoo.recipe.lock import Lock, ReadLock, WriteLock, Semaphore
-from kazoo.recipe.partitioner import SetPartitioner
-from kazoo.recipe.party import Party, ShallowParty
-from kazoo.recipe.queue import Queue, LockingQueue
-from kazoo.recipe.watchers import ChildrenWatch, DataWatch
+if TYPE_CHECKING:
+    from kazoo.interfaces import IAsyncResult
 
 
 CLOSED_STATES = (
@@ -71,6 +68,7 @@ CLOSED_STATES = (
 )
 ENVI_VERSION = re.compile(r"([\d\.]*).*", re.DOTALL)
 ENVI_VERSION_KEY = "zookeeper.version"
+CONFIG_PATH = "/zookeeper/config"
 log = logging.getLogger(__name__)
 
 
@@ -88,6 +86,108 @@ _RETRY_COMPAT_MAPPING = dict(
     retry_max_delay="max_delay",
 )
 
+# Recipes offered as client attributes, by the module defining them. They
+# are only imported when first used.
+_RECIPES = dict(
+    Barrier="kazoo.recipe.barrier",
+    DoubleBarrier="kazoo.recipe.barrier",
+    Counter="kazoo.recipe.counter",
+    Election="kazoo.recipe.election",
+    NonBlockingLease="kazoo.recipe.lease",
+    MultiNonBlockingLease="kazoo.recipe.lease",
+    Lock="kazoo.recipe.lock",
+    ReadLock="kazoo.recipe.lock",
+    WriteLock="kazoo.recipe.lock",
+    Semaphore="kazoo.recipe.lock",
+    SetPartitioner="kazoo.recipe.partitioner",
+    Party="kazoo.recipe.party",
+    ShallowParty="kazoo.recipe.party",
+    Queue="kazoo.recipe.queue",
+    LockingQueue="kazoo.recipe.queue",
+    ChildrenWatch="kazoo.recipe.watchers",
+    DataWatch="kazoo.recipe.watchers",
+)
+
+
+def _load_recipe(name):
+    module = importlib.import_module(_RECIPES[name])
+    return getattr(module, name)
+
+
+def __getattr__(name):
+    # The recipes used to be imported here, keep them reachable
+    if name in _RECIPES:
+        return _load_recipe(name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+class _RecipeDescriptor(object):
+    """Binds a recipe to the client it is looked up on, importing the
+    recipe on first use.
+
+    The bound recipe is cached in the client ``__dict__``, which takes
+    precedence over this non-data descriptor on later lookups.
+
+    """
+
+    def __init__(self, name, module=None):
+        self.name = name
+        self.module = module or _RECIPES[name]
+        self.__doc__ = "Bound :class:`~%s.%s` recipe" % (self.module, name)
+
+    def __get__(self, client, owner=None):
+        if client is None:
+            return self
+        recipe = getattr(importlib.import_module(self.module), self.name)
+        bound = partial(recipe, client)
+        client.__dict__[self.name] = bound
+        return bound
+
+
+class _Completion(object):
+    """Hands the outcome of a request to a plain callback, in place of an
+    :class:`~kazoo.interfaces.IAsyncResult`.
+
+    The callback is dispatched to the handler with the value and ``None``,
+    or ``None`` and the exception.
+
+    """
+
+    __slots__ = ("handler", "callback", "post")
+
+    def __init__(self, handler, callback, post=None):
+        self.handler = handler
+        self.callback = callback
+        self.post = post
+
+    def set(self, value=None):
+        if self.callback is None:
+            return
+        if self.post is not None:
+            value = self.post(value)
+        self.handler.dispatch_callback(
+            Callback("completion", self.callback, (value, None))
+        )
+
+    def set_exception(self, exception):
+        if self.callback is None:
+            return
+        self.handler.dispatch_callback(
+            Callback("completion", self.callback, (None, exception))
+        )
+
+
+# Outcome of the requests nobody waits for
+_IGNORED = _Completion(None, None)
+
+
+def _completion(client, callback, post=None):
+    if callback is None:
+        return _IGNORED
+    if not callable(callback):
+        raise TypeError("Invalid type for 'callback' (must be a callable)")
+    return _Completion(client.handler, callback, post)
+
 
 class KazooClient(object):
     """An Apache Zookeeper Python client supporting alternate callback
@@ -100,6 +200,24 @@ class KazooClient(object):
 
     """
 
+    Barrier = _RecipeDescriptor("Barrier")
+    Counter = _RecipeDescriptor("Counter")
+    DoubleBarrier = _RecipeDescriptor("DoubleBarrier")
+    ChildrenWatch = _RecipeDescriptor("ChildrenWatch")
+    DataWatch = _RecipeDescriptor("DataWatch")
+    Election = _RecipeDescriptor("Election")
+    NonBlockingLease = _RecipeDescriptor("NonBlockingLease")
+    MultiNonBlockingLease = _RecipeDescriptor("MultiNonBlockingLease")
+    Lock = _RecipeDescriptor("Lock")
+    ReadLock = _RecipeDescriptor("ReadLock")
+    WriteLock = _RecipeDescriptor("WriteLock")
+    Party = _RecipeDescriptor("Party")
+    Queue = _RecipeDescriptor("Queue")
+    LockingQueue = _RecipeDescriptor("LockingQueue")
+    SetPartitioner = _RecipeDescriptor("SetPartitioner")
+    Semaphore = _RecipeDescriptor("Semaphore")
+    ShallowParty = _RecipeDescriptor("ShallowParty")
+
     def __init__(
         self,
         hosts="127.0.0.1:2181",
@@ -120,6 +238,13 @@ class KazooClient(object):
         ca=None,
         use_ssl=False,
         verify_certs=True,
+        deserialize_threshold=None,
+        lazy_stats=False,
+        connect_attempt_delay=None,
+        latency_probe_interval=None,
+        rebalance_interval=None,
+        follow_config=False,
+        dns_cache_ttl=None,
         **kwargs,
     ):
         """Create a :class:`KazooClient` instance. All time arguments
@@ -182,6 +307,55 @@ class KazooClient(object):
         :param use_ssl: argument to control whether SSL is used or not
         :param verify_certs: when using SSL, argument to bypass
             certs verification
+        :param deserialize_threshold:
+            Size in bytes from which response payloads are deserialized
+            by the completion worker of the handler instead of the
+            connection thread, so that decoding large replies doesn't
+            delay the reading of the socket and the pings. Only handlers
+            with a completion worker thread, like the default
+            :class:`~kazoo.handlers.threading.SequentialThreadingHandler`,
+            support it. Disabled by default.
+        :param lazy_stats:
+            Return the stats of :meth:`exists`, :meth:`get`, :meth:`set`
+            and :meth:`get_children` as
+            :class:`~kazoo.protocol.states.LazyZnodeStat` objects, which
+            only decode the fields that are accessed, instead of
+            :class:`~kazoo.protocol.states.ZnodeStat` tuples.
+        :param connect_attempt_delay:
+            Delay in seconds after which the client starts connecting
+            to the next host while the connection to the previous one
+            is still in progress, as soon as it fails otherwise. The
+            session is established with the server of the first
+            connection to succeed, so that an unresponsive server only
+            delays it by this much instead of a whole connection
+            time-out. By default, the hosts are tried one at a time.
+        :param latency_probe_interval:
+            Interval in seconds between the measurements of the round
+            trip time to each server. The client then connects to the
+            servers with the lowest round trip times first, picking
+            randomly among those close to the lowest, and moves its
+            session to one of them when idle on a slower server.
+            Disabled by default.
+        :param rebalance_interval:
+            Interval in seconds between the reads of the number of
+            connections of each server, with the ``mntr`` or ``cons``
+            four letter words. When the server of the session has
+            more connections than the others, the session may move to
+            a less loaded server at a random time within the interval,
+            keeping its watches. Disabled by default.
+        :param follow_config:
+            Watch the dynamic configuration of the ensemble in
+            ``/zookeeper/config``, and replace the hosts of the client
+            with its servers when it changes. The session then moves
+            to another server with the probability that keeps the load
+            of the new ensemble balanced, or when its server was
+            removed. Requires Zookeeper 3.5 or above.
+        :param dns_cache_ttl:
+            Time in seconds the addresses of the hosts are cached
+            for, instead of being resolved before each connection
+            attempt. Expired addresses are still used while they are
+            resolved again in the background, and the last ones are
+            kept when that fails. Disabled by default.
 
         Basic Example:
 
@@ -222,7 +396,7 @@ class KazooClient(object):
 
         # Record the handler strategy used
         self.handler = handler if handler else SequentialThreadingHandler()
-        if inspect.isclass(self.handler):
+        if isinstance(self.handler, type):
             raise ConfigurationError(
                 "Handler must be an instance of a class, "
                 "not the class: %s" % self.handler
@@ -241,13 +415,20 @@ class KazooClient(object):
         self.keyfile = keyfile
         self.keyfile_password = keyfile_password
         self.ca = ca
+        self.deserialize_threshold = deserialize_threshold
+        self.lazy_stats = lazy_stats
+        self.connect_attempt_delay = connect_attempt_delay
+        self.latency_probe_interval = latency_probe_interval
+        self.rebalance_interval = rebalance_interval
+        self.follow_config = follow_config
+        self.dns_cache_ttl = dns_cache_ttl
         # Curator like simplified state tracking, and listeners for
         # state transitions
         self._state = KeeperState.CLOSED
         self.state = KazooState.LOST
         self.state_listeners = set()
-        self._child_watchers = defaultdict(set)
-        self._data_watchers = defaultdict(set)
+        self._child_watchers = WatchRegistry()
+        self._data_watchers = WatchRegistry()
         self._reset()
         self.read_only = read_only
 
@@ -357,7 +538,11 @@ class KazooClient(object):
         )
 
         self._conn_retry.interrupt = lambda: self._stopped.is_set()
-        self._connection = ConnectionHandler(
+        # Handlers may drive the connection their own way
+        connection_class = getattr(
+            self.handler, "connection_class", ConnectionHandler
+        )
+        self._connection = connection_class(
             self,
             self._conn_retry.copy(),
             logger=self.logger,
@@ -373,24 +558,6 @@ class KazooClient(object):
 
         self.retry = _retry
 
-        self.Barrier = partial(Barrier, self)
-        self.Counter = partial(Counter, self)
-        self.DoubleBarrier = partial(DoubleBarrier, self)
-        self.ChildrenWatch = partial(ChildrenWatch, self)
-        self.DataWatch = partial(DataWatch, self)
-        self.Election = partial(Election, self)
-        self.NonBlockingLease = partial(NonBlockingLease, self)
-        self.MultiNonBlockingLease = partial(MultiNonBlockingLease, self)
-        self.Lock = partial(Lock, self)
-        self.ReadLock = partial(ReadLock, self)
-        self.WriteLock = partial(WriteLock, self)
-        self.Party = partial(Party, self)
-        self.Queue = partial(Queue, self)
-        self.LockingQueue = partial(LockingQueue, self)
-        self.SetPartitioner = partial(SetPartitioner, self)
-        self.Semaphore = partial(Semaphore, self)
-        self.ShallowParty = partial(ShallowParty, self)
-
         # If we got any unhandled keywords, complain like Python would
         if kwargs:
             raise TypeError(
@@ -409,19 +576,10 @@ class KazooClient(object):
         self._protocol_version = None
 
     def _reset_watchers(self):
-        watchers = []
-        for child_watchers in self._child_watchers.values():
-            watchers.extend(child_watchers)
-
-        for data_watchers in self._data_watchers.values():
-            watchers.extend(data_watchers)
-
-        self._child_watchers = defaultdict(set)
-        self._data_watchers = defaultdict(set)
-
         ev = WatchedEvent(EventType.NONE, self._state, None)
-        for watch in watchers:
-            self.handler.dispatch_callback(Callback("watch", watch, (ev,)))
+        for registry in (self._child_watchers, self._data_watchers):
+            for watch in registry.reset():
+                self.handler.dispatch_callback(Callback("watch", watch, (ev,)))
 
     def _reset_session(self):
         self._session_id = None
@@ -563,6 +721,8 @@ class KazooClient(object):
             )
             self._live.set()
             self._make_state_change(KazooState.CONNECTED)
+            if self.follow_config:
+                self._watch_config()
         elif state in CLOSED_STATES:
             self.logger.info("Zookeeper session closed, state: %s", state)
             self._live.clear()
@@ -577,6 +737,39 @@ class KazooClient(object):
             self._make_state_change(KazooState.SUSPENDED)
             self._reset_watchers()
 
+    def _watch_config(self, changed=False):
+        """Read the dynamic configuration, leaving a watch on it"""
+        # The configuration is out of the chroot
+        self._call(
+            GetData(CONFIG_PATH, self._config_changed),
+            _completion(self, partial(self._config_read, changed)),
+        )
+
+    def _config_changed(self, event):
+        if event.type == EventType.CHANGED:
+            self._watch_config(changed=True)
+
+    def _config_read(self, changed, result, exc):
+        if exc is not None:
+            self.logger.debug("Cannot read the configuration: %s", exc)
+            return
+        try:
+            hosts = config_hosts(result[0] or b"")
+        except ValueError as e:
+            self.logger.warning("Invalid configuration: %s", e)
+            return
+        if not hosts or set(hosts) == set(self.hosts):
+            return
+        self.logger.info(
+            "Ensemble changed to %s",
+            ",".join("%s:%s" % host_port for host_port in hosts),
+        )
+        old_hosts, self.hosts = self.hosts, hosts
+        if changed:
+            # Only rebalance on actual changes, the hosts given to the
+            # client may name the same servers differently
+            self._connection.update_hosts(old_hosts, hosts)
+
     def _notify_pending(self, state):
         """Used to clear a pending response queue and request queue
         during connection drops."""
@@ -758,20 +951,7 @@ class KazooClient(object):
             raise ConnectionLoss("No connection to server")
 
         peer = self._connection._socket.getpeername()[:2]
-        sock = self.handler.create_connection(
-            peer,
-            timeout=self._session_timeout / 1000.0,
-            use_ssl=self.use_ssl,
-            ca=self.ca,
-            certfile=self.certfile,
-            keyfile=self.keyfile,
-            keyfile_password=self.keyfile_password,
-            verify_certs=self.verify_certs,
-        )
-        sock.sendall(cmd)
-        result = sock.recv(8192)
-        sock.close()
-        return result.decode("utf-8", "replace")
+        return self._connection._command(peer[0], peer[1], cmd)
 
     def server_version(self, retries=3):
         """Get the version of the currently connected ZK server.
@@ -1026,36 +1206,14 @@ class KazooClient(object):
         .. versionadded:: 2.7
             The `include_data` option.
         """
-        if acl is None and self.default_acl:
-            acl = self.default_acl
-
-        if not isinstance(path, str):
-            raise TypeError("Invalid type for 'path' (string expected)")
-        if acl and (
-            isinstance(acl, ACL) or not isinstance(acl, (tuple, list))
-        ):
-            raise TypeError(
-                "Invalid type for 'acl' (acl must be a tuple/list" " of ACL's"
-            )
-        if value is not None and not isinstance(value, bytes):
-            raise TypeError("Invalid type for 'value' (must be a byte string)")
-        if not isinstance(ephemeral, bool):
-            raise TypeError("Invalid type for 'ephemeral' (bool expected)")
-        if not isinstance(sequence, bool):
-            raise TypeError("Invalid type for 'sequence' (bool expected)")
+        acl, flags = self._create_options(
+            path, value, acl, ephemeral, sequence
+        )
         if not isinstance(makepath, bool):
             raise TypeError("Invalid type for 'makepath' (bool expected)")
         if not isinstance(include_data, bool):
             raise TypeError("Invalid type for 'include_data' (bool expected)")
 
-        flags = 0
-        if ephemeral:
-            flags |= 1
-        if sequence:
-            flags |= 2
-        if acl is None:
-            acl = OPEN_ACL_UNSAFE
-
         async_result = self.handler.async_result()
 
         @capture_exceptions(async_result)
@@ -1095,6 +1253,109 @@ class KazooClient(object):
         do_create()
         return async_result
 
+    def create_nowait(
+        self,
+        path,
+        value=b"",
+        acl=None,
+        ephemeral=False,
+        sequence=False,
+        callback=None,
+    ):
+        """Create a node without waiting for the result. Takes the same
+        arguments as :meth:`create`, with the exception of `makepath` and
+        `include_data`.
+
+        :param callback: Function called with the path of the new node
+                         and ``None``, or ``None`` and the exception the
+                         request failed with.
+
+        No :class:`~kazoo.interfaces.IAsyncResult` is created, the
+        callback is dispatched to the handler as the watches are. Without
+        a callback, the outcome is ignored.
+
+        """
+        acl, flags = self._create_options(
+            path, value, acl, ephemeral, sequence
+        )
+        request = Create(
+            _prefix_root(self.chroot, path, trailing=sequence),
+            value,
+            acl,
+            flags,
+        )
+        self._call(request, _completion(self, callback, self.unchroot))
+
+    def prepare_create(
+        self,
+        path,
+        acl=None,
+        ephemeral=False,
+        sequence=False,
+        include_data=False,
+    ):
+        """Prepare the creates of nodes sharing a path prefix, ACL and
+        flags, serialized once rather than for every create.
+
+        :param path: Path prefix of the nodes, completed by the suffix
+                     given to each create.
+        :param acl: :class:`~kazoo.security.ACL` list.
+        :param ephemeral: Boolean indicating whether nodes are ephemeral.
+        :param sequence: Boolean indicating whether the paths are suffixed
+                         with a unique index.
+        :param include_data:
+            Include the :class:`~kazoo.protocol.states.ZnodeStat` of the
+            nodes in the results.
+        :returns: A prepared create.
+        :rtype: :class:`PreparedCreate`
+
+        .. code-block:: python
+
+            entries = zk.prepare_create("/queue/entry-", sequence=True)
+            for item in items:
+                entries.create_async(item)
+
+        """
+        acl, flags = self._create_options(path, None, acl, ephemeral, sequence)
+        if not isinstance(include_data, bool):
+            raise TypeError("Invalid type for 'include_data' (bool expected)")
+        template = CreateTemplate(
+            _prefix_root(self.chroot, path, trailing=True),
+            acl,
+            flags,
+            include_data=include_data,
+        )
+        return PreparedCreate(self, template)
+
+    def _create_options(self, path, value, acl, ephemeral, sequence):
+        """Validate the arguments of a create, returns its ACL and flags"""
+        if acl is None and self.default_acl:
+            acl = self.default_acl
+
+        if not isinstance(path, str):
+            raise TypeError("Invalid type for 'path' (string expected)")
+        if acl and (
+            isinstance(acl, ACL) or not isinstance(acl, (tuple, list))
+        ):
+            raise TypeError(
+                "Invalid type for 'acl' (acl must be a tuple/list" " of ACL's"
+            )
+        if value is not None and not isinstance(value, bytes):
+            raise TypeError("Invalid type for 'value' (must be a byte string)")
+        if not isinstance(ephemeral, bool):
+            raise TypeError("Invalid type for 'ephemeral' (bool expected)")
+        if not isinstance(sequence, bool):
+            raise TypeError("Invalid type for 'sequence' (bool expected)")
+
+        flags = 0
+        if ephemeral:
+            flags |= 1
+        if sequence:
+            flags |= 2
+        if acl is None:
+            acl = OPEN_ACL_UNSAFE
+        return acl, flags
+
     def _create_async_inner(
         self, path, value, acl, flags, trailing=False, include_data=False
     ):
@@ -1200,18 +1461,35 @@ class KazooClient(object):
         :rtype: :class:`~kazoo.interfaces.IAsyncResult`
 
         """
+        async_result = self.handler.async_result()
+        self._call(self._exists_request(path, watch), async_result)
+        return async_result
+
+    def _exists_request(self, path, watch):
         if not isinstance(path, str):
             raise TypeError("Invalid type for 'path' (string expected)")
         if watch and not callable(watch):
             raise TypeError("Invalid type for 'watch' (must be a callable)")
+        return Exists(_prefix_root(self.chroot, path), watch)
 
-        async_result = self.handler.async_result()
+    def exists_nowait(self, path, watch=None, callback=None):
+        """Check if a node exists without waiting for the result. Takes
+        the same arguments as :meth:`exists`.
+
+        :param callback: Function called with the
+                         :class:`~kazoo.protocol.states.ZnodeStat` of the
+                         node, or ``None`` if it does not exist, and
+                         ``None``, or ``None`` and the exception the
+                         request failed with.
+
+        See :meth:`create_nowait`.
+
+        """
         self._call(
-            Exists(_prefix_root(self.chroot, path), watch), async_result
+            self._exists_request(path, watch), _completion(self, callback)
         )
-        return async_result
 
-    def get(self, path, watch=None):
+    def get(self, path, watch=None, zero_copy=False):
         """Get the value of a node.
 
         If a watch is provided, it will be left on the node with the
@@ -1221,6 +1499,11 @@ class KazooClient(object):
         :param path: Path of node.
         :param watch: Optional watch callback to set for future changes
                       to this path.
+        :param zero_copy:
+            Return the value as a read-only :class:`memoryview` of the
+            received response instead of copying it to :class:`bytes`.
+            The view keeps the whole response in memory for as long as
+            it is referenced.
         :returns:
             Tuple (value, :class:`~kazoo.protocol.states.ZnodeStat`) of
             node.
@@ -1234,25 +1517,44 @@ class KazooClient(object):
             returns a non-zero error code
 
         """
-        return self.get_async(path, watch=watch).get()
+        return self.get_async(path, watch=watch, zero_copy=zero_copy).get()
 
-    def get_async(self, path, watch=None):
+    def get_async(self, path, watch=None, zero_copy=False):
         """Asynchronously get the value of a node. Takes the same
         arguments as :meth:`get`.
 
         :rtype: :class:`~kazoo.interfaces.IAsyncResult`
 
         """
+        async_result = self.handler.async_result()
+        self._call(self._get_request(path, watch, zero_copy), async_result)
+        return async_result
+
+    def _get_request(self, path, watch, zero_copy=False):
         if not isinstance(path, str):
             raise TypeError("Invalid type for 'path' (string expected)")
         if watch and not callable(watch):
             raise TypeError("Invalid type for 'watch' (must be a callable)")
+        if zero_copy:
+            return GetDataView(_prefix_root(self.chroot, path), watch)
+        return GetData(_prefix_root(self.chroot, path), watch)
 
-        async_result = self.handler.async_result()
+    def get_nowait(self, path, watch=None, callback=None, zero_copy=False):
+        """Get the value of a node without waiting for the result. Takes
+        the same arguments as :meth:`get`.
+
+        :param callback: Function called with the value and
+                         :class:`~kazoo.protocol.states.ZnodeStat` tuple
+                         and ``None``, or ``None`` and the exception the
+                         request failed with.
+
+        See :meth:`create_nowait`.
+
+        """
         self._call(
-            GetData(_prefix_root(self.chroot, path), watch), async_result
+            self._get_request(path, watch, zero_copy),
+            _completion(self, callback),
         )
-        return async_result
 
     def get_children(self, path, watch=None, include_data=False):
         """Get a list of child nodes of a path.
@@ -1299,6 +1601,14 @@ class KazooClient(object):
         :rtype: :class:`~kazoo.interfaces.IAsyncResult`
 
         """
+        async_result = self.handler.async_result()
+        self._call(
+            self._get_children_request(path, watch, include_data),
+            async_result,
+        )
+        return async_result
+
+    def _get_children_request(self, path, watch, include_data):
         if not isinstance(path, str):
             raise TypeError("Invalid type for 'path' (string expected)")
         if watch and not callable(watch):
@@ -1306,13 +1616,28 @@ class KazooClient(object):
         if not isinstance(include_data, bool):
             raise TypeError("Invalid type for 'include_data' (bool expected)")
 
-        async_result = self.handler.async_result()
         if include_data:
-            req = GetChildren2(_prefix_root(self.chroot, path), watch)
+            return GetChildren2(_prefix_root(self.chroot, path), watch)
         else:
-            req = GetChildren(_prefix_root(self.chroot, path), watch)
-        self._call(req, async_result)
-        return async_result
+            return GetChildren(_prefix_root(self.chroot, path), watch)
+
+    def get_children_nowait(
+        self, path, watch=None, include_data=False, callback=None
+    ):
+        """Get a list of child nodes of a path without waiting for the
+        result. Takes the same arguments as :meth:`get_children`.
+
+        :param callback: Function called with the list of children and
+                         ``None``, or ``None`` and the exception the
+                         request failed with.
+
+        See :meth:`create_nowait`.
+
+        """
+        self._call(
+            self._get_children_request(path, watch, include_data),
+            _completion(self, callback),
+        )
 
     def get_acls(self, path):
         """Return the ACL and stat of the node of the given path.
@@ -1442,19 +1767,35 @@ class KazooClient(object):
         :rtype: :class:`~kazoo.interfaces.IAsyncResult`
 
         """
+        async_result = self.handler.async_result()
+        self._call(self._set_request(path, value, version), async_result)
+        return async_result
+
+    def _set_request(self, path, value, version):
         if not isinstance(path, str):
             raise TypeError("Invalid type for 'path' (string expected)")
         if value is not None and not isinstance(value, bytes):
             raise TypeError("Invalid type for 'value' (must be a byte string)")
         if not isinstance(version, int):
             raise TypeError("Invalid type for 'version' (int expected)")
+        return SetData(_prefix_root(self.chroot, path), value, version)
 
-        async_result = self.handler.async_result()
+    def set_nowait(self, path, value, version=-1, callback=None):
+        """Set the value of a node without waiting for the result. Takes
+        the same arguments as :meth:`set`.
+
+        :param callback: Function called with the updated
+                         :class:`~kazoo.protocol.states.ZnodeStat` and
+                         ``None``, or ``None`` and the exception the
+                         request failed with.
+
+        See :meth:`create_nowait`.
+
+        """
         self._call(
-            SetData(_prefix_root(self.chroot, path), value, version),
-            async_result,
+            self._set_request(path, value, version),
+            _completion(self, callback),
         )
-        return async_result
 
     def transaction(self):
         """Create and return a :class:`TransactionRequest` object
@@ -1518,15 +1859,31 @@ class KazooClient(object):
         :rtype: :class:`~kazoo.interfaces.IAsyncResult`
 
         """
+        async_result = self.handler.async_result()
+        self._call(self._delete_request(path, version), async_result)
+        return async_result
+
+    def _delete_request(self, path, version):
         if not isinstance(path, str):
             raise TypeError("Invalid type for 'path' (string expected)")
         if not isinstance(version, int):
             raise TypeError("Invalid type for 'version' (int expected)")
-        async_result = self.handler.async_result()
+        return Delete(_prefix_root(self.chroot, path), version)
+
+    def delete_nowait(self, path, version=-1, callback=None):
+        """Delete a node without waiting for the result. Takes the same
+        arguments as :meth:`delete`, with the exception of `recursive`.
+
+        :param callback: Function called with ``True`` and ``None``, or
+                         ``None`` and the exception the request failed
+                         with.
+
+        See :meth:`create_nowait`.
+
+        """
         self._call(
-            Delete(_prefix_root(self.chroot, path), version), async_result
+            self._delete_request(path, version), _completion(self, callback)
         )
-        return async_result
 
     def _delete_recursive(self, path):
         try:
@@ -1645,6 +2002,85 @@ class KazooClient(object):
         return async_result
 
 
+class PreparedCreate(object):
+    """Creates of nodes sharing a path prefix, ACL and flags
+
+    Returned by :meth:`KazooClient.prepare_create`, which serializes the
+    path prefix, the ACL and the flags once. Each create only serializes
+    its path suffix and data, which makes producers of many similar
+    nodes cheaper.
+
+    The parent of the nodes must exist, `makepath` isn't supported.
+
+    """
+
+    def __init__(self, client, template):
+        self.client = client
+        self.template = template
+
+    def _request(self, value, suffix):
+        if not isinstance(suffix, str):
+            raise TypeError("Invalid type for 'suffix' (string expected)")
+        if value is not None and not isinstance(value, bytes):
+            raise TypeError("Invalid type for 'value' (must be a byte string)")
+        return CreateFromTemplate(self.template, suffix, value)
+
+    def _unchroot(self, result):
+        if self.template.request_class is Create2:
+            path, stat = result
+            return self.client.unchroot(path), stat
+        return self.client.unchroot(result)
+
+    def create(self, value=b"", suffix=""):
+        """Create the node of the path prefix followed by `suffix`.
+
+        :param value: Initial bytes value of node.
+        :param suffix: End of the path of the node.
+        :returns: Real path of the new node, with the
+                  :class:`~kazoo.protocol.states.ZnodeStat` if the create
+                  was prepared with `include_data`.
+
+        :raises:
+            The exceptions of :meth:`KazooClient.create`.
+
+        """
+        return self.create_async(value, suffix).get()
+
+    def create_async(self, value=b"", suffix=""):
+        """Asynchronously create a node. Takes the same arguments as
+        :meth:`create`.
+
+        :rtype: :class:`~kazoo.interfaces.IAsyncResult`
+
+        """
+        request = self._request(value, suffix)
+        async_result = self.client.handler.async_result()
+
+        @wrap(async_result)
+        def create_completion(result):
+            return self._unchroot(result.get())
+
+        result = self.client.handler.async_result()
+        self.client._call(request, result)
+        result.rawlink(create_completion)
+        return async_result
+
+    def create_nowait(self, value=b"", suffix="", callback=None):
+        """Create a node without waiting for the result, see
+        :meth:`KazooClient.create_nowait`. Takes the same arguments as
+        :meth:`create`.
+
+        :param callback: Function called with the result of the create and
+                         ``None``, or ``None`` and the exception the
+                         request failed with.
+
+        """
+        self.client._call(
+            self._request(value, suffix),
+            _completion(self.client, callback, self._unchroot),
+        )
+
+
 class TransactionRequest(object):
     """A Zookeeper Transaction Request
 
@@ -1667,14 +2103,14 @@ class TransactionRequest(object):
 
     """
 
-    def __init__(self, client):
+    def __init__(self, client) -> None:
         self.client = client
         self.operations = []
         self.committed = False
 
     def create(
         self, path, value=b"", acl=None, ephemeral=False, sequence=False
-    ):
+    ) -> None:
         """Add a create ZNode to the transaction. Takes the same
         arguments as :meth:`KazooClient.create`, with the exception
         of `makepath`.
@@ -1711,7 +2147,7 @@ class TransactionRequest(object):
             None,
         )
 
-    def delete(self, path, version=-1):
+    def delete(self, path, version=-1) -> None:
         """Add a delete ZNode to the transaction. Takes the same
         arguments as :meth:`KazooClient.delete`, with the exception of
         `recursive`.
@@ -1723,7 +2159,7 @@ class TransactionRequest(object):
             raise TypeError("Invalid type for 'version' (int expected)")
         self._add(Delete(_prefix_root(self.client.chroot, path), version))
 
-    def set_data(self, path, value, version=-1):
+    def set_data(self, path, value, version=-1) -> None:
         """Add a set ZNode value to the transaction. Takes the same
         arguments as :meth:`KazooClient.set`.
 
@@ -1738,7 +2174,7 @@ class TransactionRequest(object):
             SetData(_prefix_root(self.client.chroot, path), value, version)
         )
 
-    def check(self, path, version):
+    def check(self, path, version) -> None:
         """Add a Check Version to the transaction.
 
         This command will fail and abort a transaction if the path
@@ -1753,7 +2189,7 @@ class TransactionRequest(object):
             CheckVersion(_prefix_root(self.client.chroot, path), version)
         )
 
-    def commit_async(self):
+    def commit_async(self) -> "IAsyncResult":
         """Commit the transaction asynchronously.
 
         :rtype: :class:`~kazoo.interfaces.IAsyncResult`
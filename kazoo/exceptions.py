@@ -12,6 +12,8 @@ class ZookeeperError(KazooException):
     """Base Zookeeper exception for errors originating from the
     Zookeeper server"""
 
+    code: int
+
 
 class CancelledError(KazooException):
     """Raised when a process is cancelled by another thread"""
@@ -0,0 +1,430 @@
+"""An asyncio based handler.
+
+The connection runs as an :class:`asyncio.Protocol` on the event loop of
+the application and every callback, watch or completion, is scheduled on
+that loop with :meth:`~asyncio.loop.call_soon`.
+
+Results are awaitable::
+
+    import asyncio
+
+    from kazoo.client import KazooClient
+    from kazoo.handlers.asyncio import AsyncioHandler
+
+    async def main():
+        client = KazooClient(handler=AsyncioHandler())
+        await client.handler.start_client(client)
+        data, stat = await client.get_async("/some/node")
+        await client.handler.stop_client(client)
+
+    asyncio.run(main())
+
+The blocking methods of :class:`~kazoo.client.KazooClient`, such as
+:meth:`~kazoo.client.KazooClient.get`, must not be called from the event
+loop itself, since they wait for replies that the loop would then never
+process. They can be called from other threads. The recipes whose watch
+callbacks make blocking calls, like
+:class:`~kazoo.recipe.watchers.DataWatch`, cannot be used with this handler.
+
+"""
+from __future__ import absolute_import
+
+import asyncio
+import functools
+import logging
+import queue
+import socket
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Coroutine,
+    Generator,
+    List,
+    Optional,
+    Tuple,
+    cast,
+)
+
+from kazoo.exceptions import WriterNotClosedException
+from kazoo.handlers import utils
+from kazoo.handlers.utils import selector_select
+from kazoo.protocol.aioconnection import AsyncioConnectionHandler
+from kazoo.protocol.serialization import CloseInstance
+from kazoo.protocol.states import Callback, KazooState
+
+if TYPE_CHECKING:
+    import concurrent.futures
+
+    from typing_extensions import ParamSpec, TypeVarTuple, Unpack
+
+    from kazoo.client import KazooClient
+
+    _P = ParamSpec("_P")
+    _Ts = TypeVarTuple("_Ts")
+
+
+log = logging.getLogger(__name__)
+
+# sentinel objects
+_NONE = object()
+
+_Socket = socket.socket
+
+
+class KazooTimeoutError(Exception):
+    pass
+
+
+_Callback = Callable[["AsyncResult"], object]
+
+
+class AsyncResult(object):
+    """A one-time event that stores a value or an exception
+
+    Callbacks registered with :meth:`rawlink` are scheduled on the loop of
+    the handler. Awaiting an instance creates a loop future the first time
+    it is needed.
+
+    """
+
+    def __init__(self, handler: "AsyncioHandler") -> None:
+        self._handler = handler
+        self._exception: object = _NONE
+        self._callbacks: List[_Callback] = []
+        self._waiter: Optional[threading.Event] = None
+        self._future: Optional["asyncio.Future[object]"] = None
+        self.value: object = None
+
+    def ready(self) -> bool:
+        """Return true if and only if it holds a value or an
+        exception"""
+        return self._exception is not _NONE
+
+    def successful(self) -> bool:
+        """Return true if and only if it is ready and holds a value"""
+        return self._exception is None
+
+    @property
+    def exception(self) -> Optional[BaseException]:
+        if self._exception is not _NONE:
+            return cast(Optional[BaseException], self._exception)
+        return None
+
+    def set(self, value: object = None) -> None:
+        """Store the value. Wake up the waiters."""
+        self._resolve(value, None)
+
+    def set_exception(self, exception: BaseException) -> None:
+        """Store the exception. Wake up the waiters."""
+        self._resolve(None, exception)
+
+    def _resolve(
+        self, value: object, exception: Optional[BaseException]
+    ) -> None:
+        with self._handler._lock:
+            self.value = value
+            self._exception = exception
+            waiter, future = self._waiter, self._future
+            callbacks = list(self._callbacks)
+        if waiter is not None:
+            waiter.set()
+        if future is not None:
+            self._handler.call_in_loop(self._set_future, future)
+        for callback in callbacks:
+            self._handler.call_soon(callback, self)
+
+    def _set_future(self, future: "asyncio.Future[object]") -> None:
+        if future.done():
+            return
+        if self._exception is None:
+            future.set_result(self.value)
+        else:
+            future.set_exception(cast(BaseException, self._exception))
+
+    def _wait(self, timeout: Optional[float]) -> None:
+        if self._handler.in_loop():
+            raise RuntimeError(
+                "Cannot block the event loop waiting for a result, "
+                "await it instead"
+            )
+        with self._handler._lock:
+            if self.ready():
+                return
+            if self._waiter is None:
+                self._waiter = threading.Event()
+            waiter = self._waiter
+        waiter.wait(timeout)
+
+    def get(
+        self, block: bool = True, timeout: Optional[float] = None
+    ) -> object:
+        """Return the stored value or raise the exception.
+
+        If there is no value raises TimeoutError.
+
+        """
+        if not self.ready() and block:
+            self._wait(timeout)
+        if self._exception is _NONE:
+            raise self._handler.timeout_exception()
+        if self._exception is None:
+            return self.value
+        raise cast(BaseException, self._exception)
+
+    def get_nowait(self) -> object:
+        """Return the value or raise the exception without blocking.
+
+        If nothing is available, raises TimeoutError
+
+        """
+        return self.get(block=False)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the instance is ready."""
+        if not self.ready():
+            self._wait(timeout)
+        return self.ready()
+
+    def rawlink(self, callback: _Callback) -> None:
+        """Register a callback to call when a value or an exception is
+        set"""
+        with self._handler._lock:
+            if callback in self._callbacks:
+                return
+            self._callbacks.append(callback)
+            ready = self.ready()
+        # Are we already set? Dispatch it now
+        if ready:
+            self._handler.call_soon(callback, self)
+
+    def unlink(self, callback: _Callback) -> None:
+        """Remove the callback set by :meth:`rawlink`"""
+        with self._handler._lock:
+            if self.ready():
+                # Already triggered, ignore
+                return
+
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def as_future(self) -> "concurrent.futures.Future[object]":
+        """Return a :class:`concurrent.futures.Future` resolved with this
+        instance, see :func:`kazoo.handlers.utils.as_future`"""
+        return cast("concurrent.futures.Future[object]", utils.as_future(self))
+
+    def as_asyncio_future(
+        self, loop: Optional[asyncio.AbstractEventLoop] = None
+    ) -> "asyncio.Future[object]":
+        """Return an :class:`asyncio.Future` of `loop` resolved with this
+        instance, see :func:`kazoo.handlers.utils.as_asyncio_future`"""
+        return cast(
+            "asyncio.Future[object]", utils.as_asyncio_future(self, loop)
+        )
+
+    def __await__(self) -> Generator[object, None, object]:
+        with self._handler._lock:
+            if not self.ready() and self._future is None:
+                self._future = self._handler.loop.create_future()
+            future = self._future
+        if future is not None and not self.ready():
+            # Do not cancel the future shared with other awaiting tasks
+            yield from asyncio.shield(future).__await__()
+        return self.get(block=False)
+
+
+class AsyncioHandler(object):
+    """asyncio handler running the connection and the callbacks on an
+    event loop.
+
+    Watch and completion callbacks run on the loop, in the order the client
+    sees them, and should not block it. Functions given to :meth:`spawn`
+    run in their own thread, as they may block, unless they are coroutine
+    functions, which run as tasks of the loop.
+
+    """
+
+    name = "asyncio_handler"
+    timeout_exception = KazooTimeoutError
+    queue_impl = queue.Queue
+    queue_empty = queue.Empty
+    sleep_func = staticmethod(time.sleep)
+    connection_class = AsyncioConnectionHandler
+
+    def __init__(
+        self, loop: Optional[asyncio.AbstractEventLoop] = None
+    ) -> None:
+        """Create an :class:`AsyncioHandler` instance
+
+        :param loop: The event loop to run on, by default the loop running
+                     in the calling thread.
+
+        """
+        if loop is None:
+            loop = asyncio.get_running_loop()
+        self.loop = loop
+        self._running = False
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def in_loop(self) -> bool:
+        """Whether the calling thread is running the handler loop"""
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def call_soon(
+        self, func: "Callable[[Unpack[_Ts]], object]", *args: "Unpack[_Ts]"
+    ) -> None:
+        """Schedule a call to `func` on the loop, from any thread"""
+        if not self._running:
+            func(*args)
+        elif self.in_loop():
+            self.loop.call_soon(self._run, func, args)
+        else:
+            self.loop.call_soon_threadsafe(self._run, func, args)
+
+    def call_in_loop(
+        self, func: "Callable[[Unpack[_Ts]], object]", *args: "Unpack[_Ts]"
+    ) -> None:
+        """Schedule a call to `func` on the loop, even when the handler is
+        stopped"""
+        if self.in_loop():
+            self.loop.call_soon(func, *args)
+        else:
+            self.loop.call_soon_threadsafe(func, *args)
+
+    @staticmethod
+    def _run(
+        func: "Callable[[Unpack[_Ts]], object]", args: "Tuple[Unpack[_Ts]]"
+    ) -> None:
+        try:
+            func(*args)
+        except Exception:
+            log.exception("Exception in asyncio handler callback")
+
+    def start(self) -> None:
+        """Start dispatching callbacks on the loop."""
+        self._running = True
+
+    def stop(self) -> None:
+        """Stop dispatching callbacks on the loop."""
+        self._running = False
+
+    def select(
+        self, *args: object, **kwargs: object
+    ) -> Tuple[List[object], List[object], List[object]]:
+        return cast(
+            Tuple[List[object], List[object], List[object]],
+            selector_select(*args, **kwargs),
+        )
+
+    def socket(self) -> _Socket:
+        return cast(_Socket, utils.create_tcp_socket(socket))
+
+    def create_connection(self, *args: object, **kwargs: object) -> _Socket:
+        return cast(
+            _Socket, utils.create_tcp_connection(socket, *args, **kwargs)
+        )
+
+    def create_socket_pair(self) -> Tuple[_Socket, _Socket]:
+        return cast(
+            Tuple[_Socket, _Socket],
+            utils.create_socket_pair(socket),
+        )
+
+    def event_object(self) -> threading.Event:
+        """Create an appropriate Event object"""
+        return threading.Event()
+
+    def lock_object(self) -> threading.Lock:
+        """Create a lock object"""
+        return threading.Lock()
+
+    def rlock_object(self) -> "threading.RLock":
+        """Create an appropriate RLock object"""
+        return threading.RLock()
+
+    def async_result(self) -> AsyncResult:
+        """Create a :class:`AsyncResult` instance"""
+        return AsyncResult(self)
+
+    def spawn(
+        self,
+        func: "Callable[_P, object]",
+        *args: "_P.args",
+        **kwargs: "_P.kwargs",
+    ) -> object:
+        """Spawn a function to run asynchronously
+
+        Coroutine functions run as tasks of the loop, other functions in a
+        daemon thread.
+
+        """
+        if asyncio.iscoroutinefunction(func):
+            coro = cast(
+                "Coroutine[object, object, object]", func(*args, **kwargs)
+            )
+            if self.in_loop():
+                return self.loop.create_task(coro)
+            return asyncio.run_coroutine_threadsafe(coro, self.loop)
+        t = threading.Thread(target=functools.partial(func, *args, **kwargs))
+        t.daemon = True
+        t.start()
+        return t
+
+    def dispatch_callback(self, callback: Callback) -> None:
+        """Dispatch to the callback object
+
+        The callback is scheduled on the loop.
+
+        """
+        self.call_soon(callback.func, *callback.args)
+
+    async def start_client(
+        self, client: "KazooClient", timeout: float = 15
+    ) -> None:
+        """Start `client` from the loop, like
+        :meth:`~kazoo.client.KazooClient.start`"""
+        connected: "asyncio.Future[bool]" = self.loop.create_future()
+
+        def listener(state: str) -> bool:
+            if state == KazooState.CONNECTED and not connected.done():
+                connected.set_result(True)
+            return connected.done()
+
+        client.add_listener(listener)
+        try:
+            event = client.start_async()
+            if not event.is_set():
+                await asyncio.wait([connected], timeout=timeout)
+        finally:
+            client.remove_listener(listener)
+        if not client.connected:
+            # We time-out, ensure we are disconnected
+            await self.stop_client(client)
+            client.close()
+            raise self.timeout_exception("Connection time-out")
+
+    async def stop_client(self, client: "KazooClient") -> None:
+        """Stop `client` from the loop, like
+        :meth:`~kazoo.client.KazooClient.stop`"""
+        connection = cast(AsyncioConnectionHandler, client._connection)
+        if not client._stopped.is_set():
+            client._stopped.set()
+            client._queue.append((CloseInstance, None))
+            assert connection._write_sock is not None
+            connection._write_sock.send(b"\0")
+        timeout = max(client._session_timeout // 1000, 10)
+        stopped = await connection.wait_stopped(timeout)
+        self.stop()
+        if not stopped:
+            raise WriterNotClosedException(
+                "Writer still open from prior connection "
+                "and wouldn't close after %s seconds" % timeout
+            )
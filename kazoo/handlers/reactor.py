@@ -0,0 +1,180 @@
+"""A shared reactor for many clients.
+
+A :class:`Reactor` runs an event loop in a single thread, which drives
+the connections of every client using one of its handlers, through one
+selector. The watch callbacks of the clients run on a small pool of
+callback workers shared by all the clients, instead of the two worker
+threads and the connection thread of each client of the
+:class:`~kazoo.handlers.threading.SequentialThreadingHandler`::
+
+    from kazoo.client import KazooClient
+    from kazoo.handlers.reactor import Reactor
+
+    reactor = Reactor(callback_workers=2)
+    clients = [
+        KazooClient(hosts, handler=reactor.handler()) for hosts in ensembles
+    ]
+    for client in clients:
+        client.start()
+
+The clients are used from other threads, or from the callback workers,
+like with any other handler. Their blocking methods must not be called
+from the reactor loop, which runs the completion callbacks.
+
+"""
+from __future__ import absolute_import
+
+import asyncio
+import logging
+import queue
+import threading
+from typing import Callable, List, Optional, cast
+
+from kazoo.handlers.asyncio import AsyncioHandler
+from kazoo.protocol.states import Callback
+
+
+log = logging.getLogger(__name__)
+
+_STOP = object()
+
+_Work = Callable[[], object]
+
+
+class ReactorHandler(AsyncioHandler):
+    """Handler of a client driven by a :class:`Reactor`
+
+    The connection and the completion callbacks run on the loop of the
+    reactor, see :class:`~kazoo.handlers.asyncio.AsyncioHandler`. The watch
+    callbacks run on one of the callback workers of the reactor, in the
+    order the client sees them, and may block.
+
+    """
+
+    name = "reactor_handler"
+
+    def __init__(
+        self, reactor: "Reactor", callback_queue: "queue.Queue[object]"
+    ) -> None:
+        """Create a :class:`ReactorHandler` instance, see
+        :meth:`Reactor.handler`."""
+        super(ReactorHandler, self).__init__(loop=reactor.loop)
+        self.reactor = reactor
+        self.callback_queue = callback_queue
+
+    def dispatch_callback(self, callback: Callback) -> None:
+        """Dispatch to the callback object
+
+        The callback is put on the queue of the callback worker of the
+        client.
+
+        """
+        self.callback_queue.put(lambda: callback.func(*callback.args))
+
+
+class Reactor(object):
+    """An event loop thread driving the connections of many clients
+
+    :param callback_workers: Number of threads running the watch callbacks
+                             of the clients. Each client is assigned one,
+                             so that its callbacks run in order.
+
+    The reactor starts with its first handler. Its clients should be
+    closed before it is stopped, the connections of the others are
+    dropped, and its previous handlers can't be used once it is
+    restarted.
+
+    """
+
+    def __init__(self, callback_workers: int = 1) -> None:
+        if callback_workers < 1:
+            raise ValueError("At least one callback worker is required")
+        self.callback_workers = callback_workers
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._queues: List["queue.Queue[object]"] = []
+        self._workers: List[threading.Thread] = []
+        self._handlers = 0
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def _create_worker(
+        self, work_queue: "queue.Queue[object]"
+    ) -> threading.Thread:
+        def _worker() -> None:  # pragma: nocover
+            while True:
+                func = work_queue.get()
+                try:
+                    if func is _STOP:
+                        break
+                    cast(_Work, func)()
+                except Exception:
+                    log.exception("Exception in reactor callback worker")
+                finally:
+                    del func  # release before possible idle
+
+        t = threading.Thread(target=_worker, name="kazoo-reactor-worker")
+        t.daemon = True
+        t.start()
+        return t
+
+    def start(self) -> None:
+        """Start the loop thread and the callback workers."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self.loop.run_forever, name="kazoo-reactor"
+            )
+            self._thread.daemon = True
+            self._thread.start()
+            for _ in range(self.callback_workers):
+                work_queue: "queue.Queue[object]" = AsyncioHandler.queue_impl()
+                self._queues.append(work_queue)
+                self._workers.append(self._create_worker(work_queue))
+
+    @staticmethod
+    async def _cancel_tasks() -> None:
+        # Drop the connections of the clients that weren't stopped
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self) -> None:
+        """Stop the loop thread and the callback workers, once the
+        clients are closed."""
+        with self._lock:
+            loop = self.loop
+            if self._thread is None or loop is None:
+                return
+            for work_queue in self._queues:
+                work_queue.put(_STOP)
+            for worker in self._workers:
+                worker.join()
+            asyncio.run_coroutine_threadsafe(
+                self._cancel_tasks(), loop
+            ).result()
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join()
+            loop.close()
+            self._thread = None
+            self._queues = []
+            self._workers = []
+
+    def handler(self) -> ReactorHandler:
+        """Create a handler for a new client, starting the reactor if
+        needed.
+
+        :rtype: :class:`ReactorHandler`
+
+        """
+        self.start()
+        with self._lock:
+            callback_queue = self._queues[self._handlers % len(self._queues)]
+            self._handlers += 1
+        return ReactorHandler(self, callback_queue)
@@ -3,11 +3,12 @@
 from collections import defaultdict
 import errno
 import functools
+import itertools
 import select
 import selectors
-import ssl
 import socket
 import time
+from typing import Union
 
 HAS_FNCTL = True
 try:
@@ -99,12 +100,14 @@ class AsyncResult(object):
         """Register a callback to call when a value or an exception is
         set"""
         with self._condition:
-            if callback not in self._callbacks:
-                self._callbacks.append(callback)
+            if callback in self._callbacks:
+                return
+            self._callbacks.append(callback)
 
-            # Are we already set? Dispatch it now
+            # Are we already set? Dispatch it now, the other callbacks
+            # already were
             if self.ready():
-                self._do_callbacks()
+                self._do_callbacks([callback])
 
     def unlink(self, callback):
         """Remove the callback set by :meth:`rawlink`"""
@@ -116,13 +119,13 @@ class AsyncResult(object):
             if callback in self._callbacks:
                 self._callbacks.remove(callback)
 
-    def _do_callbacks(self):
+    def _do_callbacks(self, callbacks=None):
         """Execute the callbacks that were registered by :meth:`rawlink`.
         If the handler is in running state this method only schedules
         the calls to be performed by the handler. If it's stopped,
         the callbacks are called right away."""
 
-        for callback in self._callbacks:
+        for callback in self._callbacks if callbacks is None else callbacks:
             if self._handler.running:
                 self._handler.completion_queue.put(
                     functools.partial(callback, self)
@@ -130,6 +133,221 @@ class AsyncResult(object):
             else:
                 functools.partial(callback, self)()
 
+    def as_future(self):
+        """Return a :class:`concurrent.futures.Future` resolved with this
+        instance, see :func:`as_future`"""
+        return as_future(self)
+
+    def as_asyncio_future(self, loop=None):
+        """Return an :class:`asyncio.Future` of `loop` resolved with this
+        instance, see :func:`as_asyncio_future`"""
+        return as_asyncio_future(self, loop)
+
+
+def _copy_result(async_result, set_result, set_exception):
+    if async_result.successful():
+        set_result(async_result.value)
+    else:
+        set_exception(async_result.exception)
+
+
+def as_future(async_result):
+    """Return a :class:`concurrent.futures.Future` resolved with
+    `async_result`
+
+    The future is resolved from a callback registered with
+    :meth:`~kazoo.interfaces.IAsyncResult.rawlink`, no thread waits for
+    the result. Cancelling the future unlinks the callback.
+
+    :param async_result: An :class:`~kazoo.interfaces.IAsyncResult`.
+
+    """
+    from concurrent import futures
+
+    future = futures.Future()
+
+    def resolved(result):
+        if future.set_running_or_notify_cancel():
+            _copy_result(result, future.set_result, future.set_exception)
+
+    def done(future):
+        if future.cancelled():
+            async_result.unlink(resolved)
+
+    if async_result.ready():
+        resolved(async_result)
+    else:
+        future.add_done_callback(done)
+        async_result.rawlink(resolved)
+    return future
+
+
+def _transfer(async_result, future):
+    if not future.done():
+        _copy_result(async_result, future.set_result, future.set_exception)
+
+
+def as_asyncio_future(async_result, loop=None):
+    """Return an :class:`asyncio.Future` resolved with `async_result`
+
+    The future is resolved on `loop` with
+    :meth:`~asyncio.loop.call_soon_threadsafe`, from a callback registered
+    with :meth:`~kazoo.interfaces.IAsyncResult.rawlink`, no thread waits
+    for the result. Cancelling the future unlinks the callback.
+
+    :param async_result: An :class:`~kazoo.interfaces.IAsyncResult`.
+    :param loop: The loop of the future, by default the running loop.
+
+    """
+    import asyncio
+
+    if loop is None:
+        loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolved(result):
+        loop.call_soon_threadsafe(_transfer, result, future)
+
+    def done(future):
+        if future.cancelled():
+            async_result.unlink(resolved)
+
+    if async_result.ready():
+        _transfer(async_result, future)
+    else:
+        future.add_done_callback(done)
+        async_result.rawlink(resolved)
+    return future
+
+
+def _handler_of(results, handler=None):
+    """Return the handler to wait for `results` with"""
+    if handler is not None:
+        return handler
+    for result in results:
+        handler = getattr(result, "_handler", None)
+        if handler is not None:
+            return handler
+    raise TypeError(
+        "Cannot tell the handler of the results, pass the handler "
+        "they were created with"
+    )
+
+
+def gather(results, timeout=None, handler=None):
+    """Wait for all the `results` and return their values, in order
+
+    A single callback counting the completions is linked to the results,
+    the calling thread blocks once instead of once per result.
+
+    :param results: An iterable of :class:`~kazoo.interfaces.IAsyncResult`.
+    :param timeout: How long to wait for all the results, in seconds.
+    :param handler: The :class:`~kazoo.interfaces.IHandler` to wait with,
+                    by default the handler of the results. It is
+                    required when they don't keep their handler, like
+                    the results of the gevent handler.
+    :returns: A list holding the value of each result, or the exception
+              it failed with.
+    :raises: :attr:`~kazoo.interfaces.IHandler.timeout_exception` if the
+             results are not all ready within `timeout` seconds.
+             :exc:`TypeError` if the handler is needed and unknown.
+
+    """
+    results = list(results)
+    # A result listed twice only calls a linked callback once
+    pending = list(
+        {
+            id(result): result for result in results if not result.ready()
+        }.values()
+    )
+    if pending:
+        handler = _handler_of(pending, handler)
+        done = handler.event_object()
+        completions = itertools.count(1)
+        last = len(pending)
+
+        def countdown(result):
+            # next() on a count is atomic
+            if next(completions) == last:
+                done.set()
+
+        for result in pending:
+            result.rawlink(countdown)
+        done.wait(timeout)
+        if not done.is_set():
+            for result in pending:
+                result.unlink(countdown)
+            raise handler.timeout_exception(
+                "%s results not ready after %s seconds"
+                % (sum(not result.ready() for result in pending), timeout)
+            )
+    return [
+        result.value if result.successful() else result.exception
+        for result in results
+    ]
+
+
+def as_completed(results, timeout=None, handler=None):
+    """Iterate over the `results` as they become ready
+
+    :param results: An iterable of :class:`~kazoo.interfaces.IAsyncResult`.
+    :param timeout: How long to wait for all the results, in seconds.
+    :param handler: The :class:`~kazoo.interfaces.IHandler` to wait with,
+                    by default the handler of the results. It is
+                    required when they don't keep their handler, like
+                    the results of the gevent handler.
+    :returns: An iterator yielding each distinct result once it is ready.
+    :raises: :attr:`~kazoo.interfaces.IHandler.timeout_exception` if the
+             results are not all ready within `timeout` seconds.
+             :exc:`TypeError` if the handler is needed and unknown.
+
+    """
+    pending = list({id(result): result for result in results}.values())
+    if not pending:
+        return
+    handler = _handler_of(pending, handler)
+    ready = handler.queue_impl()
+    completed = ready.put
+    for result in pending:
+        result.rawlink(completed)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        for _ in pending:
+            if deadline is None:
+                remaining = None
+            else:
+                remaining = max(deadline - time.monotonic(), 0)
+            try:
+                yield ready.get(timeout=remaining)
+            except handler.queue_empty:
+                raise handler.timeout_exception(
+                    "Results not ready after %s seconds" % timeout
+                )
+    finally:
+        for result in pending:
+            result.unlink(completed)
+
+
+def wait_any(results, timeout=None, handler=None):
+    """Wait for any of the `results` and return it
+
+    Takes the same arguments as :func:`as_completed`.
+
+    :returns: The first :class:`~kazoo.interfaces.IAsyncResult` to be
+              ready.
+    :raises: :attr:`~kazoo.interfaces.IHandler.timeout_exception` if no
+             result is ready within `timeout` seconds. :exc:`ValueError`
+             if there are no results.
+
+    """
+    completed = as_completed(results, timeout, handler)
+    try:
+        return next(completed)
+    except StopIteration:
+        raise ValueError("No results to wait for")
+    finally:
+        completed.close()
+
 
 def _set_fd_cloexec(fd):
     flags = fcntl.fcntl(fd, fcntl.F_GETFD)
@@ -193,6 +411,51 @@ def create_tcp_socket(module):
     return sock
 
 
+def create_ssl_context(
+    ca=None,
+    certfile=None,
+    keyfile=None,
+    keyfile_password=None,
+    verify_certs=True,
+    options=None,
+    ciphers=None,
+):
+    """Create the client side :class:`ssl.SSLContext` of a secure
+    connection"""
+    # ssl is slow to import and only needed by secure connections
+    import ssl
+
+    # Disallow use of SSLv2 and V3 (meaning we require TLSv1.0+)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+
+    if options is not None:
+        context.options = options
+    else:
+        context.options |= ssl.OP_NO_SSLv2
+        context.options |= ssl.OP_NO_SSLv3
+
+    if ciphers:
+        context.set_ciphers(ciphers)
+
+    # Load default CA certs
+    context.load_default_certs(ssl.Purpose.SERVER_AUTH)
+    # We must set check_hostname to False prior to setting
+    # verify_mode to CERT_NONE.
+    # TODO: Make hostname verification configurable as some users may
+    # elect to use it.
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_REQUIRED if verify_certs else ssl.CERT_NONE
+    if ca:
+        context.load_verify_locations(ca)
+    if certfile and keyfile:
+        context.load_cert_chain(
+            certfile=certfile,
+            keyfile=keyfile,
+            password=keyfile_password,
+        )
+    return context
+
+
 def create_tcp_connection(
     module,
     address,
@@ -205,7 +468,18 @@ def create_tcp_connection(
     verify_certs=True,
     options=None,
     ciphers=None,
+    ssl_context=None,
+    ssl_session=None,
 ):
+    """Connect to `address` with the socket `module`, over SSL if
+    `use_ssl`
+
+    The :class:`ssl.SSLContext` of the secure connection is created from
+    the certificate options, unless an `ssl_context` is given to reuse.
+    An `ssl_session` of a previous connection made with that context
+    resumes the session with an abbreviated handshake.
+
+    """
     end = None
     if timeout is None:
         # thanks to create_connection() developers for
@@ -223,48 +497,28 @@ def create_tcp_connection(
             break
 
         if use_ssl:
-            # Disallow use of SSLv2 and V3 (meaning we require TLSv1.0+)
-            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-
-            if options is not None:
-                context.options = options
-            else:
-                context.options |= ssl.OP_NO_SSLv2
-                context.options |= ssl.OP_NO_SSLv3
-
-            if ciphers:
-                context.set_ciphers(ciphers)
-
-            # Load default CA certs
-            context.load_default_certs(ssl.Purpose.SERVER_AUTH)
-            # We must set check_hostname to False prior to setting
-            # verify_mode to CERT_NONE.
-            # TODO: Make hostname verification configurable as some users may
-            # elect to use it.
-            context.check_hostname = False
-            context.verify_mode = (
-                ssl.CERT_REQUIRED if verify_certs else ssl.CERT_NONE
-            )
-            if ca:
-                context.load_verify_locations(ca)
-            if certfile and keyfile:
-                context.load_cert_chain(
+            context = ssl_context
+            if context is None:
+                context = create_ssl_context(
+                    ca=ca,
                     certfile=certfile,
                     keyfile=keyfile,
-                    password=keyfile_password,
+                    keyfile_password=keyfile_password,
+                    verify_certs=verify_certs,
+                    options=options,
+                    ciphers=ciphers,
                 )
-            try:
-                # Query the address to get back it's address family
-                addrs = socket.getaddrinfo(
-                    address[0], address[1], 0, socket.SOCK_STREAM
-                )
-                conn = context.wrap_socket(module.socket(addrs[0][0]))
-                conn.settimeout(timeout_at)
-                conn.connect(address)
-                sock = conn
-                break
-            except ssl.SSLError:
-                raise
+            # Query the address to get back it's address family
+            addrs = socket.getaddrinfo(
+                address[0], address[1], 0, socket.SOCK_STREAM
+            )
+            conn = context.wrap_socket(
+                module.socket(addrs[0][0]), session=ssl_session
+            )
+            conn.settimeout(timeout_at)
+            conn.connect(address)
+            sock = conn
+            break
         else:
             try:
                 # if we got a timeout, lets ensure that we decrement the time
@@ -284,6 +538,29 @@ def create_tcp_connection(
     return sock
 
 
+def send_command(sock: socket.socket, cmd: Union[bytes, str]) -> str:
+    """Send the four letter word `cmd` on the connection `sock` and
+    return the whole report of the server, read until it closes the
+    connection
+
+    The connection is closed once the report is read, or on error.
+
+    """
+    if isinstance(cmd, str):
+        cmd = cmd.encode("ascii")
+    try:
+        sock.sendall(cmd)
+        chunks = []
+        while True:
+            chunk = sock.recv(8192)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        sock.close()
+    return b"".join(chunks).decode("utf-8", "replace")
+
+
 def capture_exceptions(async_result):
     """Return a new decorated function that propagates the exceptions of the
     wrapped function to an async_result.
@@ -28,3 +28,38 @@ def collect_hosts(hosts):
         result.append((host.strip(), port))
 
     return result, chroot
+
+
+def config_hosts(config):
+    """
+    Collect the client addresses of the servers of a dynamic
+    configuration, as read from ``/zookeeper/config``.
+
+    The servers without a client address are left out, and a wildcard
+    client address is replaced by the address of the server.
+    """
+    if isinstance(config, bytes):
+        config = config.decode("utf-8")
+
+    servers = []
+    for line in config.splitlines():
+        key, sep, value = line.strip().partition("=")
+        if not sep or not key.startswith("server."):
+            continue
+        server, _, client = value.partition(";")
+        if not client:
+            continue
+        res = urllib.parse.urlsplit("xxx://" + server.strip())
+        server_host = res.hostname
+        if client.strip().isdigit():
+            host, port = None, int(client)
+        else:
+            res = urllib.parse.urlsplit("xxx://" + client.strip())
+            host, port = res.hostname, res.port
+        if host in (None, "", "0.0.0.0", "::"):
+            host = server_host
+        if host is None or port is None:
+            raise ValueError("bad server address: %r" % (line,))
+        servers.append((int(key[len("server.") :]), host.strip(), port))
+
+    return [(host, port) for _, host, port in sorted(servers)]
@@ -7,6 +7,7 @@
     now serve as documentation only.
 
 """
+from typing import Optional
 
 # public API
 
@@ -42,6 +43,11 @@ class IHandler(object):
         Appropriate sleep function that can be called with a single
         argument and sleep.
 
+    .. attribute:: connection_class
+
+        Optional :class:`~kazoo.protocol.connection.ConnectionHandler`
+        subclass driving the connection of the clients using the handler.
+
     """
 
     def start(self):
@@ -149,7 +155,9 @@ class IAsyncResult(object):
         up. Sequential calls to :meth:`wait` and :meth:`get` will not
         block at all."""
 
-    def get(self, block=True, timeout=None):
+    def get(
+        self, block: bool = True, timeout: Optional[float] = None
+    ) -> object:
         """Return the stored value or raise the exception
 
         :param block: Whether this method should block or return
@@ -0,0 +1,391 @@
+"""Kazoo Zookeeper Client Pool
+
+A :class:`KazooClientPool` keeps several sessions to the members of an
+ensemble, so that the reads of a read-heavy application are served by
+all of them instead of the single server of a
+:class:`~kazoo.client.KazooClient`::
+
+    from kazoo.pool import KazooClientPool
+
+    zk = KazooClientPool(hosts="zk1:2181,zk2:2181,zk3:2181")
+    zk.start()
+    zk.create("/my/favorite/node", b"a value", makepath=True)
+    data, stat = zk.get("/my/favorite/node")
+
+"""
+import itertools
+import random
+import time
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
+
+from kazoo.admin import AdminClient, Server
+from kazoo.client import KazooClient
+from kazoo.hosts import collect_hosts
+from kazoo.interfaces import IAsyncResult
+from kazoo.protocol.states import WatchedEvent, ZnodeStat
+
+if TYPE_CHECKING:
+    # The other attributes are those of the primary client
+    _Client = KazooClient
+else:
+    _Client = object
+
+
+ROUND_ROBIN = "round_robin"
+LEAST_PENDING = "least_pending"
+
+# Server modes of srvr serving reads only
+READER_MODES = ("observer", "read-only")
+
+_Watch = Callable[[WatchedEvent], object]
+_Completion = Callable[[object, Optional[Exception]], object]
+
+
+def _pending(client: KazooClient) -> int:
+    pending: int = len(client._pending) + len(client._queue)
+    return pending
+
+
+class KazooClientPool(_Client):
+    """A pool of Zookeeper sessions spread across an ensemble
+
+    The pool has one client per session, each preferring a different
+    member of the ensemble. The first one is the primary: every
+    operation other than the reads below, such as the writes, the
+    transactions and the recipes bound to the pool, like :attr:`Lock`,
+    use its session, as with a :class:`~kazoo.client.KazooClient`.
+
+    The reads of :meth:`exists`, :meth:`get` and :meth:`get_children`,
+    and of their asynchronous variants, are spread across the connected
+    clients of the pool. A watch left by one of them belongs to the
+    session of the client serving the read.
+
+    The sessions of a pool are only ordered with respect to themselves.
+    A read may not reflect a write the pool just made through the
+    primary, unless the pool is created with `read_your_writes`, in
+    which case the read is preceded by a
+    :meth:`~kazoo.client.KazooClient.sync` of its path when the server
+    of its client has not seen the last transaction the primary has.
+
+    A pool created with `route_by_role` reads the mode of each server
+    with ``srvr`` when started. The primary then connects to the voting
+    members of the ensemble only, and the other clients to its
+    observers, which serve all the reads of the pool. Read capacity is
+    then added with observers, without adding to the quorum. Read-only
+    servers are used like observers by clients created with
+    `read_only`.
+
+    """
+
+    def __init__(
+        self,
+        hosts: Union[str, List[str]] = "127.0.0.1:2181",
+        size: Optional[int] = None,
+        read_strategy: str = ROUND_ROBIN,
+        read_your_writes: bool = False,
+        handler_factory: Optional[Callable[[], object]] = None,
+        randomize_hosts: bool = True,
+        route_by_role: bool = False,
+        **kwargs: object,
+    ) -> None:
+        """Create a :class:`KazooClientPool` instance.
+
+        :param hosts: Comma-separated list of hosts to connect to, see
+                      :class:`~kazoo.client.KazooClient`.
+        :param size: Number of sessions of the pool, defaults to the
+                     number of hosts.
+        :param read_strategy: How reads are spread across the clients,
+                              ``"round_robin"``, or ``"least_pending"``
+                              to use the client with the fewest
+                              outstanding requests.
+        :param read_your_writes: Make reads reflect the transactions
+                                 seen by the primary.
+        :param handler_factory: Function called without arguments to
+                                create the handler of each client, such
+                                as :meth:`~kazoo.handlers.reactor.Reactor.
+                                handler`.
+        :param randomize_hosts: Shuffle the hosts once before assigning
+                                them to the clients.
+        :param route_by_role: Send the writes to the voting members and
+                              the reads to the observers of the ensemble,
+                              when it has both.
+
+        The other keyword arguments are those of
+        :class:`~kazoo.client.KazooClient`, used for each client.
+
+        """
+        if read_strategy not in (ROUND_ROBIN, LEAST_PENDING):
+            raise ValueError("Unknown read strategy %r" % (read_strategy,))
+        if "handler" in kwargs:
+            raise TypeError(
+                "A handler can't be shared by the clients of a pool, "
+                "use handler_factory"
+            )
+
+        servers: List[Server]
+        chroot: Optional[str]
+        servers, chroot = collect_hosts(hosts)
+        if size is None:
+            size = len(servers)
+        if size < 1:
+            raise ValueError("At least one session is required")
+        if randomize_hosts:
+            random.shuffle(servers)
+        self.servers = servers
+        host_ports = [
+            "[%s]:%d" % server if ":" in server[0] else "%s:%d" % server
+            for server in servers
+        ]
+
+        self.read_strategy = read_strategy
+        self.read_your_writes = read_your_writes
+        self.route_by_role = route_by_role
+        self.roles: Dict[Server, object] = {}
+        self.clients: List[KazooClient] = []
+        for index in range(size):
+            # Each client tries its own member first, then the others
+            offset = index % len(host_ports)
+            client_hosts = host_ports[offset:] + host_ports[:offset]
+            if chroot:
+                client_hosts.append(chroot)
+            if handler_factory is not None:
+                kwargs["handler"] = handler_factory()
+            self.clients.append(
+                KazooClient(client_hosts, randomize_hosts=False, **kwargs)
+            )
+        self.primary = self.clients[0]
+        self._readers = self.clients
+        self._host_ports = host_ports
+        self._chroot = chroot
+        self._counter = itertools.count()
+
+    def __getattr__(self, name: str) -> object:
+        # Everything but the reads is bound to the primary session
+        return getattr(self.primary, name)
+
+    def start(self, timeout: float = 15) -> None:
+        """Initiate the connections to ZK.
+
+        :param timeout: Time in seconds to wait for the connections to
+                        succeed.
+        :raises: :attr:`~kazoo.interfaces.IHandler.timeout_exception`
+                 if the primary connection wasn't established within
+                 `timeout` seconds.
+
+        The other clients that are not connected within `timeout`
+        keep trying in the background, and serve reads once connected.
+
+        """
+        deadline = time.monotonic() + timeout
+        if self.route_by_role:
+            self._route(self._discover_roles())
+        events = [client.start_async() for client in self.clients[1:]]
+        self.primary.start(timeout)
+        for event in events:
+            event.wait(timeout=max(deadline - time.monotonic(), 0))
+
+    def stop(self) -> None:
+        """Gracefully stop the Zookeeper sessions of the pool."""
+        for client in self.clients:
+            client.stop()
+
+    def restart(self) -> None:
+        """Stop and restart the Zookeeper sessions of the pool."""
+        self.stop()
+        self.start()
+
+    def close(self) -> None:
+        """Free any resources held by the clients of the pool."""
+        for client in self.clients:
+            client.close()
+
+    def _discover_roles(self) -> Dict[Server, object]:
+        """Return the mode of each server reported by ``srvr``"""
+        primary = self.primary
+        admin = AdminClient(
+            self._host_ports,
+            timeout=float(primary._session_timeout) / 1000.0,
+            use_ssl=primary.use_ssl,
+            verify_certs=primary.verify_certs,
+            ca=primary.ca,
+            certfile=primary.certfile,
+            keyfile=primary.keyfile,
+            keyfile_password=primary.keyfile_password,
+        )
+        try:
+            results = admin.srvr()
+        finally:
+            admin.close()
+        return dict(
+            (server, result.get("mode"))
+            for server, result in results.items()
+            if not isinstance(result, Exception)
+        )
+
+    def _route(self, roles: Dict[Server, object]) -> None:
+        """Assign the voting members to the primary and the observers
+        to the other clients"""
+        self.roles = roles
+        readers: List[str] = []
+        voters: List[str] = []
+        for server, host_port in zip(self.servers, self._host_ports):
+            if roles.get(server) in READER_MODES:
+                readers.append(host_port)
+            else:
+                # Servers of unknown mode may vote
+                voters.append(host_port)
+        if readers and voters and len(self.clients) > 1:
+            self._readers = self.clients[1:]
+            assignments: List[Tuple[KazooClient, List[str], int]] = [
+                (self.primary, voters, 0)
+            ] + [
+                (client, readers, index)
+                for index, client in enumerate(self._readers)
+            ]
+        else:
+            self._readers = self.clients
+            assignments = [
+                (client, self._host_ports, index)
+                for index, client in enumerate(self.clients)
+            ]
+        chroot = [self._chroot] if self._chroot else []
+        for client, host_ports, index in assignments:
+            offset = index % len(host_ports)
+            client.set_hosts(
+                host_ports[offset:] + host_ports[:offset] + chroot
+            )
+
+    def _reader(self, path: str) -> KazooClient:
+        """Return the client serving a read of `path`"""
+        clients = [c for c in self._readers if c.connected]
+        clients = clients or [self.primary]
+        if self.read_strategy == LEAST_PENDING:
+            client = min(clients, key=_pending)
+        else:
+            client = clients[next(self._counter) % len(clients)]
+        if (
+            self.read_your_writes
+            and client is not self.primary
+            and client.last_zxid < self.primary.last_zxid
+        ):
+            # The server processes the requests of a session in order, the
+            # read waits for the sync without a round trip of its own
+            client.sync_async(path)
+        return client
+
+    def exists(
+        self, path: str, watch: Optional[_Watch] = None
+    ) -> Optional[ZnodeStat]:
+        """Check if a node exists, see
+        :meth:`~kazoo.client.KazooClient.exists`."""
+        return cast(
+            Optional[ZnodeStat], self.exists_async(path, watch=watch).get()
+        )
+
+    def exists_async(
+        self, path: str, watch: Optional[_Watch] = None
+    ) -> IAsyncResult:
+        """Asynchronously check if a node exists, see
+        :meth:`~kazoo.client.KazooClient.exists_async`."""
+        result: IAsyncResult = self._reader(path).exists_async(
+            path, watch=watch
+        )
+        return result
+
+    def exists_nowait(
+        self,
+        path: str,
+        watch: Optional[_Watch] = None,
+        callback: Optional[_Completion] = None,
+    ) -> None:
+        """Check if a node exists without waiting for the result, see
+        :meth:`~kazoo.client.KazooClient.exists_nowait`."""
+        self._reader(path).exists_nowait(path, watch, callback)
+
+    def get(
+        self,
+        path: str,
+        watch: Optional[_Watch] = None,
+        zero_copy: bool = False,
+    ) -> Tuple[Union[bytes, memoryview], ZnodeStat]:
+        """Get the value of a node, see
+        :meth:`~kazoo.client.KazooClient.get`."""
+        return cast(
+            Tuple[Union[bytes, memoryview], ZnodeStat],
+            self.get_async(path, watch=watch, zero_copy=zero_copy).get(),
+        )
+
+    def get_async(
+        self,
+        path: str,
+        watch: Optional[_Watch] = None,
+        zero_copy: bool = False,
+    ) -> IAsyncResult:
+        """Asynchronously get the value of a node, see
+        :meth:`~kazoo.client.KazooClient.get_async`."""
+        result: IAsyncResult = self._reader(path).get_async(
+            path, watch, zero_copy
+        )
+        return result
+
+    def get_nowait(
+        self,
+        path: str,
+        watch: Optional[_Watch] = None,
+        callback: Optional[_Completion] = None,
+        zero_copy: bool = False,
+    ) -> None:
+        """Get the value of a node without waiting for the result, see
+        :meth:`~kazoo.client.KazooClient.get_nowait`."""
+        self._reader(path).get_nowait(path, watch, callback, zero_copy)
+
+    def get_children(
+        self,
+        path: str,
+        watch: Optional[_Watch] = None,
+        include_data: bool = False,
+    ) -> Union[List[str], Tuple[List[str], ZnodeStat]]:
+        """Get a list of child nodes of a path, see
+        :meth:`~kazoo.client.KazooClient.get_children`."""
+        return cast(
+            Union[List[str], Tuple[List[str], ZnodeStat]],
+            self.get_children_async(
+                path, watch=watch, include_data=include_data
+            ).get(),
+        )
+
+    def get_children_async(
+        self,
+        path: str,
+        watch: Optional[_Watch] = None,
+        include_data: bool = False,
+    ) -> IAsyncResult:
+        """Asynchronously get a list of child nodes of a path, see
+        :meth:`~kazoo.client.KazooClient.get_children_async`."""
+        result: IAsyncResult = self._reader(path).get_children_async(
+            path, watch, include_data
+        )
+        return result
+
+    def get_children_nowait(
+        self,
+        path: str,
+        watch: Optional[_Watch] = None,
+        include_data: bool = False,
+        callback: Optional[_Completion] = None,
+    ) -> None:
+        """Get a list of child nodes of a path without waiting for the
+        result, see :meth:`~kazoo.client.KazooClient.get_children_nowait`.
+        """
+        self._reader(path).get_children_nowait(
+            path, watch, include_data, callback
+        )
@@ -0,0 +1,818 @@
+"""Zookeeper connection driven by an asyncio event loop"""
+import asyncio
+from binascii import hexlify
+import copy
+from functools import partial
+import logging
+import random
+import socket
+import time
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
+
+from kazoo.exceptions import (
+    AuthFailedError,
+    ConfigurationError,
+    ConnectionClosedError,
+    ConnectionDropped,
+    EXCEPTIONS,
+    SessionExpiredError,
+)
+from kazoo.loggingsupport import BLATHER
+from kazoo.protocol.connection import (
+    AUTH_XID,
+    CLOSE_RESPONSE,
+    PING_XID,
+    SET_WATCHES_XID,
+    STOP_CONNECTING,
+    WATCH_XID,
+    ConnectionHandler,
+    RWServerAvailable,
+    ServerMigration,
+    _CONNECTION_DROP,
+    _SESSION_EXPIRED,
+    advance_iterator,
+)
+from kazoo.protocol.serialization import (
+    Auth,
+    Connect,
+    PingInstance,
+    ReplyHeader,
+    int_struct,
+)
+from kazoo.protocol.states import KeeperState
+from kazoo.retry import ForceRetryError, KazooRetry, RetryFailedError
+
+if TYPE_CHECKING:
+    import concurrent.futures
+
+    from kazoo.client import KazooClient
+
+
+_Frame = Union[bytes, bytearray]
+_HostPort = Tuple[str, str, int]
+
+
+class _ZooKeeperProtocol(asyncio.Protocol):
+    """Splits the stream received from a server into frames"""
+
+    def __init__(self, connection: "AsyncioConnectionHandler") -> None:
+        self._connection: Optional[AsyncioConnectionHandler] = connection
+        self._buffer = bytearray()
+
+    def detach(self) -> None:
+        """Stop reporting to the connection, once the transport lost a
+        connection race"""
+        self._connection = None
+
+    def data_received(self, data: bytes) -> None:
+        if self._connection is None:
+            return
+        buffer = self._buffer
+        buffer += data
+        size = len(buffer)
+        offset = 0
+        while size - offset >= int_struct.size:
+            length = int_struct.unpack_from(buffer, offset)[0]
+            if length < 0:
+                self._connection._connection_lost(
+                    ConnectionDropped("invalid frame length %d" % length)
+                )
+                return
+            end = offset + int_struct.size + length
+            if end > size:
+                break
+            start = offset + int_struct.size
+            frame: _Frame
+            pending = self._connection.client._pending
+            if pending and getattr(pending[0][0], "read_into", False):
+                # Requests keeping views of the frame get a private copy
+                frame = buffer[start:end]
+            else:
+                with memoryview(buffer) as view:
+                    frame = bytes(view[start:end])
+            self._connection._frame_received(frame)
+            offset = end
+        if offset:
+            del buffer[:offset]
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if self._connection is not None:
+            self._connection._connection_lost(exc)
+
+
+class _Waker(object):
+    """Stands in for the socket pair the threaded connection loop selects
+    on, the client "sends" to it to signal queued requests"""
+
+    def __init__(self, connection: "AsyncioConnectionHandler") -> None:
+        self._connection = connection
+
+    def send(self, data: bytes) -> int:
+        connection = self._connection
+        handler = connection.handler
+        if handler.in_loop():
+            # Coalesce the wake ups of requests queued by one callback
+            if not connection._wakeup_pending:
+                connection._wakeup_pending = True
+                handler.loop.call_soon(connection._wakeup)
+        else:
+            handler.loop.call_soon_threadsafe(connection._wakeup)
+        return len(data)
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncioConnectionHandler(ConnectionHandler):
+    """Zookeeper connection handler running on an asyncio event loop
+
+    The connection is an :class:`asyncio.Protocol` of the loop of the
+    client :class:`~kazoo.handlers.asyncio.AsyncioHandler`. Requests are
+    written as soon as they are queued on the loop, and replies are
+    processed as soon as they are received, without any other thread.
+
+    SASL authentication is not supported.
+
+    """
+
+    def __init__(
+        self,
+        client: "KazooClient",
+        retry_sleeper: KazooRetry,
+        logger: Optional[logging.Logger] = None,
+        sasl_options: Optional[Dict[str, str]] = None,
+    ) -> None:
+        if sasl_options is not None:
+            raise ConfigurationError(
+                "SASL authentication is not supported by the asyncio handler"
+            )
+        super(AsyncioConnectionHandler, self).__init__(
+            client, retry_sleeper, logger=logger, sasl_options=sasl_options
+        )
+        self.loop: asyncio.AbstractEventLoop = self.handler.loop
+        self._transport: Optional[asyncio.Transport] = None
+        self._frames: Optional[
+            "asyncio.Queue[Union[_Frame, Exception]]"
+        ] = None
+        self._session: Optional["asyncio.Future[object]"] = None
+        self._last_send = 0.0
+        self._wakeup_pending = False
+        self._wakeup_event: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        """Start the connection up"""
+        if self.connection_closed.is_set():
+            self._write_sock = _Waker(self)
+            self.connection_closed.clear()
+        self._migrating = False
+        self._move_to = None
+        self._ssl_context = None
+        if self._connection_routine:
+            raise Exception(
+                "Unable to start, connection routine already " "active."
+            )
+        self.connection_stopped.clear()
+        self._connection_routine = self.handler.spawn(self.zk_loop)
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """Ensure the writer has stopped, wait to see if it does.
+
+        The event loop itself cannot wait, when called from it this only
+        reports whether the connection stopped.
+
+        """
+        if not self.handler.in_loop():
+            self.connection_stopped.wait(timeout)
+        stopped: bool = self.connection_stopped.is_set()
+        if stopped:
+            self._connection_routine = None
+        return stopped
+
+    async def wait_stopped(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the connection to stop from the event loop"""
+        routine = self._connection_routine
+        if routine is not None and not self.connection_stopped.is_set():
+            future = cast("concurrent.futures.Future[None]", routine)
+            await asyncio.wait([asyncio.wrap_future(future)], timeout=timeout)
+        return self.stop(0)
+
+    def _write(self, msg: bytes, timeout: Optional[float]) -> None:
+        """Write a raw msg to the transport"""
+        if self._transport is None:
+            raise ConnectionDropped("socket connection broken")
+        self._transport.write(msg)
+
+    def _write_buffers(
+        self, buffers: Iterable[bytes], timeout: Optional[float]
+    ) -> None:
+        """Write a msg made of a list of buffers to the transport"""
+        if self._transport is None:
+            raise ConnectionDropped("socket connection broken")
+        self._transport.writelines(buffers)
+
+    def _wakeup(self) -> None:
+        self._wakeup_pending = False
+        if self._wakeup_event is not None:
+            self._wakeup_event.set()
+        self._flush()
+
+    def _flush(self) -> None:
+        """Send the queued requests"""
+        session = self._session
+        if session is None or session.done() or self._frames is not None:
+            # Requests are sent once the session is established
+            return
+        client = self.client
+        try:
+            while client._queue:
+                request, async_object = client._queue[0]
+
+                # Special case for testing, if this is a _SessionExpire
+                # object then throw a SessionExpiration error as if we
+                # were dropped
+                if request is _SESSION_EXPIRED:
+                    raise SessionExpiredError("Session expired: Testing")
+                if request is _CONNECTION_DROP:
+                    raise ConnectionDropped("Connection dropped: Testing")
+
+                # Special case for auth packets
+                if request.type == Auth.type:
+                    xid = AUTH_XID
+                else:
+                    self._xid = (self._xid % 2147483647) + 1
+                    xid = self._xid
+
+                self._submit(request, None, xid)
+                client._queue.popleft()
+                client._pending.append((request, async_object, xid))
+                # Requests act as implicit pings
+                self._last_send = time.monotonic()
+        except Exception as exc:
+            session.set_exception(exc)
+
+    def _frame_received(self, frame: _Frame) -> None:
+        if self._frames is not None:
+            self._frames.put_nowait(frame)
+            return
+        session = self._session
+        if session is None or session.done():
+            return
+        try:
+            header, offset = ReplyHeader.deserialize(frame, 0)
+            if self._read_reply(header, frame, offset) == CLOSE_RESPONSE:
+                session.set_result(CLOSE_RESPONSE)
+        except Exception as exc:
+            session.set_exception(exc)
+
+    def _connection_lost(self, exc: Optional[Exception]) -> None:
+        if exc is None:
+            exc = ConnectionDropped("socket connection broken")
+        elif not isinstance(exc, ConnectionDropped):
+            exc = ConnectionDropped("socket connection error: %s" % (exc,))
+        if self._frames is not None:
+            self._frames.put_nowait(exc)
+        session = self._session
+        if session is not None and not session.done():
+            session.set_exception(exc)
+
+    async def _next_frame(self, timeout: Optional[float]) -> _Frame:
+        assert self._frames is not None
+        try:
+            frame = await asyncio.wait_for(self._frames.get(), timeout)
+        except asyncio.TimeoutError:
+            raise self.handler.timeout_exception("socket time-out during read")
+        if isinstance(frame, Exception):
+            raise frame
+        return frame
+
+    async def _sleep(self, delay: float) -> None:
+        """Sleep for `delay` seconds, or until the client is stopped"""
+        deadline = time.monotonic() + delay
+        wakeup_event = self._wakeup_event
+        assert wakeup_event is not None
+        while not self.client._stopped.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wakeup_event.clear()
+            try:
+                await asyncio.wait_for(wakeup_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+    async def _retry_sleep(self, retry: KazooRetry) -> None:
+        """Sleep between connection attempts, as :class:`KazooRetry`"""
+        await self._sleep(retry._backoff())
+
+    async def zk_loop(self) -> None:
+        """Main Zookeeper handling loop"""
+        self.logger.log(BLATHER, "ZK loop started")
+        self._wakeup_event = asyncio.Event()
+
+        retry = self.retry_sleeper.copy()
+        retry.reset()
+        try:
+            while not self.client._stopped.is_set():
+                retry._start()
+                try:
+                    # If the connect_loop returns STOP_CONNECTING, stop
+                    # retrying
+                    if await self._connect_loop(retry) is STOP_CONNECTING:
+                        break
+                except ConnectionClosedError:
+                    raise
+                except retry.retry_exceptions:
+                    await self._retry_sleep(retry)
+        except RetryFailedError:
+            self.logger.warning(
+                "Failed connecting to Zookeeper "
+                "within the connection retry policy."
+            )
+        finally:
+            self.connection_stopped.set()
+            self.client._session_callback(KeeperState.CLOSED)
+            self.logger.log(BLATHER, "Connection stopped")
+
+    async def _resolve(self, host: str, port: int) -> List[Tuple[str, int]]:
+        return [
+            (str(rhost[4][0]), int(rhost[4][1]))
+            for rhost in await self.loop.getaddrinfo(
+                host, port, proto=socket.IPPROTO_TCP
+            )
+        ]
+
+    async def _refresh(self, host: str, port: int) -> None:
+        """Resolve a cached host again"""
+        resolver = self._resolver
+        assert resolver is not None
+        try:
+            resolver.update(host, port, await self._resolve(host, port))
+        except socket.gaierror as e:
+            self.logger.warning(
+                "Cannot resolve %s, using its last addresses: %s", host, e
+            )
+            resolver.failed(host, port)
+        finally:
+            resolver.refreshing.discard((host, port))
+
+    async def _addresses(self, host: str, port: int) -> List[Tuple[str, int]]:
+        """Returns the addresses of a host, none if it doesn't resolve"""
+        addresses = self._cached_addresses(host, port)
+        if addresses is None:
+            try:
+                addresses = await self._resolve(host, port)
+            except socket.gaierror:
+                addresses = []
+        return addresses
+
+    def update_hosts(
+        self,
+        old_hosts: List[Tuple[str, int]],
+        new_hosts: List[Tuple[str, int]],
+    ) -> None:
+        """Plan moving the session after the ensemble changed, resolving
+        the hosts on the loop"""
+        if self._server is not None:
+            self.handler.spawn(self._update_hosts, old_hosts, new_hosts)
+
+    async def _update_hosts(
+        self,
+        old_hosts: List[Tuple[str, int]],
+        new_hosts: List[Tuple[str, int]],
+    ) -> None:
+        addresses: Dict[Tuple[str, int], List[Tuple[str, int]]] = {}
+        for host_port in set(old_hosts) | set(new_hosts):
+            addresses[host_port] = await self._addresses(*host_port)
+        self._plan_move(old_hosts, new_hosts, addresses)
+
+    async def _expand_client_hosts(self) -> List[_HostPort]:
+        # Expand the entire list in advance so we can randomize it if needed
+        host_ports: List[_HostPort] = []
+        for host, port in self.client.hosts:
+            host = host.strip()
+            addresses = self._cached_addresses(host, port)
+            if addresses is None:
+                try:
+                    addresses = await self._resolve(host, port)
+                except socket.gaierror as e:
+                    # Skip hosts that don't resolve
+                    self.logger.warning("Cannot resolve %s: %s", host, e)
+                    continue
+                if self._resolver is not None:
+                    self._resolver.update(host, port, addresses)
+            host_ports.extend((host, ip, rport) for ip, rport in addresses)
+        if self.client.randomize_hosts:
+            random.shuffle(host_ports)
+        return host_ports
+
+    async def _connect_loop(self, retry: KazooRetry) -> object:
+        # Iterate through the hosts a full cycle before starting over
+        status = None
+        host_ports = self._order_hosts(await self._expand_client_hosts())
+
+        # Check for an empty hostlist, indicating none resolved
+        if len(host_ports) == 0:
+            raise ForceRetryError("No host resolved. Reconnecting")
+
+        racing = self.client.connect_attempt_delay is not None
+        while host_ports:
+            if self.client._stopped.is_set():
+                status = STOP_CONNECTING
+                break
+            transport = None
+            if racing and not self._rw_server:
+                raced = await self._race_connect(host_ports)
+                if raced is None:
+                    break
+                (host, hostip, port), transport = raced
+                host_ports.remove((host, hostip, port))
+            else:
+                host, hostip, port = host_ports.pop(0)
+            status = await self._connect_attempt(
+                host, hostip, port, retry, transport
+            )
+            if status is STOP_CONNECTING:
+                break
+            if self._next_server is not None:
+                # Start over from the server to move to
+                host_ports = self._order_hosts(
+                    await self._expand_client_hosts()
+                )
+
+        if status is STOP_CONNECTING:
+            return STOP_CONNECTING
+        else:
+            raise ForceRetryError("Reconnecting")
+
+    async def _race_connect(
+        self, host_ports: List[_HostPort]
+    ) -> Optional[Tuple[_HostPort, asyncio.Transport]]:
+        """Connect to the first of `host_ports` to accept a connection,
+        see :meth:`ConnectionHandler._race_connect`.
+
+        :returns: The (host, hostip, port) tuple and the transport of the
+                  first connection, or `None` if they all failed.
+
+        """
+        delay = self.client.connect_attempt_delay
+        pending = list(host_ports)
+        attempts: Dict["asyncio.Task[asyncio.Transport]", _HostPort] = {}
+        try:
+            while pending or attempts:
+                if pending:
+                    host_port = pending.pop(0)
+                    attempt = asyncio.ensure_future(
+                        self._open_transport(host_port[1], host_port[2])
+                    )
+                    attempts[attempt] = host_port
+                done, _ = await asyncio.wait(
+                    attempts,
+                    timeout=delay if pending else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                winner = None
+                for attempt in done:
+                    host_port = attempts.pop(attempt)
+                    if attempt.exception() is not None:
+                        self.logger.warning(
+                            "Cannot connect to %s(%s):%s: %s",
+                            *(host_port + (attempt.exception(),)),
+                        )
+                    elif winner is None:
+                        winner = host_port, attempt.result()
+                    else:
+                        self._close_raced(attempt.result())
+                if winner is not None:
+                    return winner
+            return None
+        finally:
+            for attempt in attempts:
+                if (
+                    attempt.done()
+                    and not attempt.cancelled()
+                    and attempt.exception() is None
+                ):
+                    self._close_raced(attempt.result())
+                else:
+                    attempt.cancel()
+
+    @staticmethod
+    def _close_raced(transport: asyncio.Transport) -> None:
+        cast(_ZooKeeperProtocol, transport.get_protocol()).detach()
+        transport.close()
+
+    async def _open_transport(
+        self, hostip: str, port: int
+    ) -> asyncio.Transport:
+        client = self.client
+        ssl_context = None
+        if client.use_ssl:
+            # The loop can't resume the sessions, reuse the context only
+            ssl_context = self._get_ssl_context()
+
+        try:
+            transport, _ = await asyncio.wait_for(
+                self.loop.create_connection(
+                    partial(_ZooKeeperProtocol, self),
+                    hostip,
+                    port,
+                    ssl=ssl_context,
+                ),
+                client._session_timeout / 1000.0,
+            )
+        except asyncio.TimeoutError:
+            raise self.handler.timeout_exception("Connection time-out")
+        except OSError as e:
+            err = getattr(e, "strerror", e)
+            raise ConnectionDropped("socket connection error: %s" % (err,))
+        return transport
+
+    async def _connect_attempt(
+        self,
+        host: str,
+        hostip: str,
+        port: int,
+        retry: KazooRetry,
+        transport: Optional[asyncio.Transport] = None,
+    ) -> object:
+        client = self.client
+        KazooTimeoutError = self.handler.timeout_exception
+
+        self._socket = None
+
+        # Were we given a r/w server? If so, use that instead
+        if self._rw_server:
+            self.logger.log(
+                BLATHER, "Found r/w server to use, %s:%s", host, port
+            )
+            host, port = self._rw_server
+            self._rw_server = None
+
+        if client._state != KeeperState.CONNECTING and not self._migrating:
+            client._session_callback(KeeperState.CONNECTING)
+
+        self._session = session = self.loop.create_future()
+        try:
+            self._xid = 0
+            try:
+                read_timeout, connect_timeout = await self._connect(
+                    host, hostip, port, transport
+                )
+            finally:
+                self._migrating = False
+            read_timeout = read_timeout / 1000.0
+            connect_timeout = connect_timeout / 1000.0
+            retry.reset()
+            self._server = (host, port)
+            self._address = (hostip, port)
+            self.ping_outstanding.clear()
+            self._last_send = time.monotonic()
+            self._flush()
+            while True:
+                jitter_time = random.randint(1, 40) / 100.0
+                ping_interval = read_timeout / 2.0 - jitter_time
+                deadline = self._last_send + ping_interval
+                # Ensure our timeout is positive
+                timeout = max([deadline - time.monotonic(), jitter_time])
+                done, _ = await asyncio.wait([session], timeout=timeout)
+                if done:
+                    session.result()
+                    break
+
+                if time.monotonic() < self._last_send + ping_interval:
+                    # Requests were sent in the meantime
+                    continue
+                if self.ping_outstanding.is_set():
+                    raise ConnectionDropped(
+                        "outstanding heartbeat ping not received"
+                    )
+                await self._send_ping(connect_timeout)
+                self._last_send = time.monotonic()
+            self.logger.info("Closing connection to %s:%s", host, port)
+            client._session_callback(KeeperState.CLOSED)
+            return STOP_CONNECTING
+        except (ConnectionDropped, KazooTimeoutError) as e:
+            if isinstance(e, ConnectionDropped):
+                self.logger.warning("Connection dropped: %s", e)
+            else:
+                self.logger.warning("Connection time-out: %s", e)
+            if client._state != KeeperState.CONNECTING:
+                self.logger.warning("Transition to CONNECTING")
+                client._session_callback(KeeperState.CONNECTING)
+        except AuthFailedError as err:
+            retry.reset()
+            self.logger.warning("AUTH_FAILED closing: %s", err)
+            client._session_callback(KeeperState.AUTH_FAILED)
+            return STOP_CONNECTING
+        except SessionExpiredError:
+            retry.reset()
+            self.logger.warning("Session has expired")
+            client._session_callback(KeeperState.EXPIRED_SESSION)
+        except RWServerAvailable:
+            retry.reset()
+            self.logger.warning("Found a RW server, dropping connection")
+            client._session_callback(KeeperState.CONNECTING)
+        except ServerMigration as e:
+            retry.reset()
+            self.logger.info("Moving session, %s", e)
+            self._migrating = True
+        except Exception:
+            self.logger.exception("Unhandled exception in connection loop")
+            raise
+        finally:
+            self._server = self._address = None
+            self._session = None
+            if session.done():
+                # Mark the error, if any, as retrieved
+                session.exception()
+            self._frames = None
+            if self._transport is not None:
+                self._transport.close()
+                self._transport = None
+        return None
+
+    async def _connect(
+        self,
+        host: str,
+        hostip: str,
+        port: int,
+        transport: Optional[asyncio.Transport] = None,
+    ) -> Tuple[float, float]:
+        client = self.client
+        self.logger.info(
+            "Connecting to %s(%s):%s, use_ssl: %r",
+            host,
+            hostip,
+            port,
+            self.client.use_ssl,
+        )
+
+        self.logger.log(
+            BLATHER,
+            "    Using session_id: %r session_passwd: %s",
+            client._session_id,
+            hexlify(client._session_passwd),
+        )
+
+        self._frames = asyncio.Queue()
+        if transport is None:
+            transport = await self._open_transport(hostip, port)
+        self._transport = transport
+        self._socket = self._transport.get_extra_info("socket")
+
+        connect = Connect(
+            0,
+            client.last_zxid,
+            client._session_timeout,
+            client._session_id or 0,
+            client._session_passwd,
+            client.read_only,
+        )
+
+        connect_result, zxid = cast(
+            Tuple[Connect, Optional[int]],
+            await self._invoke(
+                client._session_timeout / 1000.0 / len(client.hosts), connect
+            ),
+        )
+
+        if connect_result.time_out <= 0:
+            raise SessionExpiredError("Session has expired")
+
+        if zxid:
+            client.last_zxid = zxid
+
+        # Load return values
+        client._session_id = connect_result.session_id
+        client._protocol_version = connect_result.protocol_version
+        negotiated_session_timeout = connect_result.time_out
+        connect_timeout = negotiated_session_timeout / len(client.hosts)
+        read_timeout = negotiated_session_timeout * 2.0 / 3.0
+        client._session_passwd = connect_result.passwd
+
+        self.logger.log(
+            BLATHER,
+            "Session created, session_id: %r session_passwd: %s\n"
+            "    negotiated session timeout: %s\n"
+            "    connect timeout: %s\n"
+            "    read timeout: %s",
+            client._session_id,
+            hexlify(client._session_passwd),
+            negotiated_session_timeout,
+            connect_timeout,
+            read_timeout,
+        )
+
+        if connect_result.read_only:
+            client._session_callback(KeeperState.CONNECTED_RO)
+            self._ro_mode = iter(self._server_pinger())
+        else:
+            client._session_callback(KeeperState.CONNECTED)
+            self._ro_mode = None
+
+        # Get a copy of the auth data before iterating, in case it is
+        # changed.
+        client_auth_data_copy = copy.copy(client.auth_data)
+
+        for scheme, auth in client_auth_data_copy:
+            ap = Auth(0, scheme, auth)
+            zxid = cast(
+                Optional[int],
+                await self._invoke(connect_timeout / 1000.0, ap, xid=AUTH_XID),
+            )
+            if zxid:
+                client.last_zxid = zxid
+
+        if self._migrating:
+            await self._set_watches(connect_timeout / 1000.0)
+
+        # Replies are now dispatched as soon as they are received
+        self._frames = None
+        return read_timeout, connect_timeout
+
+    async def _set_watches(self, timeout: float) -> None:
+        """Restore the watches of the session on a new server, see
+        :meth:`ConnectionHandler._set_watches`"""
+        for request in self._set_watches_requests():
+            self._submit(request, timeout, SET_WATCHES_XID)
+            while True:
+                frame = await self._next_frame(timeout)
+                header, offset = ReplyHeader.deserialize(frame, 0)
+                if header.xid == WATCH_XID:
+                    self._read_watch_event(frame, offset)
+                    continue
+                if header.xid != SET_WATCHES_XID:
+                    raise RuntimeError(
+                        "xids do not match, expected %r received %r"
+                        % (SET_WATCHES_XID, header.xid)
+                    )
+                if header.err:
+                    raise EXCEPTIONS[header.err]()
+                break
+
+    async def _invoke(
+        self, timeout: float, request: object, xid: Optional[int] = None
+    ) -> object:
+        """A special writer used during connection establishment
+        only"""
+        self._submit(request, timeout, xid)
+        frame = await self._next_frame(timeout)
+        zxid = None
+        if xid:
+            header, offset = ReplyHeader.deserialize(frame, 0)
+            if header.xid != xid:
+                raise RuntimeError(
+                    "xids do not match, expected %r " "received %r",
+                    xid,
+                    header.xid,
+                )
+            if header.zxid > 0:
+                zxid = header.zxid
+            if header.err:
+                callback_exception = EXCEPTIONS[header.err]()
+                self.logger.debug(
+                    "Received error(xid=%s) %r", xid, callback_exception
+                )
+                raise callback_exception
+            return zxid
+
+        if hasattr(request, "deserialize"):
+            try:
+                obj, _ = request.deserialize(frame, 0)
+            except Exception:
+                self.logger.exception(
+                    "Exception raised during deserialization "
+                    "of request: %s",
+                    request,
+                )
+
+                # raise ConnectionDropped so connect loop will retry
+                raise ConnectionDropped("invalid server response")
+            self.logger.log(BLATHER, "Read response %s", obj)
+            return obj, zxid
+
+        return zxid
+
+    async def _send_ping(self, connect_timeout: float) -> None:
+        self._check_server()
+        self.ping_outstanding.set()
+        self._submit(PingInstance, connect_timeout, PING_XID)
+
+        # Determine if we need to check for a r/w server, the pinger
+        # connects with blocking sockets so it runs in the loop executor
+        if self._ro_mode:
+            result = await self.loop.run_in_executor(
+                None, advance_iterator, self._ro_mode
+            )
+            if isinstance(result, tuple):
+                self._rw_server = result
+                raise RWServerAvailable()
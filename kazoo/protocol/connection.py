@@ -6,18 +6,30 @@ import logging
 import random
 import select
 import socket
-import ssl
 import sys
 import time
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+    Union,
+)
 
 from kazoo.exceptions import (
     AuthFailedError,
+    ConfigurationError,
     ConnectionDropped,
     EXCEPTIONS,
     SessionExpiredError,
     NoNodeError,
     SASLException,
 )
+from kazoo.handlers.utils import create_ssl_context, send_command
 from kazoo.loggingsupport import BLATHER
 from kazoo.protocol.serialization import (
     Auth,
@@ -26,13 +38,18 @@ from kazoo.protocol.serialization import (
     Exists,
     GetChildren,
     GetChildren2,
+    GetData,
     Ping,
     PingInstance,
     ReplyHeader,
     SASL,
+    SetData,
     Transaction,
     Watch,
+    SetWatches,
+    SCATTER_THRESHOLD,
     int_struct,
+    read_lazy_stat,
 )
 from kazoo.protocol.states import (
     Callback,
@@ -42,16 +59,12 @@ from kazoo.protocol.states import (
 )
 from kazoo.retry import (
     ForceRetryError,
+    KazooRetry,
     RetryFailedError,
 )
 
-try:
-    import puresasl
-    import puresasl.client
-
-    PURESASL_AVAILABLE = True
-except ImportError:
-    PURESASL_AVAILABLE = False
+if TYPE_CHECKING:
+    import ssl
 
 
 log = logging.getLogger(__name__)
@@ -72,9 +85,16 @@ CHILD_EVENT = 4
 WATCH_XID = -1
 PING_XID = -2
 AUTH_XID = -4
+SET_WATCHES_XID = -8
+
+# Paths restored per SetWatches request, like the Java client
+SET_WATCHES_MAX_LENGTH = 128 * 1024
 
 CLOSE_RESPONSE = Close.type
 
+# Requests whose stat can be read as a LazyZnodeStat
+LAZY_STAT_REQUESTS = (Exists, GetData, GetChildren2, SetData)
+
 if sys.version_info > (3,):  # pragma: nocover
 
     def buffer(obj, offset=0):
@@ -87,6 +107,33 @@ else:  # pragma: nocover
         return it.next()
 
 
+def _ssl_want_retry(error):
+    """Whether `error` is an SSL socket asking for its last operation to
+    be retried.
+
+    ssl is only imported for secure connections, when it is not loaded the
+    error cannot come from an SSL socket.
+
+    """
+    ssl = sys.modules.get("ssl")
+    return (
+        ssl is not None
+        and isinstance(error, ssl.SSLError)
+        and error.errno in (ssl.SSL_ERROR_WANT_READ, ssl.SSL_ERROR_WANT_WRITE)
+    )
+
+
+class _Waker(Protocol):
+    """The end of the socket pair the client writes to, to wake the
+    connection up when it queues a request"""
+
+    def send(self, data: bytes) -> int:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
 class RWPinger(object):
     """A Read/Write Server Pinger Iterable
 
@@ -141,14 +188,293 @@ class RWPinger(object):
         delay *= 2
 
 
+class LatencyProber(object):
+    """A Server Round Trip Time Tracker
+
+    This object is initialized with the socket creation function. Each
+    :meth:`probe` connects to the hosts like :class:`RWPinger` does, and
+    times the reply to an ``isro`` request, which the servers answer
+    without involving the rest of the ensemble. The times measured for
+    a host are smoothed across probes.
+
+    The hosts whose round trip time is within a tolerance of the
+    lowest one are the nearest, and are preferred to the others.
+
+    """
+
+    tolerance = 1.5
+    slack = 0.002
+    weight = 0.3
+
+    def __init__(self, connection_func, socket_handling, interval):
+        self.connection = connection_func
+        self.socket_handling = socket_handling
+        self.interval = interval
+        self.rtts = {}
+        self.probing = False
+        self.next_probe = 0
+
+    def due(self):
+        """Returns whether the hosts should be probed again"""
+        return not self.probing and time.monotonic() >= self.next_probe
+
+    def probe(self, hosts):
+        """Measure the round trip time to each of the `hosts`"""
+        self.probing = True
+        try:
+            for host, port in hosts:
+                log.debug("Probing server latency: %s:%s", host, port)
+                try:
+                    with self.socket_handling():
+                        sock = self.connection(host, port)
+                        try:
+                            start = time.monotonic()
+                            sock.sendall(b"isro")
+                            sock.recv(8192)
+                            rtt = time.monotonic() - start
+                        finally:
+                            sock.close()
+                except ConnectionDropped:
+                    # Unreachable hosts are tried last
+                    self.rtts.pop((host, port), None)
+                    continue
+                previous = self.rtts.get((host, port))
+                if previous is not None:
+                    rtt = previous + self.weight * (rtt - previous)
+                self.rtts[(host, port)] = rtt
+        finally:
+            jitter = random.uniform(0, self.interval / 10.0)
+            self.next_probe = time.monotonic() + self.interval + jitter
+            self.probing = False
+
+    def nearest(self):
+        """Returns the (host, port) tuples of the nearest hosts"""
+        rtts = dict(self.rtts)
+        if not rtts:
+            return []
+        limit = min(rtts.values()) * self.tolerance + self.slack
+        return [server for server, rtt in rtts.items() if rtt <= limit]
+
+    def order(self, host_ports):
+        """Sort the (host, hostip, port) tuples of `host_ports` by round
+        trip time
+
+        The nearest hosts come first, in their original order so that
+        the sessions are spread across them, then the others, and
+        those that weren't measured last.
+
+        """
+        rtts = dict(self.rtts)
+        nearest = set(self.nearest())
+
+        def key(host_port):
+            server = (host_port[0], host_port[2])
+            if server in nearest:
+                return 0, 0
+            if server in rtts:
+                return 1, rtts[server]
+            return 2, 0
+
+        return sorted(host_ports, key=key)
+
+    def closer(self, server):
+        """Returns one of the nearest hosts if `server` is not, or None"""
+        nearest = self.nearest()
+        if server in nearest or server not in self.rtts:
+            return None
+        return random.choice(nearest)
+
+
+class SessionRebalancer(object):
+    """A Server Load Tracker
+
+    This object is initialized with the four letter word command
+    function. Each :meth:`poll` reads the number of connections of
+    each host from its ``mntr`` report, or counts the connections of
+    its ``cons`` report when ``mntr`` isn't allowed. The hosts allowing
+    neither are left out.
+
+    When the server of the session has more connections than the
+    average by a margin, the session is planned to move to one of the
+    least loaded servers, with the probability that brings the load of
+    its server back to the average once every session on it made the
+    same choice. The move happens at a random time before the next
+    poll so that the sessions don't all move at once.
+
+    """
+
+    tolerance = 0.2
+
+    def __init__(self, command_func, interval):
+        self.command = command_func
+        self.interval = interval
+        self.loads = {}
+        self.polling = False
+        self.next_poll = 0.0
+        self.move_at = None
+        self.move_to = None
+
+    def due(self):
+        """Returns whether the hosts should be polled again"""
+        return not self.polling and time.monotonic() >= self.next_poll
+
+    def connections(self, host, port):
+        """Returns the number of connections of a server
+
+        :raises: :exc:`~kazoo.exceptions.ConfigurationError` if the
+                 server allows neither ``mntr`` nor ``cons``.
+
+        """
+        # Not imported with the client, kazoo.admin loads http.client
+        from kazoo.admin import parse_cons, parse_mntr
+
+        try:
+            stats = parse_mntr(self.command(host, port, b"mntr"))
+        except ConfigurationError:
+            stats = {}
+        if "zk_num_alive_connections" in stats:
+            return int(stats["zk_num_alive_connections"])
+        return len(parse_cons(self.command(host, port, b"cons")))
+
+    def poll(self, hosts, server, candidates=None):
+        """Read the load of the `hosts` and plan moving away from
+        `server` if it is over-subscribed, to one of `candidates` if
+        given"""
+        self.polling = True
+        try:
+            loads = {}
+            for host, port in hosts:
+                try:
+                    loads[(host, port)] = self.connections(host, port)
+                except (
+                    ConnectionDropped,
+                    ConfigurationError,
+                    ValueError,
+                ) as e:
+                    log.debug("Cannot read load of %s:%s: %s", host, port, e)
+            self.loads = loads
+            self._plan(server, candidates)
+        finally:
+            self.next_poll = time.monotonic() + self.interval
+            self.polling = False
+
+    def _plan(self, server, candidates):
+        self.move_at = self.move_to = None
+        loads = self.loads
+        if server not in loads or len(loads) < 2:
+            return
+        average = sum(loads.values()) / float(len(loads))
+        current = loads[server]
+        if current <= max(average * (1 + self.tolerance), average + 1):
+            return
+        targets = [
+            target
+            for target, load in loads.items()
+            if load < average and (candidates is None or target in candidates)
+        ]
+        if not targets:
+            return
+        if random.random() >= (current - average) / current:
+            return
+        least = min(loads[target] for target in targets)
+        self.move_to = random.choice(
+            [target for target in targets if loads[target] == least]
+        )
+        self.move_at = time.monotonic() + random.uniform(0, self.interval)
+
+    def move(self):
+        """Returns the server to move to if it's time, or None"""
+        if self.move_at is None or time.monotonic() < self.move_at:
+            return None
+        server, self.move_at, self.move_to = self.move_to, None, None
+        return server
+
+
+class HostResolver(object):
+    """A Host Address Cache
+
+    Keeps the addresses each host resolved to for `ttl` seconds. Past
+    that, the addresses are still used while they are resolved again
+    in the background, and kept when that fails, so that connecting
+    doesn't wait on a slow or failing resolver once a host resolved.
+
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.addresses = {}
+        self.expires = {}
+        self.refreshing = set()
+
+    def get(self, host, port):
+        """Returns the cached addresses of a host or None, and whether
+        they should be resolved again"""
+        key = (host, port)
+        addresses = self.addresses.get(key)
+        if addresses is None:
+            return None, False
+        due = time.monotonic() >= self.expires[key]
+        return addresses, due and key not in self.refreshing
+
+    def update(self, host, port, addresses):
+        """Cache the addresses a host resolved to"""
+        self.addresses[(host, port)] = addresses
+        self.expires[(host, port)] = time.monotonic() + self.ttl
+
+    def failed(self, host, port):
+        """Keep the last known addresses of a host that didn't resolve
+        until the next refresh"""
+        if (host, port) in self.addresses:
+            self.expires[(host, port)] = time.monotonic() + self.ttl
+
+
+def reconfig_target(old_hosts, new_hosts, server):
+    """Returns the server a session connected to `server` should move
+    to when the ensemble changes from `old_hosts` to `new_hosts`, or
+    None to stay
+
+    As with the ``updateServerList`` of the Java client, the sessions
+    move with the probabilities that balance the load of the new
+    ensemble, assuming it was balanced on the old one. When the
+    ensemble grows, a share of the sessions of the remaining servers
+    move to the added ones. The sessions of the removed servers fill
+    the remaining servers up to their new share, then the added ones.
+
+    """
+    old, new = set(old_hosts), set(new_hosts)
+    added = [host for host in new_hosts if host not in old]
+    kept = [host for host in new_hosts if host in old]
+    if server in new:
+        if added and random.random() < 1 - len(old) / float(len(new)):
+            return random.choice(added)
+        return None
+    if not new:
+        return None
+    removed = len(old - new) or 1
+    to_kept = len(kept) * max(0, len(old) / float(len(new)) - 1) / removed
+    if kept and (not added or random.random() < to_kept):
+        return random.choice(kept)
+    return random.choice(added)
+
+
 class RWServerAvailable(Exception):
     """Thrown if a RW Server becomes available"""
 
 
+class ServerMigration(Exception):
+    """Thrown to move the session to another server"""
+
+
 class ConnectionHandler(object):
     """Zookeeper connection handler"""
 
-    def __init__(self, client, retry_sleeper, logger=None, sasl_options=None):
+    def __init__(
+        self,
+        client,
+        retry_sleeper: KazooRetry,
+        logger: Optional[logging.Logger] = None,
+        sasl_options: Optional[Dict[str, str]] = None,
+    ) -> None:
         self.client = client
         self.handler = client.handler
         self.retry_sleeper = retry_sleeper
@@ -161,19 +487,52 @@ class ConnectionHandler(object):
         self.connection_stopped.set()
         self.ping_outstanding = client.handler.event_object()
 
-        self._read_sock = None
-        self._write_sock = None
-
-        self._socket = None
-        self._xid = None
-        self._rw_server = None
-        self._ro_mode = False
-
-        self._connection_routine = None
+        self._read_sock: Optional[socket.socket] = None
+        self._write_sock: Optional[_Waker] = None
+
+        self._socket: Optional[socket.socket] = None
+        self._xid = 0
+        self._rw_server: Optional[Tuple[str, int]] = None
+        self._ro_mode: Optional[Iterator[Union[bool, Tuple[str, int]]]] = None
+        self._server: Optional[Tuple[str, int]] = None
+        # The address of the server, resolved from its host
+        self._address: Optional[Tuple[str, int]] = None
+        self._next_server: Optional[Tuple[str, int]] = None
+        self._latency = None
+        if client.latency_probe_interval is not None:
+            self._latency = LatencyProber(
+                self._create_connection,
+                self._socket_error_handling,
+                client.latency_probe_interval,
+            )
+        self._rebalancer = None
+        if client.rebalance_interval is not None:
+            self._rebalancer = SessionRebalancer(
+                self._command, client.rebalance_interval
+            )
+        # SSL context of the client and last session with each server
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self._ssl_sessions: Dict[Tuple[str, int], ssl.SSLSession] = {}
+        self._resolver = None
+        if client.dns_cache_ttl is not None:
+            self._resolver = HostResolver(client.dns_cache_ttl)
+        # Server to move to after a change of the ensemble
+        self._move_to: Optional[Tuple[str, int]] = None
+        # Moving the session, keeping its state and watches
+        self._migrating = False
+        # Data watches left by exists requests on missing nodes
+        self._exist_watches: Set[str] = set()
+
+        self._connection_routine: object = None
 
         self.sasl_options = sasl_options
         self.sasl_cli = None
 
+        # Responses handed to the completion worker, and how many of them
+        # it has completed. They only differ while some are in flight.
+        self._offloaded = 0
+        self._offloads_done = 0
+
     # This is instance specific to avoid odd thread bug issues in Python
     # during shutdown global cleanup
     @contextmanager
@@ -190,6 +549,12 @@ class ConnectionHandler(object):
             rw_sockets = self.handler.create_socket_pair()
             self._read_sock, self._write_sock = rw_sockets
             self.connection_closed.clear()
+        self._offloaded = self._offloads_done = 0
+        self._migrating = False
+        self._move_to = None
+        # Load the certificates again
+        self._ssl_context = None
+        self._ssl_sessions = {}
         if self._connection_routine:
             raise Exception(
                 "Unable to start, connection routine already " "active."
@@ -219,7 +584,7 @@ class ConnectionHandler(object):
         if rs is not None:
             rs.close()
 
-    def _server_pinger(self):
+    def _server_pinger(self) -> RWPinger:
         """Returns a server pinger iterable, that will ping the next
         server in the list, and apply a back-off between attempts."""
         return RWPinger(
@@ -231,40 +596,40 @@ class ConnectionHandler(object):
     def _read_header(self, timeout):
         b = self._read(4, timeout)
         length = int_struct.unpack(b)[0]
-        b = self._read(length, timeout)
+        pending = self.client._pending
+        if pending and getattr(pending[0][0], "read_into", False):
+            # The reply is probably for a request that keeps views of
+            # it, receive it in place rather than joining chunks
+            b = self._read_into(bytearray(length), timeout)
+        else:
+            b = self._read(length, timeout)
         header, offset = ReplyHeader.deserialize(b, 0)
         return header, b, offset
 
+    def _wait_readable(self, timeout):
+        # Because of SSL framing, a select may not return when using
+        # an SSL socket because the underlying physical socket may not
+        # have anything to select, but the wrapped object may still
+        # have something to read as it has previously gotten enough
+        # data from the underlying socket.
+        if hasattr(self._socket, "pending") and self._socket.pending() > 0:
+            return
+        s = self.handler.select([self._socket], [], [], timeout)[0]
+        if not s:  # pragma: nocover
+            # If the read list is empty, we got a timeout. We don't
+            # have to check wlist and xlist as we don't set any
+            raise self.handler.timeout_exception("socket time-out during read")
+
     def _read(self, length, timeout):
         msgparts = []
         remaining = length
         with self._socket_error_handling():
             while remaining > 0:
-                # Because of SSL framing, a select may not return when using
-                # an SSL socket because the underlying physical socket may not
-                # have anything to select, but the wrapped object may still
-                # have something to read as it has previously gotten enough
-                # data from the underlying socket.
-                if (
-                    hasattr(self._socket, "pending")
-                    and self._socket.pending() > 0
-                ):
-                    pass
-                else:
-                    s = self.handler.select([self._socket], [], [], timeout)[0]
-                    if not s:  # pragma: nocover
-                        # If the read list is empty, we got a timeout. We don't
-                        # have to check wlist and xlist as we don't set any
-                        raise self.handler.timeout_exception(
-                            "socket time-out during read"
-                        )
+                self._wait_readable(timeout)
                 try:
                     chunk = self._socket.recv(remaining)
-                except ssl.SSLError as e:
-                    if e.errno in (
-                        ssl.SSL_ERROR_WANT_READ,
-                        ssl.SSL_ERROR_WANT_WRITE,
-                    ):
+                except OSError as e:
+                    if _ssl_want_retry(e):
                         continue
                     else:
                         raise
@@ -274,6 +639,25 @@ class ConnectionHandler(object):
                 remaining -= len(chunk)
             return b"".join(msgparts)
 
+    def _read_into(self, msg, timeout):
+        """Fill the `msg` bytearray from the socket"""
+        view = memoryview(msg)
+        received = 0
+        with self._socket_error_handling():
+            while received < len(msg):
+                self._wait_readable(timeout)
+                try:
+                    nbytes = self._socket.recv_into(view[received:])
+                except OSError as e:
+                    if _ssl_want_retry(e):
+                        continue
+                    else:
+                        raise
+                if not nbytes:
+                    raise ConnectionDropped("socket connection broken")
+                received += nbytes
+        return msg
+
     def _invoke(self, timeout, request, xid=None):
         """A special writer used during connection establishment
         only"""
@@ -318,22 +702,73 @@ class ConnectionHandler(object):
 
         return zxid
 
-    def _submit(self, request, timeout, xid=None):
+    def _submit(
+        self,
+        request: object,
+        timeout: Optional[float],
+        xid: Optional[int] = None,
+    ) -> None:
         """Submit a request object with a timeout value and optional
         xid"""
-        b = bytearray()
+        # Leave room for the length, packed once the size is known
+        b = bytearray(int_struct.size)
         if xid:
             b.extend(int_struct.pack(xid))
         if request.type:
             b.extend(int_struct.pack(request.type))
-        b += request.serialize()
+        serialize_buffers = getattr(request, "serialize_buffers", None)
+        if serialize_buffers is None:
+            b += request.serialize()
+            buffers = [b]
+        else:
+            # Large values are sent from the buffers of the request
+            buffers = serialize_buffers()
+            b += buffers[0]
+            buffers[0] = b
+        length = sum(len(buf) for buf in buffers) - int_struct.size
+        int_struct.pack_into(b, 0, length)
         self.logger.log(
             (BLATHER if isinstance(request, Ping) else logging.DEBUG),
             "Sending request(xid=%s): %s",
             xid,
             request,
         )
-        self._write(int_struct.pack(len(b)) + b, timeout)
+        self._write_buffers(buffers, timeout)
+
+    def _write_buffers(self, buffers, timeout):
+        """Write a msg made of a list of buffers to the socket, without
+        joining them unless the msg is small or the socket can't send
+        them all at once"""
+        if len(buffers) == 1:
+            self._write(buffers[0], timeout)
+            return
+        sendmsg = getattr(self._socket, "sendmsg", None)
+        if (
+            sendmsg is None
+            or self.client.use_ssl
+            or sum(len(buf) for buf in buffers) < SCATTER_THRESHOLD
+        ):
+            # SSL sockets can't scatter/gather, and copying a small msg
+            # costs less than a scatter/gather send
+            self._write(b"".join(buffers), timeout)
+            return
+
+        views = [memoryview(buf) for buf in buffers]
+        with self._socket_error_handling():
+            while views:
+                s = self.handler.select([], [self._socket], [], timeout)[1]
+                if not s:  # pragma: nocover
+                    raise self.handler.timeout_exception(
+                        "socket time-out during write"
+                    )
+                bytes_sent = sendmsg(views)
+                if not bytes_sent:
+                    raise ConnectionDropped("socket connection broken")
+                # Skip what was sent, which may end within a buffer
+                while views and bytes_sent >= len(views[0]):
+                    bytes_sent -= len(views.pop(0))
+                if bytes_sent:
+                    views[0] = views[0][bytes_sent:]
 
     def _write(self, msg, timeout):
         """Write a raw msg to the socket"""
@@ -351,11 +786,8 @@ class ConnectionHandler(object):
                 msg_slice = buffer(msg, sent)
                 try:
                     bytes_sent = self._socket.send(msg_slice)
-                except ssl.SSLError as e:
-                    if e.errno in (
-                        ssl.SSL_ERROR_WANT_READ,
-                        ssl.SSL_ERROR_WANT_WRITE,
-                    ):
+                except OSError as e:
+                    if _ssl_want_retry(e):
                         continue
                     else:
                         raise
@@ -363,7 +795,9 @@ class ConnectionHandler(object):
                     raise ConnectionDropped("socket connection broken")
                 sent += bytes_sent
 
-    def _read_watch_event(self, buffer, offset):
+    def _read_watch_event(
+        self, buffer: Union[bytes, bytearray], offset: int
+    ) -> None:
         client = self.client
         watch, offset = Watch.deserialize(buffer, offset)
         path = watch.path
@@ -374,9 +808,11 @@ class ConnectionHandler(object):
 
         if watch.type in (CREATED_EVENT, CHANGED_EVENT):
             watchers.extend(client._data_watchers.pop(path, []))
+            self._exist_watches.discard(path)
         elif watch.type == DELETED_EVENT:
             watchers.extend(client._data_watchers.pop(path, []))
             watchers.extend(client._child_watchers.pop(path, []))
+            self._exist_watches.discard(path)
         elif watch.type == CHILD_EVENT:
             watchers.extend(client._child_watchers.pop(path, []))
         else:
@@ -421,50 +857,97 @@ class ConnectionHandler(object):
                 "Received error(xid=%s) %r", xid, callback_exception
             )
             if async_object:
-                async_object.set_exception(callback_exception)
+                self._complete(async_object.set_exception, callback_exception)
         elif request and async_object:
             if exists_error:
                 # It's a NoNodeError, which is fine for an exists
                 # request
-                async_object.set(None)
+                self._complete(async_object.set, None)
             else:
-                try:
-                    response = request.deserialize(buffer, offset)
-                except Exception as exc:
-                    self.logger.exception(
-                        "Exception raised during deserialization "
-                        "of request: %s",
-                        request,
-                    )
-                    async_object.set_exception(exc)
-                    return
-                self.logger.debug(
-                    "Received response(xid=%s): %r", xid, response
-                )
-
-                # We special case a Transaction as we have to unchroot things
-                if request.type == Transaction.type:
-                    response = Transaction.unchroot(client, response)
-
-                async_object.set(response)
+                args = (request, async_object, xid, buffer, offset)
+                threshold = client.deserialize_threshold
+                if threshold is not None and len(buffer) - offset >= threshold:
+                    self._offload(self._deserialize_response, *args)
+                else:
+                    self._complete(self._deserialize_response, *args)
 
             # Determine if watchers should be registered
             watcher = getattr(request, "watcher", None)
             if not client._stopped.is_set() and watcher:
                 if isinstance(request, (GetChildren, GetChildren2)):
-                    client._child_watchers[request.path].add(watcher)
+                    client._child_watchers.add(request.path, watcher)
                 else:
-                    client._data_watchers[request.path].add(watcher)
+                    client._data_watchers.add(request.path, watcher)
+                    if exists_error:
+                        self._exist_watches.add(request.path)
+                    else:
+                        self._exist_watches.discard(request.path)
 
         if isinstance(request, Close):
             self.logger.log(BLATHER, "Read close response")
             return CLOSE_RESPONSE
 
+    def _deserialize_response(
+        self, request, async_object, xid, buffer, offset
+    ):
+        try:
+            if self.client.lazy_stats and isinstance(
+                request, LAZY_STAT_REQUESTS
+            ):
+                response = request.deserialize(buffer, offset, read_lazy_stat)
+            else:
+                response = request.deserialize(buffer, offset)
+        except Exception as exc:
+            self.logger.exception(
+                "Exception raised during deserialization of request: %s",
+                request,
+            )
+            async_object.set_exception(exc)
+            return
+        self.logger.debug("Received response(xid=%s): %r", xid, response)
+
+        # We special case a Transaction as we have to unchroot things
+        if request.type == Transaction.type:
+            response = Transaction.unchroot(self.client, response)
+
+        async_object.set(response)
+
+    def _complete(self, func, *args):
+        """Complete a response now, unless responses received before it
+        are still being deserialized by the completion worker"""
+        if self._offloaded == self._offloads_done:
+            func(*args)
+        else:
+            self._offload(func, *args)
+
+    def _offload(self, func, *args):
+        """Complete a response on the completion worker of the handler,
+        falling back to the current thread for handlers without one"""
+        completion_queue = getattr(self.handler, "completion_queue", None)
+        if completion_queue is None:
+            func(*args)
+            return
+
+        def run():
+            try:
+                func(*args)
+            finally:
+                self._offloads_done += 1
+
+        self._offloaded += 1
+        completion_queue.put(run)
+
     def _read_socket(self, read_timeout):
         """Called when there's something to read on the socket"""
+        header, buffer, offset = self._read_header(read_timeout)
+        return self._read_reply(header, buffer, offset)
+
+    def _read_reply(
+        self, header: ReplyHeader, buffer: Union[bytes, bytearray], offset: int
+    ) -> object:
+        """Process a reply read from the server"""
         client = self.client
 
-        header, buffer, offset = self._read_header(read_timeout)
         if header.xid == PING_XID:
             self.logger.log(BLATHER, "Received Ping")
             self.ping_outstanding.clear()
@@ -520,7 +1003,101 @@ class ConnectionHandler(object):
         self._read_sock.recv(1)
         client._pending.append((request, async_object, xid))
 
+    def _check_server(self) -> None:
+        """Move the session to a nearer or less loaded server if there
+        is one, or as planned after a change of the ensemble, and
+        measure the servers again when it's time"""
+        client = self.client
+        latency, rebalancer = self._latency, self._rebalancer
+        if client._pending or client._queue:
+            # Don't interrupt requests in flight
+            return
+        if self._move_to is not None:
+            server, self._move_to = self._move_to, None
+            if server != self._server:
+                self._next_server = server
+                raise ServerMigration("ensemble changed, using %s:%s" % server)
+        hosts = list(client.hosts)
+        if latency is not None:
+            server = latency.closer(self._server)
+            if server is not None:
+                self._next_server = server
+                raise ServerMigration("%s:%s is nearer" % server)
+            if latency.due():
+                latency.probing = True
+                self.handler.spawn(latency.probe, hosts)
+        if rebalancer is not None:
+            server = rebalancer.move()
+            if server is not None and server != self._server:
+                self._next_server = server
+                raise ServerMigration("%s:%s is less loaded" % server)
+            if rebalancer.due():
+                # Stay among the nearest servers
+                nearest = latency.nearest() if latency is not None else None
+                rebalancer.polling = True
+                self.handler.spawn(
+                    rebalancer.poll, hosts, self._server, nearest or None
+                )
+
+    def update_hosts(self, old_hosts, new_hosts):
+        """Plan moving the session after the ensemble changed from
+        `old_hosts` to `new_hosts`, see :func:`reconfig_target`
+
+        The hosts given to the client and those of the configuration
+        may name the same servers differently, they are matched by
+        address to the names of `new_hosts`.
+
+        """
+        if self._server is None:
+            return
+        addresses = {}
+        for host_port in set(old_hosts) | set(new_hosts):
+            addresses[host_port] = self._addresses(*host_port)
+        self._plan_move(old_hosts, new_hosts, addresses)
+
+    def _plan_move(
+        self,
+        old_hosts: List[Tuple[str, int]],
+        new_hosts: List[Tuple[str, int]],
+        addresses: Dict[Tuple[str, int], List[Tuple[str, int]]],
+    ) -> None:
+        """Plan moving the session, with the resolved `addresses` of the
+        old and new hosts"""
+        server, address = self._server, self._address
+        if server is None or address is None:
+            return
+        names = {}
+        for host_port in new_hosts:
+            for host_address in addresses[host_port]:
+                names.setdefault(host_address, host_port)
+
+        def rename(host_port, host_addresses):
+            for host_address in host_addresses:
+                if host_address in names:
+                    return names[host_address]
+            return host_port
+
+        old_hosts = [rename(hp, addresses[hp]) for hp in old_hosts]
+        server = rename(server, [address])
+        self._move_to = reconfig_target(old_hosts, new_hosts, server)
+        if self._move_to is not None:
+            self.logger.info(
+                "Ensemble changed, moving session to %s:%s", *self._move_to
+            )
+
+    def _order_hosts(
+        self, host_ports: List[Tuple[str, str, int]]
+    ) -> List[Tuple[str, str, int]]:
+        """Order the hosts to connect to, nearest or chosen first"""
+        if self._latency is not None:
+            host_ports = self._latency.order(host_ports)
+        server, self._next_server = self._next_server, None
+        if server is not None:
+            host_ports.sort(key=lambda hp: (hp[0], hp[2]) != server)
+        return host_ports
+
     def _send_ping(self, connect_timeout):
+        self._check_server()
         self.ping_outstanding.set()
         self._submit(PingInstance, connect_timeout, PING_XID)
 
@@ -553,20 +1130,67 @@ class ConnectionHandler(object):
             self.client._session_callback(KeeperState.CLOSED)
             self.logger.log(BLATHER, "Connection stopped")
 
+    def _resolve(self, host, port):
+        return [
+            (rhost[4][0], rhost[4][1])
+            for rhost in socket.getaddrinfo(
+                host, port, 0, 0, socket.IPPROTO_TCP
+            )
+        ]
+
+    def _refresh(self, host, port):
+        """Resolve a cached host again"""
+        resolver = self._resolver
+        try:
+            resolver.update(host, port, self._resolve(host, port))
+        except socket.gaierror as e:
+            self.logger.warning(
+                "Cannot resolve %s, using its last addresses: %s", host, e
+            )
+            resolver.failed(host, port)
+        finally:
+            resolver.refreshing.discard((host, port))
+
+    def _cached_addresses(
+        self, host: str, port: int
+    ) -> Optional[List[Tuple[str, int]]]:
+        """Returns the cached addresses of a host, refreshing them in the
+        background when they expired"""
+        resolver = self._resolver
+        if resolver is None:
+            return None
+        addresses, due = resolver.get(host, port)
+        if due:
+            resolver.refreshing.add((host, port))
+            self.handler.spawn(self._refresh, host, port)
+        return addresses
+
+    def _addresses(self, host, port):
+        """Returns the addresses of a host, none if it doesn't resolve"""
+        addresses = self._cached_addresses(host, port)
+        if addresses is None:
+            try:
+                addresses = self._resolve(host, port)
+            except socket.gaierror:
+                addresses = []
+        return addresses
+
     def _expand_client_hosts(self):
         # Expand the entire list in advance so we can randomize it if needed
         host_ports = []
         for host, port in self.client.hosts:
-            try:
-                host = host.strip()
-                for rhost in socket.getaddrinfo(
-                    host, port, 0, 0, socket.IPPROTO_TCP
-                ):
-                    host_ports.append((host, rhost[4][0], rhost[4][1]))
-            except socket.gaierror as e:
-                # Skip hosts that don't resolve
-                self.logger.warning("Cannot resolve %s: %s", host, e)
-                pass
+            host = host.strip()
+            addresses = self._cached_addresses(host, port)
+            if addresses is None:
+                try:
+                    addresses = self._resolve(host, port)
+                except socket.gaierror as e:
+                    # Skip hosts that don't resolve
+                    self.logger.warning("Cannot resolve %s: %s", host, e)
+                    continue
+                if self._resolver is not None:
+                    self._resolver.update(host, port, addresses)
+            host_ports.extend((host, ip, rport) for ip, rport in addresses)
         if self.client.randomize_hosts:
             random.shuffle(host_ports)
         return host_ports
@@ -574,26 +1198,97 @@ class ConnectionHandler(object):
     def _connect_loop(self, retry):
         # Iterate through the hosts a full cycle before starting over
         status = None
-        host_ports = self._expand_client_hosts()
+        host_ports = self._order_hosts(self._expand_client_hosts())
 
         # Check for an empty hostlist, indicating none resolved
         if len(host_ports) == 0:
             raise ForceRetryError("No host resolved. Reconnecting")
 
-        for host, hostip, port in host_ports:
+        racing = self.client.connect_attempt_delay is not None
+        while host_ports:
             if self.client._stopped.is_set():
                 status = STOP_CONNECTING
                 break
-            status = self._connect_attempt(host, hostip, port, retry)
+            sock = None
+            if racing and not self._rw_server:
+                raced = self._race_connect(host_ports)
+                if raced is None:
+                    break
+                (host, hostip, port), sock = raced
+                host_ports.remove((host, hostip, port))
+            else:
+                host, hostip, port = host_ports.pop(0)
+            status = self._connect_attempt(host, hostip, port, retry, sock)
             if status is STOP_CONNECTING:
                 break
+            if self._next_server is not None:
+                # Start over from the server to move to
+                host_ports = self._order_hosts(self._expand_client_hosts())
 
         if status is STOP_CONNECTING:
             return STOP_CONNECTING
         else:
             raise ForceRetryError("Reconnecting")
 
-    def _connect_attempt(self, host, hostip, port, retry):
+    def _race_connect(self, host_ports):
+        """Connect to the first of `host_ports` to accept a connection
+
+        The attempt to connect to the next host starts after
+        `connect_attempt_delay` seconds, or as soon as the previous one
+        fails, without waiting for those in progress. The connections
+        established after the first are closed.
+
+        :returns: The (host, hostip, port) tuple and the socket of the
+                  first connection, or `None` if they all failed.
+
+        """
+        handler = self.handler
+        delay = self.client.connect_attempt_delay
+        results = handler.queue_impl()
+        lock = handler.lock_object()
+        won = []
+
+        def attempt(host_port):
+            try:
+                sock = self._create_connection(host_port[1], host_port[2])
+            except Exception as exc:
+                results.put((host_port, None, exc))
+                return
+            with lock:
+                if not won:
+                    results.put((host_port, sock, None))
+                    return
+            sock.close()
+
+        pending = list(host_ports)
+        running = 0
+        try:
+            while pending or running:
+                if pending:
+                    handler.spawn(attempt, pending.pop(0))
+                    running += 1
+                try:
+                    host_port, sock, exc = results.get(
+                        timeout=delay if pending else None
+                    )
+                except handler.queue_empty:
+                    continue
+                running -= 1
+                if sock is not None:
+                    return host_port, sock
+                self.logger.warning(
+                    "Cannot connect to %s(%s):%s: %s", *(host_port + (exc,))
+                )
+            return None
+        finally:
+            with lock:
+                won.append(True)
+            while not results.empty():
+                sock = results.get()[1]
+                if sock is not None:
+                    sock.close()
+
+    def _connect_attempt(self, host, hostip, port, retry, sock=None):
         client = self.client
         KazooTimeoutError = self.handler.timeout_exception
 
@@ -607,15 +1302,22 @@ class ConnectionHandler(object):
             host, port = self._rw_server
             self._rw_server = None
 
-        if client._state != KeeperState.CONNECTING:
+        if client._state != KeeperState.CONNECTING and not self._migrating:
             client._session_callback(KeeperState.CONNECTING)
 
         try:
             self._xid = 0
-            read_timeout, connect_timeout = self._connect(host, hostip, port)
+            try:
+                read_timeout, connect_timeout = self._connect(
+                    host, hostip, port, sock
+                )
+            finally:
+                self._migrating = False
             read_timeout = read_timeout / 1000.0
             connect_timeout = connect_timeout / 1000.0
             retry.reset()
+            self._server = (host, port)
+            self._address = (hostip, port)
             self.ping_outstanding.clear()
             last_send = time.monotonic()
             with self._socket_error_handling():
@@ -676,14 +1378,114 @@ class ConnectionHandler(object):
             retry.reset()
             self.logger.warning("Found a RW server, dropping connection")
             client._session_callback(KeeperState.CONNECTING)
+        except ServerMigration as e:
+            retry.reset()
+            self.logger.info("Moving session, %s", e)
+            self._migrating = True
         except Exception:
             self.logger.exception("Unhandled exception in connection loop")
             raise
         finally:
+            self._server = self._address = None
             if self._socket is not None:
+                self._save_ssl_session(hostip, port, self._socket)
                 self._socket.close()
 
-    def _connect(self, host, hostip, port):
+    def _get_ssl_context(self) -> "ssl.SSLContext":
+        """Returns the SSL context of the client, created once"""
+        if self._ssl_context is None:
+            client = self.client
+            self._ssl_context = create_ssl_context(
+                ca=client.ca,
+                certfile=client.certfile,
+                keyfile=client.keyfile,
+                keyfile_password=client.keyfile_password,
+                verify_certs=client.verify_certs,
+            )
+        return self._ssl_context
+
+    def _save_ssl_session(self, hostip, port, sock):
+        """Keep the SSL session of a connection to resume it when
+        connecting to the same server again"""
+        # Read once the connection is used, when the session tickets of
+        # TLS 1.3 have been received
+        session = getattr(sock, "session", None)
+        if session is not None:
+            self._ssl_sessions[(hostip, port)] = session
+
+    def _create_connection(self, hostip, port):
+        client = self.client
+        kwargs = {}
+        if client.use_ssl:
+            kwargs = dict(
+                ssl_context=self._get_ssl_context(),
+                ssl_session=self._ssl_sessions.get((hostip, port)),
+            )
+        with self._socket_error_handling():
+            return self.handler.create_connection(
+                address=(hostip, port),
+                timeout=client._session_timeout / 1000.0,
+                use_ssl=client.use_ssl,
+                keyfile=client.keyfile,
+                certfile=client.certfile,
+                ca=client.ca,
+                keyfile_password=client.keyfile_password,
+                verify_certs=client.verify_certs,
+                **kwargs,
+            )
+
+    def _command(self, host, port, cmd):
+        """Send a four letter word command to a server and return its
+        response"""
+        sock = self._create_connection(host, port)
+        with self._socket_error_handling():
+            return send_command(sock, cmd)
+
+    def _set_watches_requests(self) -> List[SetWatches]:
+        """Returns the SetWatches requests restoring the watches of the
+        client"""
+        client = self.client
+        data_paths = list(client._data_watchers)
+        child_paths = list(client._child_watchers)
+        self._exist_watches.intersection_update(data_paths)
+        exist = self._exist_watches
+        watches = [
+            (0 if path not in exist else 1, path) for path in data_paths
+        ]
+        watches.extend((2, path) for path in child_paths)
+
+        requests = []
+        batch, length = ([], [], []), 0
+        for kind, path in watches:
+            if length + len(path) > SET_WATCHES_MAX_LENGTH and length:
+                requests.append(SetWatches(client.last_zxid, *batch))
+                batch, length = ([], [], []), 0
+            batch[kind].append(path)
+            length += len(path)
+        if length:
+            requests.append(SetWatches(client.last_zxid, *batch))
+        return requests
+
+    def _set_watches(self, timeout):
+        """Restore the watches of the session on a new server, reading
+        the events of those already triggered"""
+        for request in self._set_watches_requests():
+            self._submit(request, timeout, SET_WATCHES_XID)
+            while True:
+                header, buffer, offset = self._read_header(timeout)
+                if header.xid == WATCH_XID:
+                    self._read_watch_event(buffer, offset)
+                    continue
+                if header.xid != SET_WATCHES_XID:
+                    raise RuntimeError(
+                        "xids do not match, expected %r received %r"
+                        % (SET_WATCHES_XID, header.xid)
+                    )
+                if header.err:
+                    raise EXCEPTIONS[header.err]()
+                break
+
+    def _connect(self, host, hostip, port, sock=None):
         client = self.client
         self.logger.info(
             "Connecting to %s(%s):%s, use_ssl: %r",
@@ -700,18 +1502,9 @@ class ConnectionHandler(object):
             hexlify(client._session_passwd),
         )
 
-        with self._socket_error_handling():
-            self._socket = self.handler.create_connection(
-                address=(hostip, port),
-                timeout=client._session_timeout / 1000.0,
-                use_ssl=self.client.use_ssl,
-                keyfile=self.client.keyfile,
-                certfile=self.client.certfile,
-                ca=self.client.ca,
-                keyfile_password=self.client.keyfile_password,
-                verify_certs=self.client.verify_certs,
-            )
-
+        if sock is None:
+            sock = self._create_connection(hostip, port)
+        self._socket = sock
         self._socket.setblocking(0)
 
         connect = Connect(
@@ -774,11 +1567,17 @@ class ConnectionHandler(object):
             if zxid:
                 client.last_zxid = zxid
 
+        if self._migrating:
+            self._set_watches(connect_timeout / 1000.0)
+
         return read_timeout, connect_timeout
 
     def _authenticate_with_sasl(self, host, timeout):
         """Establish a SASL authenticated connection to the server."""
-        if not PURESASL_AVAILABLE:
+        try:
+            import puresasl
+            import puresasl.client
+        except ImportError:
             raise SASLException("Missing SASL support")
 
         if "service" not in self.sasl_options:
@@ -1,9 +1,10 @@
 """Zookeeper Serializers, Deserializers, and NamedTuple objects"""
 from collections import namedtuple
 import struct
+from typing import Optional
 
 from kazoo.exceptions import EXCEPTIONS
-from kazoo.protocol.states import ZnodeStat
+from kazoo.protocol.states import LazyZnodeStat, ZnodeStat
 from kazoo.security import ACL
 from kazoo.security import Id
 
@@ -20,6 +21,10 @@ multiheader_struct = struct.Struct("!iBi")
 reply_header_struct = struct.Struct("!iqi")
 stat_struct = struct.Struct("!qqqqiiiqiiq")
 
+# Values below this size are copied into the frame, as a single send
+# is cheaper than a scatter/gather one for them
+SCATTER_THRESHOLD = 16 * 1024
+
 
 def read_string(buffer, offset):
     """Reads an int specified buffer into a string and returns the
@@ -34,6 +39,16 @@ def read_string(buffer, offset):
         return buffer[index : index + length].decode("utf-8"), offset
 
 
+def read_stat(bytes, offset):
+    return ZnodeStat._make(stat_struct.unpack_from(bytes, offset))
+
+
+def read_lazy_stat(buffer, offset):
+    """Reads a :class:`~kazoo.protocol.states.LazyZnodeStat`, copying the
+    serialized stat out of `buffer`"""
+    return LazyZnodeStat(bytes(buffer[offset : offset + stat_struct.size]))
+
+
 def read_acl(bytes, offset):
     perms = int_struct.unpack_from(bytes, offset)[0]
     offset += int_struct.size
@@ -42,7 +57,7 @@ def read_acl(bytes, offset):
     return ACL(perms, Id(scheme, id)), offset
 
 
-def write_string(bytes):
+def write_string(bytes: Optional[str]) -> bytes:
     if not bytes:
         return int_struct.pack(-1)
     else:
@@ -50,13 +65,40 @@ def write_string(bytes):
         return int_struct.pack(len(utf8_str)) + utf8_str
 
 
-def write_buffer(bytes):
+def write_buffer(bytes: Optional[bytes]) -> bytes:
     if bytes is None:
         return int_struct.pack(-1)
     else:
         return int_struct.pack(len(bytes)) + bytes
 
 
+def write_buffers(head, bytes, tail):
+    """Returns the buffers of `head`, the buffer `bytes` and `tail`,
+    referencing `bytes` instead of copying it unless it is smaller than
+    :data:`SCATTER_THRESHOLD`"""
+    if bytes is None:
+        return [head + int_struct.pack(-1) + tail]
+    head += int_struct.pack(len(bytes))
+    if len(bytes) < SCATTER_THRESHOLD:
+        head += bytes
+        head += tail
+        return [head]
+    return [head, bytes, tail]
+
+
+def write_acl_flags(acl, flags):
+    """Returns the serialized ACL and flags ending a create"""
+    b = bytearray(int_struct.pack(len(acl)))
+    for entry in acl:
+        b.extend(
+            int_struct.pack(entry.perms)
+            + write_string(entry.id.scheme)
+            + write_string(entry.id.id)
+        )
+    b.extend(int_struct.pack(flags))
+    return b
+
+
 def read_buffer(bytes, offset):
     length = int_struct.unpack_from(bytes, offset)[0]
     offset += int_struct.size
@@ -136,24 +178,60 @@ class Create(namedtuple("Create", "path data acl flags")):
     type = 1
 
     def serialize(self):
-        b = bytearray()
-        b.extend(write_string(self.path))
-        b.extend(write_buffer(self.data))
-        b.extend(int_struct.pack(len(self.acl)))
-        for acl in self.acl:
-            b.extend(
-                int_struct.pack(acl.perms)
-                + write_string(acl.id.scheme)
-                + write_string(acl.id.id)
-            )
-        b.extend(int_struct.pack(self.flags))
-        return b
+        return bytearray().join(self.serialize_buffers())
+
+    def serialize_buffers(self):
+        return write_buffers(
+            bytearray(write_string(self.path)),
+            self.data,
+            write_acl_flags(self.acl, self.flags),
+        )
 
     @classmethod
     def deserialize(cls, bytes, offset):
         return read_string(bytes, offset)[0]
 
 
+class CreateTemplate(object):
+    """The serialized path prefix, ACL and flags shared by the creates
+    of :class:`CreateFromTemplate`"""
+
+    def __init__(self, prefix, acl, flags, include_data=False):
+        self.prefix = prefix
+        self.request_class = Create2 if include_data else Create
+        self._prefix = prefix.encode("utf-8")
+        self._tail = bytes(write_acl_flags(acl, flags))
+
+
+class CreateFromTemplate(
+    namedtuple("CreateFromTemplate", "template suffix data")
+):
+    """A :class:`Create` of the node ``template.prefix + suffix``, only
+    serializing the suffix and the data"""
+
+    @property
+    def type(self):
+        return self.template.request_class.type
+
+    @property
+    def path(self):
+        return self.template.prefix + self.suffix
+
+    def serialize(self):
+        return bytearray().join(self.serialize_buffers())
+
+    def serialize_buffers(self):
+        template = self.template
+        suffix = self.suffix.encode("utf-8")
+        b = bytearray(int_struct.pack(len(template._prefix) + len(suffix)))
+        b += template._prefix
+        b += suffix
+        return write_buffers(b, self.data, template._tail)
+
+    def deserialize(self, bytes, offset):
+        return self.template.request_class.deserialize(bytes, offset)
+
+
 class Delete(namedtuple("Delete", "path version")):
     type = 2
 
@@ -178,8 +256,8 @@ class Exists(namedtuple("Exists", "path watcher")):
         return b
 
     @classmethod
-    def deserialize(cls, bytes, offset):
-        stat = ZnodeStat._make(stat_struct.unpack_from(bytes, offset))
+    def deserialize(cls, bytes, offset, read_stat=read_stat):
+        stat = read_stat(bytes, offset)
         return stat if stat.czxid != -1 else None
 
 
@@ -193,25 +271,41 @@ class GetData(namedtuple("GetData", "path watcher")):
         return b
 
     @classmethod
-    def deserialize(cls, bytes, offset):
+    def deserialize(cls, bytes, offset, read_stat=read_stat):
         data, offset = read_buffer(bytes, offset)
-        stat = ZnodeStat._make(stat_struct.unpack_from(bytes, offset))
+        stat = read_stat(bytes, offset)
         return data, stat
 
 
+class GetDataView(GetData):
+    """A :class:`GetData` returning the data as a read-only
+    :class:`memoryview` of the response frame"""
+
+    __slots__ = ()
+    read_into = True
+
+    @classmethod
+    def deserialize(cls, bytes, offset, read_stat=read_stat):
+        view = memoryview(bytes).toreadonly()
+        return GetData.deserialize(view, offset, read_stat)
+
+
 class SetData(namedtuple("SetData", "path data version")):
     type = 5
 
     def serialize(self):
-        b = bytearray()
-        b.extend(write_string(self.path))
-        b.extend(write_buffer(self.data))
-        b.extend(int_struct.pack(self.version))
-        return b
+        return bytearray().join(self.serialize_buffers())
+
+    def serialize_buffers(self):
+        return write_buffers(
+            bytearray(write_string(self.path)),
+            self.data,
+            int_struct.pack(self.version),
+        )
 
     @classmethod
-    def deserialize(cls, bytes, offset):
-        return ZnodeStat._make(stat_struct.unpack_from(bytes, offset))
+    def deserialize(cls, bytes, offset, read_stat=read_stat):
+        return read_stat(bytes, offset)
 
 
 class GetACL(namedtuple("GetACL", "path")):
@@ -231,7 +325,7 @@ class GetACL(namedtuple("GetACL", "path")):
         for c in range(count):
             acl, offset = read_acl(bytes, offset)
             acls.append(acl)
-        stat = ZnodeStat._make(stat_struct.unpack_from(bytes, offset))
+        stat = read_stat(bytes, offset)
         return acls, stat
 
 
@@ -253,7 +347,7 @@ class SetACL(namedtuple("SetACL", "path acls version")):
 
     @classmethod
     def deserialize(cls, bytes, offset):
-        return ZnodeStat._make(stat_struct.unpack_from(bytes, offset))
+        return read_stat(bytes, offset)
 
 
 class GetChildren(namedtuple("GetChildren", "path watcher")):
@@ -300,7 +394,7 @@ class GetChildren2(namedtuple("GetChildren2", "path watcher")):
         return b
 
     @classmethod
-    def deserialize(cls, bytes, offset):
+    def deserialize(cls, bytes, offset, read_stat=read_stat):
         count = int_struct.unpack_from(bytes, offset)[0]
         offset += int_struct.size
         if count == -1:  # pragma: nocover
@@ -310,7 +404,7 @@ class GetChildren2(namedtuple("GetChildren2", "path watcher")):
         for c in range(count):
             child, offset = read_string(bytes, offset)
             children.append(child)
-        stat = ZnodeStat._make(stat_struct.unpack_from(bytes, offset))
+        stat = read_stat(bytes, offset)
         return children, stat
 
 
@@ -346,9 +440,7 @@ class Transaction(namedtuple("Transaction", "operations")):
             elif header.type == Delete.type:
                 response = True
             elif header.type == SetData.type:
-                response = ZnodeStat._make(
-                    stat_struct.unpack_from(bytes, offset)
-                )
+                response = read_stat(bytes, offset)
                 offset += stat_struct.size
             elif header.type == CheckVersion.type:
                 response = True
@@ -376,23 +468,19 @@ class Create2(namedtuple("Create2", "path data acl flags")):
     type = 15
 
     def serialize(self):
-        b = bytearray()
-        b.extend(write_string(self.path))
-        b.extend(write_buffer(self.data))
-        b.extend(int_struct.pack(len(self.acl)))
-        for acl in self.acl:
-            b.extend(
-                int_struct.pack(acl.perms)
-                + write_string(acl.id.scheme)
-                + write_string(acl.id.id)
-            )
-        b.extend(int_struct.pack(self.flags))
-        return b
+        return bytearray().join(self.serialize_buffers())
+
+    def serialize_buffers(self):
+        return write_buffers(
+            bytearray(write_string(self.path)),
+            self.data,
+            write_acl_flags(self.acl, self.flags),
+        )
 
     @classmethod
     def deserialize(cls, bytes, offset):
         path, offset = read_string(bytes, offset)
-        stat = ZnodeStat._make(stat_struct.unpack_from(bytes, offset))
+        stat = read_stat(bytes, offset)
         return path, stat
 
 
@@ -412,7 +500,7 @@ class Reconfig(
     @classmethod
     def deserialize(cls, bytes, offset):
         data, offset = read_buffer(bytes, offset)
-        stat = ZnodeStat._make(stat_struct.unpack_from(bytes, offset))
+        stat = read_stat(bytes, offset)
         return data, stat
 
 
@@ -427,6 +515,27 @@ class Auth(namedtuple("Auth", "auth_type scheme auth")):
         )
 
 
+class SetWatches(
+    namedtuple(
+        "SetWatches", "relative_zxid data_watches exist_watches child_watches"
+    )
+):
+    type = 101
+
+    def serialize(self):
+        b = bytearray()
+        b.extend(long_struct.pack(self.relative_zxid))
+        for paths in (
+            self.data_watches,
+            self.exist_watches,
+            self.child_watches,
+        ):
+            b.extend(int_struct.pack(len(paths)))
+            for path in paths:
+                b.extend(write_string(path))
+        return b
+
+
 class SASL(namedtuple("SASL", "challenge")):
     type = 102
 
@@ -1,5 +1,6 @@
 """Kazoo State and Event objects"""
 from collections import namedtuple
+import struct
 
 
 class KazooState(object):
@@ -251,3 +252,96 @@ class ZnodeStat(
     @property
     def children_count(self):
         return self.numChildren
+
+
+class _StatField(object):
+    """A field of a :class:`LazyZnodeStat`, decoded when accessed"""
+
+    __slots__ = ("_unpack_from", "_offset")
+
+    def __init__(self, format, offset):
+        self._unpack_from = struct.Struct(format).unpack_from
+        self._offset = offset
+
+    def __get__(self, stat, owner):
+        if stat is None:
+            return self
+        return self._unpack_from(stat._data, self._offset)[0]
+
+
+class LazyZnodeStat(object):
+    """A :class:`ZnodeStat` decoding its fields when accessed
+
+    It keeps the serialized Stat structure and only decodes the fields
+    that are used, so that responses whose stat is ignored, or only
+    checked for its version, are cheaper to build and to keep.
+
+    It has the same attributes as :class:`ZnodeStat`, compares equal to
+    the :class:`ZnodeStat` of the same values and can be unpacked or
+    indexed like one. It is not a tuple however, :meth:`decode` returns
+    the equivalent :class:`ZnodeStat`.
+
+    """
+
+    __slots__ = ("_data", "_stat")
+
+    _struct = struct.Struct("!qqqqiiiqiiq")
+    _fields = ZnodeStat._fields
+
+    czxid = _StatField("!q", 0)
+    mzxid = _StatField("!q", 8)
+    ctime = _StatField("!q", 16)
+    mtime = _StatField("!q", 24)
+    version = _StatField("!i", 32)
+    cversion = _StatField("!i", 36)
+    aversion = _StatField("!i", 40)
+    ephemeralOwner = _StatField("!q", 44)
+    dataLength = _StatField("!i", 52)
+    numChildren = _StatField("!i", 56)
+    pzxid = _StatField("!q", 60)
+
+    def __init__(self, data):
+        self._data = data
+        self._stat = None
+
+    def decode(self):
+        """Returns the :class:`ZnodeStat` of all the fields"""
+        if self._stat is None:
+            self._stat = ZnodeStat._make(self._struct.unpack(self._data))
+        return self._stat
+
+    def _asdict(self):
+        return self.decode()._asdict()
+
+    def __iter__(self):
+        return iter(self.decode())
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __getitem__(self, index):
+        return self.decode()[index]
+
+    def __eq__(self, other):
+        if isinstance(other, LazyZnodeStat):
+            return self._data == other._data
+        return self.decode() == other
+
+    def __hash__(self):
+        return hash(self.decode())
+
+    def __repr__(self):
+        return repr(self.decode())
+
+    def __reduce__(self):
+        return (LazyZnodeStat, (self._data,))
+
+    acl_version = ZnodeStat.acl_version
+    children_version = ZnodeStat.children_version
+    created = ZnodeStat.created
+    last_modified = ZnodeStat.last_modified
+    owner_session_id = ZnodeStat.owner_session_id
+    creation_transaction_id = ZnodeStat.creation_transaction_id
+    last_modified_transaction_id = ZnodeStat.last_modified_transaction_id
+    data_length = ZnodeStat.data_length
+    children_count = ZnodeStat.children_count
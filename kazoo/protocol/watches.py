@@ -0,0 +1,142 @@
+"""Compact registry of the watch callbacks left on znodes"""
+import sys
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+    Union,
+)
+
+from kazoo.protocol.states import WatchedEvent
+
+
+Watcher = Callable[[WatchedEvent], object]
+_Slot = Union[Watcher, Set[Watcher]]
+
+
+class WatchRegistry(object):
+    """A mapping of znode paths to the watch callbacks set on them
+
+    Most watched paths only ever carry a single callback, so a slot
+    holds the callback itself and is only promoted to a :class:`set`
+    once a second, distinct callback is added for the same path.
+    Paths are interned so the data and child registries, as well as
+    repeated requests for the same node, share a single string.
+
+    The registry is not a general purpose mapping. Reading a missing
+    path never creates a slot, and :meth:`reset` detaches the current
+    slots so they can be walked without building a copy of every
+    registered watcher.
+
+    """
+
+    __slots__ = ("_slots",)
+
+    def __init__(self) -> None:
+        self._slots: Dict[str, _Slot] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, path: object) -> bool:
+        return path in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._slots)
+
+    def __getitem__(self, path: str) -> Set[Watcher]:
+        """Return a :class:`set` copy of the callbacks watching `path`"""
+        slot = self._slots.get(path)
+        if slot is None:
+            return set()
+        elif isinstance(slot, set):
+            return set(slot)
+        return {slot}
+
+    def add(self, path: str, watcher: Watcher) -> None:
+        """Register `watcher` for `path`"""
+        slots = self._slots
+        slot = slots.get(path)
+        if slot is None:
+            slots[sys.intern(path)] = watcher
+        elif isinstance(slot, set):
+            slot.add(watcher)
+        elif slot != watcher:
+            slots[path] = {slot, watcher}
+
+    def discard(self, path: str, watcher: Watcher) -> None:
+        """Remove `watcher` from `path` if it is present"""
+        slots = self._slots
+        slot = slots.get(path)
+        if slot is None:
+            return
+        elif isinstance(slot, set):
+            slot.discard(watcher)
+            if len(slot) == 1:
+                slots[path] = next(iter(slot))
+            elif not slot:
+                del slots[path]
+        elif slot == watcher:
+            del slots[path]
+
+    def get(
+        self, path: str, default: Optional[Iterable[Watcher]] = None
+    ) -> Optional[Iterable[Watcher]]:
+        """Return the callbacks watching `path` as an iterable, or
+        `default` when there are none"""
+        slot = self._slots.get(path)
+        if slot is None:
+            return default
+        elif isinstance(slot, set):
+            return slot
+        return (slot,)
+
+    def pop(
+        self, path: str, default: Iterable[Watcher] = ()
+    ) -> Iterable[Watcher]:
+        """Remove and return the callbacks watching `path` as an
+        iterable, or `default` when there are none"""
+        slot = self._slots.pop(path, None)
+        if slot is None:
+            return default
+        elif isinstance(slot, set):
+            return slot
+        return (slot,)
+
+    def reset(self) -> Iterator[Watcher]:
+        """Drop every slot and return an iterator over the callbacks
+        that were registered.
+
+        The slots are detached before iterating, so callbacks added
+        while the iterator is consumed land in the emptied registry.
+
+        """
+        slots, self._slots = self._slots, {}
+        return _iter_watchers(slots)
+
+    def memory_usage(self) -> int:
+        """Return the approximate number of bytes held by the registry
+
+        This accounts for the path strings, the mapping and the
+        promoted callback sets but not the callbacks themselves, which
+        are owned by whoever registered them.
+
+        """
+        getsizeof = sys.getsizeof
+        total = getsizeof(self._slots)
+        for path, slot in self._slots.items():
+            total += getsizeof(path)
+            if isinstance(slot, set):
+                total += getsizeof(slot)
+        return total
+
+
+def _iter_watchers(slots: Dict[str, _Slot]) -> Iterator[Watcher]:
+    for slot in slots.values():
+        if isinstance(slot, set):
+            yield from slot
+        else:
+            yield slot
@@ -16,6 +16,7 @@ import contextlib
 import functools
 import logging
 import operator
+from typing import Callable, Optional, TypeVar
 
 from kazoo.exceptions import NoNodeError, KazooException
 from kazoo.protocol.paths import _prefix_root, join as kazoo_join
@@ -23,6 +24,8 @@ from kazoo.protocol.states import KazooState, EventType
 
 logger = logging.getLogger(__name__)
 
+_F = TypeVar("_F", bound=Callable[..., object])
+
 
 class TreeCache(object):
     """The cache of a ZooKeeper subtree.
@@ -37,7 +40,7 @@ class TreeCache(object):
 
     _STOP = object()
 
-    def __init__(self, client, path):
+    def __init__(self, client, path) -> None:
         self._client = client
         self._root = TreeNode.make_root(self, path)
         self._state = self.STATE_LATENT
@@ -46,7 +49,7 @@ class TreeCache(object):
         self._error_listeners = []
         self._event_listeners = []
         self._task_queue = client.handler.queue_impl()
-        self._task_thread = None
+        self._task_thread: object = None
 
     def start(self):
         """Starts the cache.
@@ -85,7 +88,7 @@ class TreeCache(object):
             # without lock.
             self._in_background(self._root.on_created)
 
-    def close(self):
+    def close(self) -> None:
         """Closes the cache.
 
         A closed cache was detached from ZooKeeper's changes. And all nodes
@@ -109,7 +112,7 @@ class TreeCache(object):
                 #    ZooKeeper actually.
                 self._root.on_deleted()
 
-    def listen(self, listener):
+    def listen(self, listener: _F) -> _F:
         """Registers a function to listen the cache events.
 
         The cache events are changes of local data. They are delivered from
@@ -124,7 +127,7 @@ class TreeCache(object):
         self._event_listeners.append(listener)
         return listener
 
-    def listen_fault(self, listener):
+    def listen_fault(self, listener: _F) -> _F:
         """Registers a function to listen the exceptions.
 
         It is possible to meet some exceptions during the cache running. You
@@ -138,7 +141,7 @@ class TreeCache(object):
         self._error_listeners.append(listener)
         return listener
 
-    def get_data(self, path, default=None):
+    def get_data(self, path, default=None) -> "Optional[NodeData]":
         """Gets data of a node from cache.
 
         :param path: The absolute path string.
@@ -185,7 +188,7 @@ class TreeCache(object):
             with handle_exception(self._error_listeners):
                 listener(event)
 
-    def _in_background(self, func, *args, **kwargs):
+    def _in_background(self, func, *args, **kwargs) -> None:
         self._task_queue.put((func, args, kwargs))
 
     def _do_background(self):
@@ -285,8 +288,7 @@ class TreeNode(object):
         client = self._tree._client
         for _watchers in (client._data_watchers, client._child_watchers):
             _path = _prefix_root(client.chroot, self._path)
-            _watcher = _watchers.get(_path, set())
-            _watcher.discard(self._process_watch)
+            _watchers.discard(_path, self._process_watch)
 
     def _refresh(self):
         self._refresh_data()
@@ -16,6 +16,7 @@ and/or the lease has been lost.
 """
 import re
 import time
+from typing import List, Optional
 import uuid
 
 from kazoo.exceptions import (
@@ -77,7 +78,9 @@ class Lock(object):
     # sequence number. Involved in read/write locks.
     _EXCLUDE_NAMES = ["__lock__"]
 
-    def __init__(self, client, path, identifier=None, extra_lock_patterns=()):
+    def __init__(
+        self, client, path, identifier=None, extra_lock_patterns=()
+    ) -> None:
         """Create a Kazoo lock.
 
         :param client: A :class:`~kazoo.client.KazooClient` instance.
@@ -109,7 +112,7 @@ class Lock(object):
         # some data is written to the node. this can be queried via
         # contenders() to see who is contending for the lock
         self.data = str(identifier or "").encode("utf-8")
-        self.node = None
+        self.node: Optional[str] = None
 
         self.wake_event = client.handler.event_object()
 
@@ -275,8 +278,14 @@ class Lock(object):
         (e.g. rlock), this and also edge cases where the lock's ephemeral node
         is gone.
         """
-        node_sequence = node[len(self.prefix) :]
         children = self.client.get_children(self.path)
+        return self._select_predecessor(node, children)
+
+    def _select_predecessor(
+        self, node: str, children: List[str]
+    ) -> Optional[str]:
+        """returns `node`'s predecessor among `children` or None"""
+        node_sequence = node[len(self.prefix) :]
         found_self = False
         # Filter out the contenders using the computed regex
         contender_matches = []
@@ -358,6 +367,20 @@ class Lock(object):
             self._ensure_path()
 
         children = self.client.get_children(self.path)
+        # Retrieve all the contender nodes data (preserving order).
+        contenders = []
+        for node in self._contender_nodes(children):
+            try:
+                data, stat = self.client.get(self.path + "/" + node)
+                if data is not None:
+                    contenders.append(data.decode("utf-8"))
+            except NoNodeError:  # pragma: nocover
+                pass
+
+        return contenders
+
+    def _contender_nodes(self, children: List[str]) -> List[str]:
+        """returns the contender nodes among `children`, in order"""
         # We want all contenders, including self (this is especially important
         # for r/w locks). This is similar to the logic of `_get_predecessor`
         # except we include our own pattern.
@@ -374,21 +397,10 @@ class Lock(object):
                 contender_matches.append(match)
         # Sort the contenders using the sequence number extracted by the regex,
         # then extract the original string.
-        contender_nodes = [
+        return [
             match.string
             for match in sorted(contender_matches, key=lambda m: m.groups())
         ]
-        # Retrieve all the contender nodes data (preserving order).
-        contenders = []
-        for node in contender_nodes:
-            try:
-                data, stat = self.client.get(self.path + "/" + node)
-                if data is not None:
-                    contenders.append(data.decode("utf-8"))
-            except NoNodeError:  # pragma: nocover
-                pass
-
-        return contenders
 
     def __enter__(self):
         self.acquire()
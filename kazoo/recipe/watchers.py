@@ -13,6 +13,7 @@
 from functools import partial, wraps
 import logging
 import time
+from typing import List, Optional, TypeVar
 import warnings
 
 from kazoo.exceptions import ConnectionClosedError, NoNodeError, KazooException
@@ -24,6 +25,7 @@ log = logging.getLogger(__name__)
 
 
 _STOP_WATCHING = object()
+_F = TypeVar("_F")
 
 
 def _ignore_closed(func):
@@ -88,7 +90,7 @@ class DataWatch(object):
 
     """
 
-    def __init__(self, client, path, func=None, *args, **kwargs):
+    def __init__(self, client, path, func=None, *args, **kwargs) -> None:
         """Create a data watcher for a path
 
         :param client: A zookeeper client.
@@ -132,7 +134,7 @@ class DataWatch(object):
             self._client.add_listener(self._session_watcher)
             self._get_data()
 
-    def __call__(self, func):
+    def __call__(self, func: _F) -> _F:
         """Callable version for use as a decorator
 
         :param func: Function to call initially and every time the
@@ -258,7 +260,7 @@ class ChildrenWatch(object):
         func=None,
         allow_session_lost=True,
         send_event=False,
-    ):
+    ) -> None:
         """Create a children watcher for a path
 
         :param client: A zookeeper client.
@@ -290,7 +292,7 @@ class ChildrenWatch(object):
         self._watch_established = False
         self._allow_session_lost = allow_session_lost
         self._run_lock = client.handler.lock_object()
-        self._prior_children = None
+        self._prior_children: Optional[List[str]] = None
         self._used = False
 
         # Register our session listener if we're going to resume
@@ -301,7 +303,7 @@ class ChildrenWatch(object):
                 self._client.add_listener(self._session_watcher)
             self._get_children()
 
-    def __call__(self, func):
+    def __call__(self, func: _F) -> _F:
         """Callable version for use as a decorator
 
         :param func: Function to call initially and every time the
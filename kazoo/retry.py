@@ -127,27 +127,12 @@ class KazooRetry(object):
 
         while True:
             try:
-                if self.deadline is not None and self._cur_stoptime is None:
-                    self._cur_stoptime = time.monotonic() + self.deadline
+                self._start()
                 return func(*args, **kwargs)
             except ConnectionClosedError:
                 raise
             except self.retry_exceptions:
-                # Note: max_tries == -1 means infinite tries.
-                if self._attempts == self.max_tries:
-                    raise RetryFailedError("Too many retry attempts")
-                self._attempts += 1
-                jitter = random.uniform(
-                    1.0 - self.max_jitter, 1.0 + self.max_jitter
-                )
-                sleeptime = self._cur_delay * jitter
-
-                if (
-                    self._cur_stoptime is not None
-                    and time.monotonic() + sleeptime >= self._cur_stoptime
-                ):
-                    raise RetryFailedError("Exceeded retry deadline")
-
+                sleeptime = self._backoff()
                 if self.interrupt:
                     remain_time = sleeptime
                     while remain_time > 0:
@@ -159,4 +144,56 @@ class KazooRetry(object):
                             raise InterruptedError()
                 else:
                     self.sleep_func(sleeptime)
-                self._cur_delay = min(sleeptime * self.backoff, self.max_delay)
+
+    async def acall(self, func, *args, **kwargs):
+        """Await a coroutine function with arguments until it completes
+        without throwing a Kazoo exception
+
+        Takes the same arguments as :meth:`__call__`, but waits between
+        attempts with :func:`asyncio.sleep` instead of the `sleep_func`.
+
+        """
+        import asyncio
+
+        self.reset()
+
+        while True:
+            try:
+                self._start()
+                return await func(*args, **kwargs)
+            except ConnectionClosedError:
+                raise
+            except self.retry_exceptions:
+                sleeptime = self._backoff()
+                if self.interrupt:
+                    remain_time = sleeptime
+                    while remain_time > 0:
+                        await asyncio.sleep(min(0.1, remain_time))
+                        remain_time -= 0.1
+                        if self.interrupt():
+                            raise InterruptedError()
+                else:
+                    await asyncio.sleep(sleeptime)
+
+    def _start(self):
+        if self.deadline is not None and self._cur_stoptime is None:
+            self._cur_stoptime = time.monotonic() + self.deadline
+
+    def _backoff(self):
+        """Count a failed attempt and return how long to wait before the
+        next one"""
+        # Note: max_tries == -1 means infinite tries.
+        if self._attempts == self.max_tries:
+            raise RetryFailedError("Too many retry attempts")
+        self._attempts += 1
+        jitter = random.uniform(1.0 - self.max_jitter, 1.0 + self.max_jitter)
+        sleeptime = self._cur_delay * jitter
+
+        if (
+            self._cur_stoptime is not None
+            and time.monotonic() + sleeptime >= self._cur_stoptime
+        ):
+            raise RetryFailedError("Exceeded retry deadline")
+
+        self._cur_delay = min(sleeptime * self.backoff, self.max_delay)
+        return sleeptime
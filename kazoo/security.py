@@ -1,7 +1,6 @@
 """Kazoo Security"""
 from base64 import b64encode
 from collections import namedtuple
-import hashlib
 
 
 # Represents a Zookeeper ID and ACL object
@@ -74,6 +73,8 @@ def make_digest_acl_credential(username, password):
         See: https://github.com/python-zk/kazoo/pull/584
 
     """
+    import hashlib
+
     credential = username.encode("utf-8") + b":" + password.encode("utf-8")
     cred_hash = b64encode(hashlib.sha1(credential).digest()).strip()
     return username + ":" + cred_hash.decode("utf-8")
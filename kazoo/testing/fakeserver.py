@@ -0,0 +1,1336 @@
+"""An in-memory ZooKeeper server speaking the client wire protocol
+
+The servers in this module implement enough of the ZooKeeper client
+protocol for :class:`~kazoo.client.KazooClient` and every recipe to run
+against them without a Java installation: sessions and their expiry,
+ephemeral and sequential nodes, one-shot watches, multi transactions,
+pings and the most common four letter word commands.
+
+Several :class:`FakeZooKeeperServer` instances can share a single
+:class:`DataTree` to stand in for a replicated ensemble. Sessions live
+in the tree, so a client can fail over from one member to another the
+way it would against a real ensemble.
+
+ACLs are stored and returned but never enforced, and every
+authentication request succeeds. SASL and TLS are not supported.
+
+Example::
+
+    cluster = FakeZooKeeperCluster(size=3)
+    cluster.start()
+    client = KazooClient(hosts=cluster.hosts)
+    client.start()
+
+    # Slow every request on the first member down by 5ms
+    cluster[0].latency = 0.005
+    # Drop every connection of the second member, keeping the sessions
+    cluster[1].drop_connections()
+
+"""
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
+
+from kazoo.exceptions import (
+    BadArgumentsError,
+    BadVersionError,
+    InvalidACLError,
+    NoChildrenForEphemeralsError,
+    NodeExistsError,
+    NoNodeError,
+    NotEmptyError,
+    NotReadOnlyCallError,
+    RuntimeInconsistency,
+    UnimplementedError,
+    ZookeeperError,
+)
+from kazoo.protocol.serialization import (
+    Auth,
+    CheckVersion,
+    Close,
+    Create,
+    Create2,
+    Delete,
+    Exists,
+    GetACL,
+    GetChildren,
+    GetChildren2,
+    GetData,
+    Ping,
+    Reconfig,
+    SetACL,
+    SetData,
+    SetWatches,
+    Sync,
+    Transaction,
+    int_int_long_struct,
+    int_int_struct,
+    int_long_int_long_struct,
+    int_struct,
+    long_struct,
+    multiheader_struct,
+    read_acl,
+    read_buffer,
+    read_string,
+    reply_header_struct,
+    stat_struct,
+    write_buffer,
+    write_string,
+)
+from kazoo.security import ACL, OPEN_ACL_UNSAFE
+
+log = logging.getLogger(__name__)
+
+FAKE_VERSION = "3.9.0-kazoo-fake"
+
+WATCH_XID = -1
+PING_XID = -2
+AUTH_XID = -4
+
+CREATED_EVENT = 1
+DELETED_EVENT = 2
+CHANGED_EVENT = 3
+CHILD_EVENT = 4
+SYNC_CONNECTED = 3
+
+EPHEMERAL = 1
+SEQUENCE = 2
+
+# Default jute.maxbuffer, larger packets get the connection closed
+JUTE_MAX_BUFFER = 0xFFFFF
+
+WRITE_TYPES = frozenset(
+    [
+        Create.type,
+        Create2.type,
+        Delete.type,
+        SetData.type,
+        SetACL.type,
+        Transaction.type,
+        Reconfig.type,
+    ]
+)
+
+bool_struct = struct.Struct("B")
+
+
+class ZNode(object):
+    """A node of the :class:`DataTree`"""
+
+    __slots__ = (
+        "data",
+        "acl",
+        "czxid",
+        "mzxid",
+        "ctime",
+        "mtime",
+        "version",
+        "cversion",
+        "aversion",
+        "ephemeral_owner",
+        "pzxid",
+        "children",
+    )
+
+    def __init__(
+        self,
+        data: Optional[bytes],
+        acl: List[ACL],
+        zxid: int,
+        now: int,
+        ephemeral_owner: int = 0,
+    ) -> None:
+        self.data = data
+        self.acl = acl
+        self.czxid = self.mzxid = self.pzxid = zxid
+        self.ctime = self.mtime = now
+        self.version = self.cversion = self.aversion = 0
+        self.ephemeral_owner = ephemeral_owner
+        self.children: Set[str] = set()
+
+    def copy(self) -> "ZNode":
+        node = ZNode.__new__(ZNode)
+        for attr in ZNode.__slots__:
+            setattr(node, attr, getattr(self, attr))
+        node.children = set(self.children)
+        return node
+
+    def stat(self) -> bytes:
+        return stat_struct.pack(
+            self.czxid,
+            self.mzxid,
+            self.ctime,
+            self.mtime,
+            self.version,
+            self.cversion,
+            self.aversion,
+            self.ephemeral_owner,
+            len(self.data) if self.data else 0,
+            len(self.children),
+            self.pzxid,
+        )
+
+
+class Session(object):
+    """A client session tracked by the :class:`DataTree`"""
+
+    def __init__(
+        self,
+        session_id: int,
+        passwd: bytes,
+        timeout: int,
+        read_only: bool = False,
+    ) -> None:
+        self.session_id = session_id
+        self.passwd = passwd
+        self.timeout = timeout
+        self.read_only = read_only
+        self.last_seen = time.monotonic()
+        self.connection: Optional[_FakeConnection] = None
+        self.ephemerals: Set[str] = set()
+
+    def touch(self) -> None:
+        self.last_seen = time.monotonic()
+
+
+def _split(path: str) -> Tuple[str, str]:
+    index = path.rfind("/")
+    return path[:index] or "/", path[index + 1 :]
+
+
+def _validate_path(path: str, sequential: bool = False) -> None:
+    if not path or path[0] != "/":
+        raise BadArgumentsError("Path must start with / character")
+    if path == "/":
+        return
+    components = path[1:].split("/")
+    if sequential:
+        # The sequence number gets appended to the last component
+        components.pop()
+    for component in components:
+        if component in ("", ".", ".."):
+            raise BadArgumentsError("Invalid path %r" % path)
+    for char in path:
+        if (
+            char <= "\x1f"
+            or "\x7f" <= char <= "\x9f"
+            or "\ud800" <= char <= "\uf8ff"
+            or "\ufff0" <= char <= "\uffff"
+        ):
+            raise BadArgumentsError("Invalid character in path %r" % path)
+
+
+def _unique(acls: Sequence[ACL]) -> List[ACL]:
+    unique: List[ACL] = []
+    for acl in acls:
+        if acl not in unique:
+            unique.append(acl)
+    return unique
+
+
+_CreateArgs = Tuple[str, Optional[bytes], List[ACL], int, int]
+_VersionArgs = Tuple[str, int]
+_SetDataArgs = Tuple[str, Optional[bytes], int]
+_OpArgs = Union[_CreateArgs, _VersionArgs, _SetDataArgs]
+_OpResult = Union[Tuple[str, ZNode], ZNode, bool]
+
+
+class DataTree(object):
+    """The shared, in-memory state of a fake ensemble
+
+    Holds the znodes, the sessions and the watches. Every method
+    expects :attr:`lock` to be held by the caller; watch events
+    triggered by a write are queued and delivered by
+    :meth:`flush_events`.
+
+    :param tick_time: ZooKeeper tick time in milliseconds, used to
+                      bound the negotiated session timeouts.
+    :param min_session_timeout: Lowest negotiable session timeout in
+                                milliseconds, defaults to 2 ticks.
+    :param max_session_timeout: Highest negotiable session timeout in
+                                milliseconds, defaults to 20 ticks.
+
+    """
+
+    def __init__(
+        self,
+        tick_time: int = 2000,
+        min_session_timeout: Optional[int] = None,
+        max_session_timeout: Optional[int] = None,
+    ) -> None:
+        self.lock = threading.RLock()
+        self.tick_time = tick_time
+        self.min_session_timeout = min_session_timeout or 2 * tick_time
+        self.max_session_timeout = max_session_timeout or 20 * tick_time
+        self._reaper: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop all the znodes, sessions and watches"""
+        with self.lock:
+            self.zxid = 0
+            self.nodes: Dict[str, ZNode] = {}
+            self.sessions: Dict[int, Session] = {}
+            self.data_watches: Dict[str, Set[int]] = {}
+            self.child_watches: Dict[str, Set[int]] = {}
+            self._events: List[Tuple[int, int, str]] = []
+            self._undo: Optional[Dict[str, Optional[ZNode]]] = None
+            self._session_seq = int(time.time() * 1000) << 20
+            now = self._now()
+            self.nodes["/"] = ZNode(b"", OPEN_ACL_UNSAFE, 0, now)
+            for path in (
+                "/zookeeper",
+                "/zookeeper/quota",
+                "/zookeeper/config",
+            ):
+                self.nodes[path] = ZNode(b"", OPEN_ACL_UNSAFE, 0, now)
+                parent, name = _split(path)
+                self.nodes[parent].children.add(name)
+
+    @staticmethod
+    def _now() -> int:
+        return int(time.time() * 1000)
+
+    def start(self) -> None:
+        """Start expiring the sessions that time out"""
+        with self.lock:
+            if self._reaper is not None:
+                return
+            self._stopped.clear()
+            self._reaper = threading.Thread(target=self._reap)
+            self._reaper.daemon = True
+            self._reaper.start()
+
+    def stop(self) -> None:
+        """Stop expiring sessions"""
+        with self.lock:
+            reaper, self._reaper = self._reaper, None
+        if reaper is not None:
+            self._stopped.set()
+            reaper.join()
+
+    def _reap(self) -> None:
+        while not self._stopped.wait(min(0.1, self.tick_time / 2000.0)):
+            now = time.monotonic()
+            with self.lock:
+                for session in list(self.sessions.values()):
+                    if now - session.last_seen > session.timeout / 1000.0:
+                        log.debug("Expiring session 0x%x", session.session_id)
+                        self.expire_session(session.session_id)
+
+    # Sessions
+
+    def create_session(self, timeout: int, read_only: bool = False) -> Session:
+        timeout = max(
+            self.min_session_timeout, min(self.max_session_timeout, timeout)
+        )
+        self._session_seq += 1
+        session = Session(
+            self._session_seq, os.urandom(16), timeout, read_only
+        )
+        self.sessions[session.session_id] = session
+        return session
+
+    def expire_session(self, session_id: int) -> None:
+        """Expire a session, removing its ephemeral nodes and closing its
+        connection"""
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+            if session is None:
+                return
+            self._close_session(session)
+            if session.connection is not None:
+                session.connection.close()
+
+    def expire_all_sessions(self) -> None:
+        """Expire every session"""
+        with self.lock:
+            for session_id in list(self.sessions):
+                self.expire_session(session_id)
+
+    def close_session(self, session_id: int) -> None:
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self._close_session(session)
+
+    def _close_session(self, session: Session) -> None:
+        self.zxid += 1
+        for path in sorted(session.ephemerals, reverse=True):
+            if path in self.nodes:
+                self._delete(path, -1)
+        session.ephemerals.clear()
+        self.remove_watches(session.session_id)
+        self.flush_events()
+
+    # Watches
+
+    def add_watch(
+        self, watches: Dict[str, Set[int]], path: str, session_id: int
+    ) -> None:
+        watches.setdefault(path, set()).add(session_id)
+
+    def remove_watches(self, session_id: int) -> None:
+        """Drop the watches a session left, as a server does when the
+        connection they were set on goes away"""
+        for watches in (self.data_watches, self.child_watches):
+            for path in list(watches):
+                sessions = watches[path]
+                sessions.discard(session_id)
+                if not sessions:
+                    del watches[path]
+
+    def set_watches(
+        self,
+        session_id: int,
+        relative_zxid: int,
+        data: Sequence[str],
+        exist: Sequence[str],
+        child: Sequence[str],
+    ) -> None:
+        """Restore the watches of a session moving to a new connection,
+        triggering those on nodes changed since `relative_zxid`"""
+        nodes = self.nodes
+        for path in data:
+            node = nodes.get(path)
+            if node is None:
+                self._events.append((session_id, DELETED_EVENT, path))
+            elif node.mzxid > relative_zxid:
+                self._events.append((session_id, CHANGED_EVENT, path))
+            else:
+                self.add_watch(self.data_watches, path, session_id)
+        for path in exist:
+            if path in nodes:
+                self._events.append((session_id, CREATED_EVENT, path))
+            else:
+                self.add_watch(self.data_watches, path, session_id)
+        for path in child:
+            node = nodes.get(path)
+            if node is None:
+                self._events.append((session_id, DELETED_EVENT, path))
+            elif node.pzxid > relative_zxid:
+                self._events.append((session_id, CHILD_EVENT, path))
+            else:
+                self.add_watch(self.child_watches, path, session_id)
+
+    def watch_count(self) -> int:
+        return sum(len(s) for s in self.data_watches.values()) + sum(
+            len(s) for s in self.child_watches.values()
+        )
+
+    def _trigger(
+        self, path: str, event_type: int, *tables: Dict[str, Set[int]]
+    ) -> None:
+        notified: Set[int] = set()
+        for watches in tables:
+            notified.update(watches.pop(path, ()))
+        for session_id in notified:
+            self._events.append((session_id, event_type, path))
+
+    def flush_events(self) -> None:
+        """Deliver the watch events triggered since the last flush"""
+        events, self._events = self._events, []
+        for session_id, event_type, path in events:
+            session = self.sessions.get(session_id)
+            if session is not None and session.connection is not None:
+                session.connection.send_event(event_type, path)
+
+    # Transactions
+
+    def _save(self, path: str) -> None:
+        if self._undo is not None and path not in self._undo:
+            node = self.nodes.get(path)
+            self._undo[path] = node.copy() if node is not None else None
+
+    def multi(
+        self, ops: Sequence[Tuple[int, _OpArgs]]
+    ) -> List[Tuple[int, _OpResult]]:
+        """Apply a list of ``(type, args)`` operations atomically
+
+        Returns the list of ``(type, result)`` pairs, or raises a
+        :class:`MultiError` holding the per operation errors if one of
+        them fails, in which case none of them are applied.
+
+        """
+        self._undo = {}
+        ephemerals = {
+            sid: set(s.ephemerals) for sid, s in self.sessions.items()
+        }
+        results: List[Tuple[int, _OpResult]] = []
+        try:
+            for op_type, args in ops:
+                try:
+                    results.append((op_type, self._apply(op_type, args)))
+                except ZookeeperError as exc:
+                    errors = [0] * len(results) + [exc.code]
+                    errors += [RuntimeInconsistency.code] * (
+                        len(ops) - len(errors)
+                    )
+                    self._rollback(ephemerals)
+                    raise MultiError(errors)
+        finally:
+            self._undo = None
+        return results
+
+    def _rollback(self, ephemerals: Dict[int, Set[str]]) -> None:
+        assert self._undo is not None
+        for path, node in self._undo.items():
+            if node is None:
+                self.nodes.pop(path, None)
+            else:
+                self.nodes[path] = node
+        for sid, owned in ephemerals.items():
+            self.sessions[sid].ephemerals = owned
+        self._events = []
+
+    def _apply(self, op_type: int, args: _OpArgs) -> _OpResult:
+        if op_type in (Create.type, Create2.type):
+            return self.create(*cast(_CreateArgs, args))
+        elif op_type == Delete.type:
+            return self.delete(*cast(_VersionArgs, args))
+        elif op_type == SetData.type:
+            return self.set_data(*cast(_SetDataArgs, args))
+        elif op_type == CheckVersion.type:
+            return self.check(*cast(_VersionArgs, args))
+        raise UnimplementedError()
+
+    # Operations
+
+    def create(
+        self,
+        path: str,
+        data: Optional[bytes],
+        acl: Sequence[ACL],
+        flags: int,
+        session_id: int,
+    ) -> Tuple[str, ZNode]:
+        sequential = bool(flags & SEQUENCE)
+        _validate_path(path, sequential)
+        if not acl:
+            raise InvalidACLError()
+        if flags not in (0, 1, 2, 3):
+            raise UnimplementedError()
+        parent_path, name = _split(path)
+        parent = self.nodes.get(parent_path)
+        if parent is None:
+            raise NoNodeError()
+        if parent.ephemeral_owner:
+            raise NoChildrenForEphemeralsError()
+        if sequential:
+            name += "%010d" % parent.cversion
+            path = parent_path.rstrip("/") + "/" + name
+        if path in self.nodes or path == "/":
+            raise NodeExistsError()
+
+        zxid = self.zxid
+        owner = session_id if flags & EPHEMERAL else 0
+        self._save(path)
+        self._save(parent_path)
+        node = self.nodes[path] = ZNode(
+            data, _unique(acl), zxid, self._now(), owner
+        )
+        parent.children.add(name)
+        parent.cversion += 1
+        parent.pzxid = zxid
+        if owner:
+            self.sessions[session_id].ephemerals.add(path)
+
+        self._trigger(path, CREATED_EVENT, self.data_watches)
+        self._trigger(parent_path, CHILD_EVENT, self.child_watches)
+        return path, node
+
+    def delete(
+        self, path: str, version: int, session_id: Optional[int] = None
+    ) -> bool:
+        _validate_path(path)
+        if path == "/":
+            raise BadArgumentsError()
+        node = self.nodes.get(path)
+        if node is None:
+            raise NoNodeError()
+        if version != -1 and version != node.version:
+            raise BadVersionError()
+        if node.children:
+            raise NotEmptyError()
+        self._delete(path, version)
+        return True
+
+    def _delete(self, path: str, version: int) -> None:
+        parent_path, name = _split(path)
+        self._save(path)
+        self._save(parent_path)
+        node = self.nodes.pop(path)
+        parent = self.nodes[parent_path]
+        parent.children.discard(name)
+        parent.cversion += 1
+        parent.pzxid = self.zxid
+        owner = self.sessions.get(node.ephemeral_owner)
+        if owner is not None:
+            owner.ephemerals.discard(path)
+
+        self._trigger(
+            path, DELETED_EVENT, self.data_watches, self.child_watches
+        )
+        self._trigger(parent_path, CHILD_EVENT, self.child_watches)
+
+    def set_data(
+        self,
+        path: str,
+        data: Optional[bytes],
+        version: int,
+        session_id: Optional[int] = None,
+    ) -> ZNode:
+        node = self.get_node(path)
+        if version != -1 and version != node.version:
+            raise BadVersionError()
+        self._save(path)
+        node = self.nodes[path]
+        node.data = data
+        node.version += 1
+        node.mzxid = self.zxid
+        node.mtime = self._now()
+        self._trigger(path, CHANGED_EVENT, self.data_watches)
+        return node
+
+    def set_acl(self, path: str, acl: Sequence[ACL], version: int) -> ZNode:
+        node = self.get_node(path)
+        if version != -1 and version != node.aversion:
+            raise BadVersionError()
+        if not acl:
+            raise InvalidACLError()
+        node.acl = _unique(acl)
+        node.aversion += 1
+        return node
+
+    def check(
+        self, path: str, version: int, session_id: Optional[int] = None
+    ) -> bool:
+        node = self.get_node(path)
+        if version != -1 and version != node.version:
+            raise BadVersionError()
+        return True
+
+    def get_node(self, path: str) -> ZNode:
+        _validate_path(path)
+        node = self.nodes.get(path)
+        if node is None:
+            raise NoNodeError()
+        return node
+
+
+class MultiError(Exception):
+    """Raised by :meth:`DataTree.multi` with the per operation error
+    codes of a failed transaction"""
+
+    def __init__(self, errors: List[int]) -> None:
+        super(MultiError, self).__init__(errors)
+        self.errors = errors
+
+
+class _ConnectionClosed(Exception):
+    pass
+
+
+class _FakeConnection(socketserver.BaseRequestHandler):
+    """Serves a single client connection of a :class:`FakeZooKeeperServer`"""
+
+    def setup(self) -> None:
+        self.fake = cast(_TCPServer, self.server).fake
+        self.tree = self.fake.tree
+        self.session: Optional[Session] = None
+        self.received = self.sent = 0
+        self.last_op = "NA"
+        self.established = time.time()
+        self.closed = False
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.fake._connections.add(self)
+
+    def finish(self) -> None:
+        self.fake._connections.discard(self)
+        with self.tree.lock:
+            session = self.session
+            if session is not None and session.connection is self:
+                session.connection = None
+                self.tree.remove_watches(session.session_id)
+        self.close()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.request.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def describe(self) -> str:
+        """Describe the connection the way ``cons`` does"""
+        session = self.session
+        assert session is not None
+        return (
+            "/%s:%s[1](queued=0,recved=%d,sent=%d,sid=0x%x,lop=%s,est=%d,"
+            "to=%d,lzxid=0x%x,lresp=0,llat=0,minlat=0,avglat=0,maxlat=0)"
+            % (
+                self.client_address[0],
+                self.client_address[1],
+                self.received,
+                self.sent,
+                session.session_id,
+                self.last_op,
+                int(self.established * 1000),
+                session.timeout,
+                self.tree.zxid,
+            )
+        )
+
+    def _recv(self, length: int) -> bytes:
+        chunks = []
+        while length:
+            chunk = self.request.recv(length)
+            if not chunk:
+                raise _ConnectionClosed()
+            chunks.append(chunk)
+            length -= len(chunk)
+        return b"".join(chunks)
+
+    def _send(self, payload: bytes) -> None:
+        if self.closed:
+            return
+        try:
+            self.request.sendall(int_struct.pack(len(payload)) + payload)
+            self.sent += 1
+        except OSError:
+            self.close()
+
+    def _reply(self, xid: int, err: int = 0, body: bytes = b"") -> None:
+        self._send(reply_header_struct.pack(xid, self.tree.zxid, err) + body)
+
+    def send_event(self, event_type: int, path: str) -> None:
+        self._send(
+            reply_header_struct.pack(WATCH_XID, -1, 0)
+            + int_int_struct.pack(event_type, SYNC_CONNECTED)
+            + write_string(path)
+        )
+
+    def handle(self) -> None:
+        try:
+            head = self._recv(4)
+            command = FOUR_LETTER_WORDS.get(head)
+            if command is not None:
+                self.request.sendall(command(self.fake).encode("utf-8"))
+                return
+            length = int_struct.unpack(head)[0]
+            if not self._connect(self._recv(length)):
+                return
+            while not self.closed:
+                length = int_struct.unpack(self._recv(4))[0]
+                if length > self.fake.max_buffer:
+                    log.debug("Packet of %d bytes is too large", length)
+                    return
+                if not self._process(self._recv(length)):
+                    return
+        except (_ConnectionClosed, OSError):
+            pass
+
+    def _connect(self, buffer: bytes) -> bool:
+        (
+            _,
+            last_zxid,
+            timeout,
+            session_id,
+        ) = int_long_int_long_struct.unpack_from(buffer, 0)
+        offset = int_long_int_long_struct.size
+        passwd, offset = read_buffer(buffer, offset)
+        read_only = False
+        if offset < len(buffer):
+            read_only = bool_struct.unpack_from(buffer, offset)[0] == 1
+
+        fake, tree = self.fake, self.tree
+        with tree.lock:
+            if fake.read_only and not read_only:
+                log.debug("Refusing r/w session on a read-only server")
+                return False
+            if last_zxid > tree.zxid:
+                log.debug("Client has seen zxid 0x%x, ahead of us", last_zxid)
+                return False
+            if session_id:
+                session = tree.sessions.get(session_id)
+                if session is None or session.passwd != passwd:
+                    self._send(
+                        int_int_long_struct.pack(0, 0, 0)
+                        + write_buffer(b"\x00" * 16)
+                        + bool_struct.pack(0)
+                    )
+                    return False
+                if session.connection is not None:
+                    tree.remove_watches(session_id)
+                    session.connection.close()
+            else:
+                session = tree.create_session(timeout, read_only)
+            session.connection = self
+            session.touch()
+            self.session = session
+            self._send(
+                int_int_long_struct.pack(
+                    0, session.timeout, session.session_id
+                )
+                + write_buffer(session.passwd)
+                + bool_struct.pack(1 if fake.read_only else 0)
+            )
+        return True
+
+    def _process(self, buffer: bytes) -> bool:
+        xid, op_type = int_int_struct.unpack_from(buffer, 0)
+        offset = int_int_struct.size
+        self.received += 1
+
+        latency = self.fake.latency
+        if callable(latency):
+            latency = latency(op_type)
+        if latency:
+            time.sleep(latency)
+
+        tree = self.tree
+        with tree.lock:
+            session = self.session
+            assert session is not None
+            if session.connection is not self:
+                return False
+            session.touch()
+            if op_type == Ping.type:
+                self.last_op = "PING"
+                self._reply(PING_XID)
+                return True
+            elif op_type == Auth.type:
+                self.last_op = "AUTH"
+                self._reply(AUTH_XID)
+                return True
+            elif op_type == Close.type:
+                self.last_op = "CLOS"
+                tree.close_session(session.session_id)
+                self._reply(xid)
+                return False
+
+            self.last_op = OP_NAMES.get(op_type, "UNKN")
+            if self.fake.read_only and op_type in WRITE_TYPES:
+                self._reply(xid, NotReadOnlyCallError.code)
+                return True
+            if op_type in WRITE_TYPES:
+                tree.zxid += 1
+            try:
+                body = self._dispatch(op_type, buffer, offset)
+            except ZookeeperError as exc:
+                tree.flush_events()
+                self._reply(xid, exc.code)
+            else:
+                tree.flush_events()
+                self._reply(xid, 0, body)
+        return True
+
+    def _dispatch(self, op_type: int, buffer: bytes, offset: int) -> bytes:
+        tree = self.tree
+        assert self.session is not None
+        session_id = self.session.session_id
+        if op_type in (Create.type, Create2.type):
+            path, data, acl, flags, _ = _read_create(buffer, offset)
+            path, node = tree.create(path, data, acl, flags, session_id)
+            if op_type == Create2.type:
+                return write_string(path) + node.stat()
+            return write_string(path)
+        elif op_type == Delete.type:
+            path, offset = read_string(buffer, offset)
+            version = int_struct.unpack_from(buffer, offset)[0]
+            tree.delete(path, version)
+            return b""
+        elif op_type in (Exists.type, GetData.type):
+            path, watch = _read_watched_path(buffer, offset)
+            if watch and op_type == Exists.type:
+                tree.add_watch(tree.data_watches, path, session_id)
+            node = tree.get_node(path)
+            if watch and op_type == GetData.type:
+                tree.add_watch(tree.data_watches, path, session_id)
+            if op_type == Exists.type:
+                return node.stat()
+            return write_buffer(node.data) + node.stat()
+        elif op_type in (GetChildren.type, GetChildren2.type):
+            path, watch = _read_watched_path(buffer, offset)
+            node = tree.get_node(path)
+            if watch:
+                tree.add_watch(tree.child_watches, path, session_id)
+            body = [int_struct.pack(len(node.children))]
+            body.extend(write_string(child) for child in node.children)
+            if op_type == GetChildren2.type:
+                body.append(node.stat())
+            return b"".join(body)
+        elif op_type == SetData.type:
+            path, offset = read_string(buffer, offset)
+            data, offset = read_buffer(buffer, offset)
+            version = int_struct.unpack_from(buffer, offset)[0]
+            return tree.set_data(path, data, version).stat()
+        elif op_type == GetACL.type:
+            path, offset = read_string(buffer, offset)
+            node = tree.get_node(path)
+            body = [int_struct.pack(len(node.acl))]
+            body.extend(
+                int_struct.pack(acl.perms)
+                + write_string(acl.id.scheme)
+                + write_string(acl.id.id)
+                for acl in node.acl
+            )
+            return b"".join(body) + node.stat()
+        elif op_type == SetACL.type:
+            path, offset = read_string(buffer, offset)
+            acl, offset = _read_acls(buffer, offset)
+            version = int_struct.unpack_from(buffer, offset)[0]
+            return tree.set_acl(path, acl, version).stat()
+        elif op_type == Sync.type:
+            path, offset = read_string(buffer, offset)
+            return write_string(path)
+        elif op_type == SetWatches.type:
+            relative_zxid = long_struct.unpack_from(buffer, offset)[0]
+            offset += long_struct.size
+            data_paths, offset = _read_paths(buffer, offset)
+            exist_paths, offset = _read_paths(buffer, offset)
+            child_paths, offset = _read_paths(buffer, offset)
+            tree.set_watches(
+                session_id, relative_zxid, data_paths, exist_paths, child_paths
+            )
+            return b""
+        elif op_type == Transaction.type:
+            return self._multi(buffer, offset)
+        raise UnimplementedError()
+
+    def _multi(self, buffer: bytes, offset: int) -> bytes:
+        assert self.session is not None
+        session_id = self.session.session_id
+        ops: List[Tuple[int, _OpArgs]] = []
+        while True:
+            op_type, done, _ = multiheader_struct.unpack_from(buffer, offset)
+            offset += multiheader_struct.size
+            if done:
+                break
+            args: _OpArgs
+            if op_type in (Create.type, Create2.type):
+                path, data, acl, flags, offset = _read_create(buffer, offset)
+                args = (path, data, acl, flags, session_id)
+            elif op_type in (Delete.type, CheckVersion.type):
+                path, offset = read_string(buffer, offset)
+                version = int_struct.unpack_from(buffer, offset)[0]
+                offset += int_struct.size
+                args = (path, version)
+            elif op_type == SetData.type:
+                path, offset = read_string(buffer, offset)
+                data, offset = read_buffer(buffer, offset)
+                version = int_struct.unpack_from(buffer, offset)[0]
+                offset += int_struct.size
+                args = (path, data, version)
+            else:
+                raise UnimplementedError()
+            ops.append((op_type, args))
+
+        body: List[bytes] = []
+        try:
+            results = self.tree.multi(ops)
+        except MultiError as exc:
+            for err in exc.errors:
+                body.append(multiheader_struct.pack(-1, False, err))
+                body.append(int_struct.pack(err))
+        else:
+            for op_type, result in results:
+                body.append(multiheader_struct.pack(op_type, False, 0))
+                if isinstance(result, tuple):
+                    path, node = result
+                    body.append(write_string(path))
+                    if op_type == Create2.type:
+                        body.append(node.stat())
+                elif isinstance(result, ZNode):
+                    body.append(result.stat())
+        body.append(multiheader_struct.pack(-1, True, -1))
+        return b"".join(body)
+
+
+def _read_watched_path(buffer: bytes, offset: int) -> Tuple[str, bool]:
+    path, offset = read_string(buffer, offset)
+    return path, bool_struct.unpack_from(buffer, offset)[0] == 1
+
+
+def _read_paths(buffer: bytes, offset: int) -> Tuple[List[str], int]:
+    count = int_struct.unpack_from(buffer, offset)[0]
+    offset += int_struct.size
+    paths: List[str] = []
+    for _ in range(max(count, 0)):
+        path, offset = read_string(buffer, offset)
+        paths.append(path)
+    return paths, offset
+
+
+def _read_acls(buffer: bytes, offset: int) -> Tuple[List[ACL], int]:
+    count = int_struct.unpack_from(buffer, offset)[0]
+    offset += int_struct.size
+    acls: List[ACL] = []
+    for _ in range(max(count, 0)):
+        acl, offset = read_acl(buffer, offset)
+        acls.append(acl)
+    return acls, offset
+
+
+def _read_create(
+    buffer: bytes, offset: int
+) -> Tuple[str, Optional[bytes], List[ACL], int, int]:
+    path, offset = read_string(buffer, offset)
+    data, offset = read_buffer(buffer, offset)
+    acl, offset = _read_acls(buffer, offset)
+    flags = int_struct.unpack_from(buffer, offset)[0]
+    offset += int_struct.size
+    return path, data, acl, flags, offset
+
+
+OP_NAMES = {
+    Create.type: "CREA",
+    Create2.type: "CREA",
+    Delete.type: "DELE",
+    Exists.type: "EXIS",
+    GetData.type: "GETD",
+    SetData.type: "SETD",
+    GetACL.type: "GETA",
+    SetACL.type: "SETA",
+    GetChildren.type: "GETC",
+    GetChildren2.type: "GETC",
+    Sync.type: "SYNC",
+    SetWatches.type: "SETW",
+    Transaction.type: "MULT",
+    Reconfig.type: "RECO",
+}
+
+
+def _srvr(fake: "FakeZooKeeperServer", with_clients: bool = False) -> str:
+    tree = fake.tree
+    lines = [
+        "Zookeeper version: %s, built on 01/01/1970 00:00 GMT" % (FAKE_VERSION)
+    ]
+    if with_clients:
+        lines.append("Clients:")
+        lines.extend(" " + c.describe() for c in fake.connections())
+        lines.append("")
+    lines += [
+        "Latency min/avg/max: 0/0.0/0",
+        "Received: %d" % sum(c.received for c in fake.connections()),
+        "Sent: %d" % sum(c.sent for c in fake.connections()),
+        "Connections: %d" % len(fake.connections()),
+        "Outstanding: 0",
+        "Zxid: 0x%x" % tree.zxid,
+        "Mode: %s" % fake.mode,
+        "Node count: %d" % len(tree.nodes),
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _mntr(fake: "FakeZooKeeperServer") -> str:
+    tree = fake.tree
+    stats: List[Tuple[str, object]] = [
+        ("zk_version", FAKE_VERSION),
+        ("zk_avg_latency", 0),
+        ("zk_max_latency", 0),
+        ("zk_min_latency", 0),
+        ("zk_packets_received", sum(c.received for c in fake.connections())),
+        ("zk_packets_sent", sum(c.sent for c in fake.connections())),
+        ("zk_num_alive_connections", len(fake.connections())),
+        ("zk_outstanding_requests", 0),
+        ("zk_server_state", fake.mode),
+        ("zk_znode_count", len(tree.nodes)),
+        ("zk_watch_count", tree.watch_count()),
+        (
+            "zk_ephemerals_count",
+            sum(len(s.ephemerals) for s in tree.sessions.values()),
+        ),
+        (
+            "zk_approximate_data_size",
+            sum(len(n.data or b"") for n in tree.nodes.values()),
+        ),
+    ]
+    return "".join("%s\t%s\n" % stat for stat in stats)
+
+
+def _cons(fake: "FakeZooKeeperServer") -> str:
+    return "".join(" %s\n" % c.describe() for c in fake.connections()) + "\n"
+
+
+def _wchs(fake: "FakeZooKeeperServer") -> str:
+    tree = fake.tree
+    paths = set(tree.data_watches) | set(tree.child_watches)
+    return "%d connections watching %d paths\nTotal watches:%d\n" % (
+        len(fake.connections()),
+        len(paths),
+        tree.watch_count(),
+    )
+
+
+def _envi(fake: "FakeZooKeeperServer") -> str:
+    return (
+        "Environment:\n"
+        "zookeeper.version=%s\n"
+        "host.name=%s\n"
+        "java.version=none\n" % (FAKE_VERSION, fake.host)
+    )
+
+
+def _isro(fake: "FakeZooKeeperServer") -> str:
+    return "ro" if fake.read_only else "rw"
+
+
+_Command = Callable[["FakeZooKeeperServer"], str]
+
+
+def _locked(command: _Command) -> _Command:
+    def locked(fake: "FakeZooKeeperServer") -> str:
+        with fake.tree.lock:
+            return command(fake)
+
+    return locked
+
+
+FOUR_LETTER_WORDS: Dict[bytes, _Command] = {
+    b"ruok": lambda fake: "imok",
+    b"isro": _isro,
+    b"srvr": _locked(_srvr),
+    b"stat": _locked(lambda fake: _srvr(fake, with_clients=True)),
+    b"mntr": _locked(_mntr),
+    b"cons": _locked(_cons),
+    b"wchs": _locked(_wchs),
+    b"envi": _envi,
+}
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    block_on_close = False
+
+    fake: "FakeZooKeeperServer"
+
+
+class FakeZooKeeperServer(object):
+    """A single in-memory ZooKeeper server listening on a local port
+
+    :param tree: The :class:`DataTree` to serve, shared with the other
+                 members of a :class:`FakeZooKeeperCluster`. A private
+                 one is created if omitted.
+    :param host: Address to listen on.
+    :param port: Port to listen on, an ephemeral port is picked if 0.
+                 The port is kept across :meth:`stop` and :meth:`run`.
+    :param server_id: The id of the server within its ensemble.
+    :param mode: The server state reported by ``srvr`` and ``mntr``.
+    :param read_only: Serve as a read-only server, refusing r/w clients
+                      and write requests.
+    :param max_buffer: Largest request accepted, in bytes. Connections
+                       sending larger ones are closed.
+
+    .. attribute:: latency
+
+        Seconds to wait before serving each request, or a callable
+        returning that delay given the request type. Used to inject
+        latency.
+
+    """
+
+    def __init__(
+        self,
+        tree: Optional[DataTree] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        server_id: int = 1,
+        mode: str = "standalone",
+        read_only: bool = False,
+        max_buffer: int = JUTE_MAX_BUFFER,
+    ) -> None:
+        self.tree = tree if tree is not None else DataTree()
+        self._owns_tree = tree is None
+        self.host = host
+        self.port = port
+        self.server_id = server_id
+        self.mode = mode
+        self.read_only = read_only
+        self.max_buffer = max_buffer
+        self.latency: Union[float, Callable[[int], float]] = 0
+        self._server: Optional[_TCPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._connections: Set[_FakeConnection] = set()
+
+    @property
+    def address(self) -> str:
+        return "%s:%s" % (self.host, self.port)
+
+    # Compatibility with kazoo.testing.common.ManagedZooKeeper
+    secure_address = address
+
+    @property
+    def client_port(self) -> int:
+        return self.port
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    def connections(self) -> List[_FakeConnection]:
+        """Return the connections currently served"""
+        return [c for c in list(self._connections) if c.session is not None]
+
+    def run(self) -> None:
+        """Start listening and serving clients"""
+        if self.running:
+            return
+        server = _TCPServer((self.host, self.port), _FakeConnection)
+        server.fake = self
+        self.port = server.server_address[1]
+        self._server = server
+        self._thread = threading.Thread(
+            target=server.serve_forever, kwargs={"poll_interval": 0.05}
+        )
+        self._thread.daemon = True
+        self._thread.start()
+        if self._owns_tree:
+            self.tree.start()
+
+    def stop(self) -> None:
+        """Stop listening and drop every connection, keeping the
+        sessions and znodes"""
+        server, self._server = self._server, None
+        if server is None:
+            return
+        server.shutdown()
+        server.server_close()
+        assert self._thread is not None
+        self._thread.join()
+        self._thread = None
+        self.drop_connections()
+        if self._owns_tree:
+            self.tree.stop()
+
+    def destroy(self) -> None:
+        """Stop the server and, if it owns it, wipe its data tree"""
+        self.stop()
+        if self._owns_tree:
+            self.tree.reset()
+
+    def reset(self) -> None:
+        self.destroy()
+
+    def drop_connections(self) -> None:
+        """Close every client connection, as a network failure would.
+
+        The sessions stay alive until they time out, so clients can
+        resume them by reconnecting.
+
+        """
+        for connection in list(self._connections):
+            connection.close()
+
+    def get_logs(self, num_lines: int = 100) -> List[str]:
+        return []
+
+
+class FakeZooKeeperCluster(object):
+    """A set of :class:`FakeZooKeeperServer` sharing one
+    :class:`DataTree`
+
+    Mirrors the interface of :class:`kazoo.testing.common.ZookeeperCluster`
+    so it can stand in for it.
+
+    :param size: Number of servers in the ensemble.
+    :param observer_start_id: The servers with an id greater or equal to
+                              this one are observers, -1 for none.
+    :param host: Address the servers listen on.
+    :param tree_options: Keyword arguments for the :class:`DataTree`.
+
+    """
+
+    def __init__(
+        self,
+        size: int = 3,
+        observer_start_id: int = -1,
+        host: str = "127.0.0.1",
+        **tree_options: int,
+    ) -> None:
+        self.tree = DataTree(**tree_options)
+        self._servers: List[FakeZooKeeperServer] = []
+        for server_id in range(1, size + 1):
+            if observer_start_id != -1 and server_id >= observer_start_id:
+                mode = "observer"
+            elif size == 1:
+                mode = "standalone"
+            elif server_id == 1:
+                mode = "leader"
+            else:
+                mode = "follower"
+            self._servers.append(
+                FakeZooKeeperServer(
+                    self.tree, host=host, server_id=server_id, mode=mode
+                )
+            )
+
+    def __getitem__(self, k: int) -> FakeZooKeeperServer:
+        return self._servers[k]
+
+    def __iter__(self) -> Iterator[FakeZooKeeperServer]:
+        return iter(self._servers)
+
+    def __len__(self) -> int:
+        return len(self._servers)
+
+    @property
+    def hosts(self) -> str:
+        """A host string listing every server, for :class:`KazooClient`"""
+        return ",".join(s.address for s in self)
+
+    def start(self) -> None:
+        for server in self:
+            server.run()
+        self.tree.start()
+        self._write_config()
+
+    def stop(self) -> None:
+        for server in self:
+            server.stop()
+        self.tree.stop()
+
+    def terminate(self) -> None:
+        self.stop()
+        self.tree.reset()
+
+    def reset(self) -> None:
+        self.terminate()
+
+    def expire_session(self, session_id: int) -> None:
+        self.tree.expire_session(session_id)
+
+    def get_logs(self) -> List[str]:
+        return []
+
+    def _write_config(self) -> None:
+        lines = []
+        for server in self:
+            role = "observer" if server.mode == "observer" else "participant"
+            lines.append(
+                "server.%d=%s:0:0:%s;%s"
+                % (server.server_id, server.host, role, server.address)
+            )
+        lines.append("version=%x" % self.tree.zxid)
+        with self.tree.lock:
+            node = self.tree.nodes["/zookeeper/config"]
+            node.data = "\n".join(lines).encode("utf-8")
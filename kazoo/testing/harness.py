@@ -10,6 +10,7 @@ from kazoo.exceptions import KazooException
 from kazoo.protocol.connection import _CONNECTION_DROP, _SESSION_EXPIRED
 from kazoo.protocol.states import KazooState
 from kazoo.testing.common import ZookeeperCluster
+from kazoo.testing.fakeserver import FakeZooKeeperCluster
 
 log = logging.getLogger(__name__)
 
@@ -37,6 +38,7 @@ def get_global_cluster():
             "ZOOKEEPER_OBSERVER_START_ID",
             "ZOOKEEPER_JAAS_AUTH",
             "ZOOKEEPER_LOCAL_SESSION_RO",
+            "ZOOKEEPER_FAKE",
         ]
     }
     if CLUSTER is not None:
@@ -47,16 +49,24 @@ def get_global_cluster():
             CLUSTER.terminate()
             CLUSTER = None
     # Create a new cluster
-    ZK_HOME = cluster_conf.get("ZOOKEEPER_PATH")
-    ZK_CLASSPATH = cluster_conf.get("ZOOKEEPER_CLASSPATH")
     ZK_PORT_OFFSET = int(cluster_conf.get("ZOOKEEPER_PORT_OFFSET"))
     ZK_CLUSTER_SIZE = int(cluster_conf.get("ZOOKEEPER_CLUSTER_SIZE"))
+    ZK_OBSERVER_START_ID = int(cluster_conf.get("ZOOKEEPER_OBSERVER_START_ID"))
+    if cluster_conf.get("ZOOKEEPER_FAKE"):
+        # Use the in-memory server, no Java installation required
+        CLUSTER = FakeZooKeeperCluster(
+            size=ZK_CLUSTER_SIZE, observer_start_id=ZK_OBSERVER_START_ID
+        )
+        CLUSTER_CONF = cluster_conf
+        atexit.register(lambda cluster: cluster.terminate(), CLUSTER)
+        return CLUSTER
+    ZK_HOME = cluster_conf.get("ZOOKEEPER_PATH")
+    ZK_CLASSPATH = cluster_conf.get("ZOOKEEPER_CLASSPATH")
     ZK_VERSION = cluster_conf.get("ZOOKEEPER_VERSION")
     if "-" in ZK_VERSION:
         # Ignore pre-release markers like -alpha
         ZK_VERSION = ZK_VERSION.split("-")[0]
     ZK_VERSION = tuple([int(n) for n in ZK_VERSION.split(".")])
-    ZK_OBSERVER_START_ID = int(cluster_conf.get("ZOOKEEPER_OBSERVER_START_ID"))
 
     assert ZK_HOME or ZK_CLASSPATH or ZK_VERSION, (
         "Either ZOOKEEPER_PATH or ZOOKEEPER_CLASSPATH or "
@@ -183,7 +193,7 @@ class KazooTestHarness(unittest.TestCase):
         self._clients.append(c)
         return c
 
-    def _get_client(self, **client_options):
+    def _get_client(self, **client_options) -> KazooClient:
         if "timeout" not in client_options:
             client_options["timeout"] = self.DEFAULT_CLIENT_TIMEOUT
         c = KazooClient(self.hosts, **client_options)
@@ -286,10 +296,10 @@ class KazooTestHarness(unittest.TestCase):
 
 
 class KazooTestCase(KazooTestHarness):
-    def setUp(self):
+    def setUp(self) -> None:
         self.setup_zookeeper()
 
-    def tearDown(self):
+    def tearDown(self) -> None:
         self.teardown_zookeeper()
 
     @classmethod
@@ -0,0 +1,232 @@
+import http.client
+import http.server
+import json
+import socket
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Set, Tuple, TypeVar, cast
+import unittest
+
+import pytest
+
+from kazoo.exceptions import ConfigurationError
+from kazoo.testing import KazooTestCase
+
+if TYPE_CHECKING:
+    from kazoo.admin import AdminClient, Results, Server
+
+_T = TypeVar("_T")
+
+
+SRVR = """\
+Zookeeper version: 3.8.0-5a02a05eddb59aee6ac762f7ea82e92a68eb9c0f, \
+built on 2022-02-25 08:49 UTC
+Latency min/avg/max: 0/0.5333/4
+Received: 20
+Sent: 19
+Connections: 2
+Outstanding: 0
+Zxid: 0x10000000a
+Mode: leader
+Node count: 7
+Proposal sizes last/min/max: 48/48/92
+"""
+
+STAT = """\
+Zookeeper version: 3.8.0-5a02a05eddb59aee6ac762f7ea82e92a68eb9c0f, \
+built on 2022-02-25 08:49 UTC
+Clients:
+ /127.0.0.1:53490[1](queued=0,recved=8,sent=8,sid=0x100004a2b3e0000,\
+lop=PING,est=1663236061254,to=10000,lcxid=0x3,lzxid=0x10000000a,\
+lresp=1663236065264,llat=0,minlat=0,avglat=0.25,maxlat=1)
+ /0:0:0:0:0:0:0:1:53492[0](queued=0,recved=1,sent=0)
+
+Latency min/avg/max: 0/0.5333/4
+Mode: follower
+"""
+
+
+def _successes(results: "Results[_T]") -> "Dict[Server, _T]":
+    successes = {}
+    for server, result in results.items():
+        assert not isinstance(result, Exception), result
+        successes[server] = result
+    return successes
+
+
+class TestParsers(unittest.TestCase):
+    def test_mntr(self) -> None:
+        from kazoo.admin import parse_mntr
+
+        stats = parse_mntr(
+            "zk_version\t3.8.0-5a02a05, built on 2022-02-25 08:49 UTC\n"
+            "zk_server_state\tleader\n"
+            "zk_avg_latency\t0.5333\n"
+            "zk_num_alive_connections\t2\n"
+        )
+        assert stats == {
+            "zk_version": "3.8.0-5a02a05, built on 2022-02-25 08:49 UTC",
+            "zk_server_state": "leader",
+            "zk_avg_latency": 0.5333,
+            "zk_num_alive_connections": 2,
+        }
+
+    def test_srvr(self) -> None:
+        from kazoo.admin import parse_srvr
+
+        stats = parse_srvr(SRVR)
+        version = stats["version"]
+        assert isinstance(version, str)
+        assert version.startswith("3.8.0-5a02a05")
+        assert stats["latency_min"] == 0
+        assert stats["latency_avg"] == 0.5333
+        assert stats["latency_max"] == 4
+        assert stats["zxid"] == 0x10000000A
+        assert stats["mode"] == "leader"
+        assert stats["node_count"] == 7
+        assert stats["proposal_sizes_max"] == 92
+        assert "clients" not in stats
+
+    def test_stat(self) -> None:
+        from kazoo.admin import parse_stat
+
+        stats = parse_stat(STAT)
+        assert stats["mode"] == "follower"
+        clients = stats["clients"]
+        assert isinstance(clients, list)
+        first, second = clients
+        assert first["address"] == "127.0.0.1"
+        assert first["port"] == 53490
+        assert first["interest_ops"] == 1
+        assert first["sid"] == 0x100004A2B3E0000
+        assert first["lop"] == "PING"
+        assert first["avglat"] == 0.25
+        assert second == {
+            "address": "0:0:0:0:0:0:0:1",
+            "port": 53492,
+            "interest_ops": 0,
+            "queued": 0,
+            "recved": 1,
+            "sent": 0,
+        }
+
+    def test_wchs_and_envi(self) -> None:
+        from kazoo.admin import parse_envi, parse_wchs
+
+        assert parse_wchs(
+            "3 connections watching 5 paths\nTotal watches:8\n"
+        ) == {"connections": 3, "paths": 5, "watches": 8}
+        with pytest.raises(ValueError):
+            parse_wchs("")
+        assert parse_envi(
+            "Environment:\nzookeeper.version=3.8.0\nhost.name=zk1\n"
+        ) == {"zookeeper.version": "3.8.0", "host.name": "zk1"}
+
+    def test_not_allowed(self) -> None:
+        from kazoo.admin import parse_mntr
+
+        with pytest.raises(ConfigurationError):
+            parse_mntr(
+                "mntr is not executed because it is not in the whitelist."
+            )
+
+
+class _AdminHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        server = cast("_AdminServer", self.server)
+        server.connections.add(self.client_address)
+        command = self.path[len("/commands/") :]
+        if command != "unknown":
+            status, body = 200, {"command": command, "error": None}
+        else:
+            status, body = 404, {"error": "Unknown command"}
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class _AdminServer(http.server.ThreadingHTTPServer):
+    def __init__(self) -> None:
+        super(_AdminServer, self).__init__(("127.0.0.1", 0), _AdminHandler)
+        self.connections: Set[Tuple[str, int]] = set()
+
+
+class TestAdminClient(KazooTestCase):
+    def _get_admin(
+        self,
+        hosts: Optional[str] = None,
+        timeout: float = 10.0,
+        admin_port: int = 8080,
+    ) -> "AdminClient":
+        from kazoo.admin import AdminClient
+
+        admin = AdminClient(
+            hosts or self.hosts, timeout=timeout, admin_port=admin_port
+        )
+        self.addCleanup(admin.close)
+        return admin
+
+    def test_query(self) -> None:
+        admin = self._get_admin()
+        client = self.client
+        assert client is not None
+        client.ensure_path("/watched")
+        client.get("/watched", watch=lambda event: None)
+
+        results = _successes(admin.mntr())
+        assert set(results) == set(client.hosts)
+        assert any(r["zk_num_alive_connections"] for r in results.values())
+        for stats in _successes(admin.srvr()).values():
+            assert stats["mode"] in ("leader", "follower", "standalone")
+            assert isinstance(stats["zxid"], int)
+        server = client._connection._server
+        assert _successes(admin.stat())[server]["clients"]
+        ports = [c["port"] for c in _successes(admin.cons())[server]]
+        assert client._connection._socket.getsockname()[1] in ports
+        assert _successes(admin.wchs())[server]["watches"] >= 1
+        assert "zookeeper.version" in _successes(admin.envi())[server]
+        assert set(admin.query(b"ruok").values()) == {"imok"}
+
+    def test_unreachable_server(self) -> None:
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        assert self.client is not None
+        server = self.client._connection._server
+        admin = self._get_admin(
+            "%s:%d,127.0.0.1:%d" % (server[0], server[1], port), timeout=2
+        )
+        results = admin.query("ruok")
+        assert results[server] == "imok"
+        assert isinstance(results[("127.0.0.1", port)], OSError)
+
+    def test_admin_server(self) -> None:
+        httpd = _AdminServer()
+        thread = threading.Thread(target=httpd.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+
+        admin = self._get_admin(
+            "127.0.0.1:2181", admin_port=httpd.server_address[1]
+        )
+        server = ("127.0.0.1", 2181)
+        assert admin.admin_command(server, "monitor") == {
+            "command": "monitor",
+            "error": None,
+        }
+        results = _successes(admin.admin_query("connections", limit=5))
+        assert results[server]["command"] == "connections?limit=5"
+        # The connection is kept across the commands
+        assert len(httpd.connections) == 1
+        with pytest.raises(http.client.HTTPException):
+            admin.admin_command(server, "unknown")
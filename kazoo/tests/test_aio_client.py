@@ -0,0 +1,151 @@
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+import uuid
+
+import pytest
+
+from kazoo.aio import AioKazooClient
+from kazoo.exceptions import LockTimeout, NoNodeError
+from kazoo.recipe.cache import TreeEvent
+from kazoo.testing import KazooTestCase
+
+
+class TestAioClient(KazooTestCase):
+    def _get_aio_client(self) -> AioKazooClient:
+        return AioKazooClient(self.hosts)
+
+    def _run(self, coro_func: Callable[[], Awaitable[None]]) -> None:
+        asyncio.run(asyncio.wait_for(coro_func(), 30))
+
+    async def _crud(self, client: AioKazooClient) -> None:
+        await client.start()
+        path = "/" + uuid.uuid4().hex
+        assert await client.create(path + "/a", b"a", makepath=True) == (
+            path + "/a"
+        )
+        data, stat = await client.get(path + "/a")
+        assert data == b"a"
+        stat = await client.set(path + "/a", b"b", version=stat.version)
+        assert stat.version == 1
+        exists = await client.exists(path + "/a")
+        assert exists is not None and exists.version == 1
+        assert await client.exists(path + "/b") is None
+        await asyncio.gather(
+            *[client.create(path + "/n", sequence=True) for _ in range(10)]
+        )
+        assert len(await client.get_children(path)) == 11
+        with pytest.raises(NoNodeError):
+            await client.get(path + "/b")
+        await client.delete(path, recursive=True)
+        assert await client.exists(path) is None
+        await client.stop()
+        client.close()
+
+    def test_crud(self) -> None:
+        async def run() -> None:
+            await self._crud(self._get_aio_client())
+
+        self._run(run)
+
+    def test_crud_threading_handler(self) -> None:
+        async def run() -> None:
+            await self._crud(AioKazooClient(client=self._get_client()))
+
+        self._run(run)
+
+    def test_transaction(self) -> None:
+        async def run() -> None:
+            client = self._get_aio_client()
+            await client.start()
+            async with client.transaction() as tx:
+                tx.create("/fred", b"1")
+                tx.create("/fred/smith")
+            tx = client.transaction()
+            tx.check("/fred", 0)
+            tx.delete("/fred/smith")
+            results = await tx.commit()
+            assert results == [True, True]
+            with pytest.raises(TypeError):
+                with client.transaction():
+                    pass
+            await client.stop()
+            client.close()
+
+        self._run(run)
+
+    def test_lock(self) -> None:
+        async def run() -> None:
+            client = self._get_aio_client()
+            await client.start()
+            lock = client.Lock("/lock", "one")
+            other = client.Lock("/lock", "two")
+            assert await lock.acquire()
+            assert not await other.acquire(blocking=False)
+            with pytest.raises(LockTimeout):
+                await other.acquire(timeout=0.1)
+            waiting = asyncio.ensure_future(other.acquire())
+            await asyncio.sleep(0.1)
+            assert not waiting.done()
+            assert await lock.contenders() == ["one", "two"]
+            await lock.release()
+            assert await waiting
+            await other.release()
+            async with lock:
+                assert await lock.contenders() == ["one"]
+            assert not lock.is_acquired
+            await client.stop()
+            client.close()
+
+        self._run(run)
+
+    def test_watchers(self) -> None:
+        async def run() -> None:
+            client = self._get_aio_client()
+            await client.start()
+            await client.ensure_path("/watched")
+            data_calls: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+            children_calls: "asyncio.Queue[List[str]]" = asyncio.Queue()
+
+            @client.DataWatch("/watched")
+            async def data_changed(
+                data: Optional[bytes], stat: object
+            ) -> None:
+                await data_calls.put(data)
+
+            @client.ChildrenWatch("/watched")
+            def children_changed(children: List[str]) -> None:
+                children_calls.put_nowait(sorted(children))
+
+            assert await data_calls.get() == b""
+            assert await children_calls.get() == []
+            await client.set("/watched", b"new")
+            await client.create("/watched/child")
+            assert await data_calls.get() == b"new"
+            assert await children_calls.get() == ["child"]
+            await client.stop()
+            client.close()
+
+        self._run(run)
+
+    def test_tree_cache(self) -> None:
+        async def run() -> None:
+            client = self._get_aio_client()
+            await client.start()
+            await client.create("/tree/a", b"a", makepath=True)
+            events: "asyncio.Queue[TreeEvent]" = asyncio.Queue()
+            cache = client.TreeCache("/tree")
+            cache.listen(events.put_nowait)
+            await cache.start()
+            while (await events.get()).event_type != TreeEvent.INITIALIZED:
+                pass
+            node = cache.get_data("/tree/a")
+            assert node is not None and node.data == b"a"
+            await client.set("/tree/a", b"b")
+            event = await events.get()
+            assert event.event_type == TreeEvent.NODE_UPDATED
+            assert event.event_data.data == b"b"
+            cache.close()
+            await client.stop()
+            client.close()
+
+        self._run(run)
@@ -0,0 +1,410 @@
+import asyncio
+import socket
+import threading
+import time
+from typing import TYPE_CHECKING, Coroutine, List, Tuple, TypeVar, cast
+import unittest
+
+import pytest
+
+from kazoo.client import KazooClient
+from kazoo.exceptions import ConfigurationError, NoNodeError
+from kazoo.protocol.aioconnection import AsyncioConnectionHandler
+from kazoo.protocol.states import Callback, KazooState, WatchedEvent
+from kazoo.testing import KazooTestCase
+from kazoo.tests import test_client, test_connection
+from kazoo.tests.util import wait
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from kazoo.handlers.asyncio import AsyncioHandler, AsyncResult
+
+    _TestCase = KazooTestCase
+else:
+    _TestCase = object
+
+_T = TypeVar("_T")
+
+
+class LoopThread(object):
+    """An event loop running in a background thread"""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(
+        self, coro: Coroutine[object, object, _T], timeout: float = 10
+    ) -> _T:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(
+            timeout
+        )
+
+    def close(self) -> None:
+        async def cancel() -> None:
+            tasks = asyncio.all_tasks() - {asyncio.current_task()}
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.run(cancel())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+class TestAsyncioHandler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.loop_thread = LoopThread()
+        self.loop = self.loop_thread.loop
+
+    def tearDown(self) -> None:
+        self.loop_thread.close()
+
+    def _makeOne(self) -> "AsyncioHandler":
+        from kazoo.handlers.asyncio import AsyncioHandler
+
+        return AsyncioHandler(loop=self.loop)
+
+    def test_default_loop(self) -> None:
+        from kazoo.handlers.asyncio import AsyncioHandler
+
+        async def make() -> AsyncioHandler:
+            return AsyncioHandler()
+
+        assert self.loop_thread.run(make()).loop is self.loop
+        with pytest.raises(RuntimeError):
+            AsyncioHandler()
+
+    def test_exception_raising(self) -> None:
+        h = self._makeOne()
+
+        with pytest.raises(h.timeout_exception):
+            raise h.timeout_exception("This is a timeout")
+
+    def test_dispatch_on_loop(self) -> None:
+        h = self._makeOne()
+        h.start()
+        threads = []
+        ev = threading.Event()
+
+        def func(arg: str) -> None:
+            threads.append(threading.current_thread())
+            ev.set()
+            raise ValueError(arg)
+
+        h.dispatch_callback(Callback("watch", func, ("bang",)))
+        assert ev.wait(5)
+        assert threads == [self.loop_thread.thread]
+
+    def test_spawn(self) -> None:
+        h = self._makeOne()
+        ev = threading.Event()
+
+        async def coro() -> None:
+            ev.set()
+
+        cast("Future[None]", h.spawn(coro)).result(5)
+        assert ev.is_set()
+        ev.clear()
+        cast(threading.Thread, h.spawn(ev.set)).join(5)
+        assert ev.is_set()
+
+    def test_async_result_get(self) -> None:
+        h = self._makeOne()
+        h.start()
+        result = h.async_result()
+        with pytest.raises(h.timeout_exception):
+            result.get(timeout=0.01)
+        with pytest.raises(h.timeout_exception):
+            result.get_nowait()
+
+        self.loop.call_soon_threadsafe(result.set, 42)
+        assert result.get(timeout=5) == 42
+        assert result.successful()
+
+        result = h.async_result()
+        result.set_exception(NoNodeError())
+        assert result.wait()
+        with pytest.raises(NoNodeError):
+            result.get()
+
+    def test_async_result_rawlink(self) -> None:
+        h = self._makeOne()
+        h.start()
+        result = h.async_result()
+        calls: List[Tuple[threading.Thread, object]] = []
+        ev = threading.Event()
+
+        def callback(res: "AsyncResult") -> None:
+            calls.append((threading.current_thread(), res.get_nowait()))
+            ev.set()
+
+        result.rawlink(callback)
+        result.unlink(callback)
+        result.set("removed")
+        ev.wait(0.1)
+        assert calls == []
+
+        result = h.async_result()
+        result.rawlink(callback)
+        result.set("value")
+        assert ev.wait(5)
+        assert calls == [(self.loop_thread.thread, "value")]
+
+        # Linking a ready result dispatches it
+        ev.clear()
+        result.rawlink(lambda res: ev.set())
+        assert ev.wait(5)
+
+    def test_async_result_await(self) -> None:
+        h = self._makeOne()
+        h.start()
+        result = h.async_result()
+        failed = h.async_result()
+
+        async def wait() -> Tuple[object, object]:
+            self.loop.call_later(0.01, result.set, "value")
+            self.loop.call_later(0.01, failed.set_exception, NoNodeError())
+            values = await asyncio.gather(result, result)
+            with pytest.raises(NoNodeError):
+                await failed
+            return values, await result
+
+        assert self.loop_thread.run(wait()) == (["value", "value"], "value")
+
+    def test_blocking_on_loop(self) -> None:
+        h = self._makeOne()
+        h.start()
+        result = h.async_result()
+
+        async def block() -> None:
+            result.get()
+
+        with pytest.raises(RuntimeError):
+            self.loop_thread.run(block())
+
+    def test_no_sasl(self) -> None:
+        with pytest.raises(ConfigurationError):
+            KazooClient(
+                handler=self._makeOne(),
+                sasl_options={"mechanism": "DIGEST-MD5"},
+            )
+
+
+class AsyncioClientMixin(_TestCase):
+    def setUp(self) -> None:
+        self.loop_thread = LoopThread()
+        super(AsyncioClientMixin, self).setUp()
+
+    def tearDown(self) -> None:
+        super(AsyncioClientMixin, self).tearDown()
+        self.loop_thread.close()
+
+    def _makeOne(self) -> "AsyncioHandler":
+        from kazoo.handlers.asyncio import AsyncioHandler
+
+        return AsyncioHandler(loop=self.loop_thread.loop)
+
+    def _get_client(self, **kwargs: object) -> KazooClient:
+        kwargs["handler"] = self._makeOne()
+        return KazooClient(self.hosts, **kwargs)
+
+    @staticmethod
+    def _handler(client: KazooClient) -> "AsyncioHandler":
+        from kazoo.handlers.asyncio import AsyncioHandler
+
+        return cast(AsyncioHandler, client.handler)
+
+    @staticmethod
+    def _connection(client: KazooClient) -> AsyncioConnectionHandler:
+        return cast(AsyncioConnectionHandler, client._connection)
+
+
+class TestBasicAsyncioClient(AsyncioClientMixin, KazooTestCase):
+    def test_coroutines(self) -> None:
+        client = self._get_client()
+        handler = self._handler(client)
+        states: List[str] = []
+        client.add_listener(states.append)
+
+        async def run() -> Tuple[bytes, List[List[str]]]:
+            await handler.start_client(client)
+            await client.create_async("/anode", b"fred")
+            data, stat = await client.get_async("/anode")
+            children = await asyncio.gather(
+                *[client.get_children_async("/") for _ in range(100)]
+            )
+            await handler.stop_client(client)
+            client.close()
+            return data, children
+
+        data, children = self.loop_thread.run(run())
+        assert data == b"fred"
+        assert all("anode" in c for c in children)
+        assert states == [KazooState.CONNECTED, KazooState.LOST]
+
+    def test_watch_on_loop(self) -> None:
+        client = self._get_client()
+        handler = self._handler(client)
+
+        async def run() -> List[WatchedEvent]:
+            await handler.start_client(client)
+            fired = asyncio.Event()
+            events = []
+
+            def watch(event: WatchedEvent) -> None:
+                events.append(event)
+                fired.set()
+
+            await client.exists_async("/watched", watch=watch)
+            await client.create_async("/watched")
+            await asyncio.wait_for(fired.wait(), 5)
+            await handler.stop_client(client)
+            client.close()
+            return events
+
+        (event,) = self.loop_thread.run(run())
+        assert event.path == "/watched"
+
+    def test_connect_race(self) -> None:
+        client = self._get_client(
+            randomize_hosts=False, connect_attempt_delay=0.05
+        )
+        # An unreachable host is tried first
+        assert client.hosts is not None
+        client.hosts.insert(0, ("127.0.0.1", 1))
+        connection = self._connection(client)
+        open_transport = connection._open_transport
+
+        async def _open_transport(hostip: str, port: int) -> asyncio.Transport:
+            if port == 1:
+                await asyncio.sleep(10)
+            return await open_transport(hostip, port)
+
+        connection._open_transport = _open_transport  # type: ignore
+        start = time.monotonic()
+        client.start(timeout=5)
+        assert time.monotonic() - start < 5
+        assert client.exists("/") is not None
+        client.stop()
+        client.close()
+
+    def test_move_session(self) -> None:
+        client = self._get_client(randomize_hosts=False, rebalance_interval=60)
+        connection = self._connection(client)
+        rebalancer = connection._rebalancer
+        assert rebalancer is not None and client.hosts is not None
+        rebalancer.next_poll = time.monotonic() + 60
+        client.start()
+        target = client.hosts[1]
+        client.ensure_path("/moved")
+        states: List[str] = []
+        client.add_listener(states.append)
+        ev = threading.Event()
+        client.get("/moved", watch=lambda event: ev.set())
+
+        rebalancer.move_to, rebalancer.move_at = target, time.monotonic()
+        wait(lambda: connection._server == target, timeout=10)
+        assert states == []
+        client.set("/moved", b"value")
+        assert ev.wait(5)
+        client.stop()
+        client.close()
+
+    def test_dns_cache(self) -> None:
+        client = self._get_client(dns_cache_ttl=60)
+        connection = self._connection(client)
+        resolve = connection._resolve
+        resolver = connection._resolver
+        hosts = client.hosts
+        assert resolver is not None and hosts is not None
+        calls = []
+
+        async def _resolve(host: str, port: int) -> List[Tuple[str, int]]:
+            calls.append((host, port))
+            if len(calls) > len(hosts):
+                raise socket.gaierror("resolver down")
+            return await resolve(host, port)
+
+        connection._resolve = _resolve  # type: ignore
+        client.start()
+        client.stop()
+        for key in resolver.expires:
+            resolver.expires[key] = 0
+        client.start()
+        assert client.exists("/") is not None
+        wait(lambda: len(calls) == 2 * len(hosts))
+        client.stop()
+        client.close()
+
+    def test_blocking_calls_from_threads(self) -> None:
+        client = self._get_client()
+        client.start()
+        client.ensure_path("/some/node")
+        ev = threading.Event()
+
+        client.get("/some/node", watch=lambda event: ev.set())
+        client.set("/some/node", b"newvalue")
+        assert ev.wait(5)
+        assert client.get("/some/node")[0] == b"newvalue"
+        client.stop()
+        client.close()
+
+
+class TestAsyncioFollowConfig(test_connection.TestFollowConfig):
+    def setUp(self) -> None:
+        self.loop_thread = LoopThread()
+        super(TestAsyncioFollowConfig, self).setUp()
+
+    def tearDown(self) -> None:
+        super(TestAsyncioFollowConfig, self).tearDown()
+        self.loop_thread.close()
+
+    def _client(self, hosts: object = None, **kwargs: object) -> KazooClient:
+        from kazoo.handlers.asyncio import AsyncioHandler
+
+        kwargs["handler"] = AsyncioHandler(loop=self.loop_thread.loop)
+        client: KazooClient = super(TestAsyncioFollowConfig, self)._client(
+            hosts, **kwargs
+        )
+        return client
+
+    def _update_hosts(
+        self,
+        connection: AsyncioConnectionHandler,
+        old_hosts: List[Tuple[str, int]],
+        new_hosts: List[Tuple[str, int]],
+    ) -> None:
+        # The hosts are resolved on the loop
+        self.loop_thread.run(connection._update_hosts(old_hosts, new_hosts))
+
+
+class TestAsyncioClient(AsyncioClientMixin, test_client.TestClient):
+    pass
+
+
+class TestAsyncioFutures(AsyncioClientMixin, KazooTestCase):
+    def test_futures(self) -> None:
+        client = self._get_client()
+        client.start()
+        client.ensure_path("/futures")
+
+        futures = [
+            client.exists_async("/futures").as_future() for _ in range(10)
+        ]
+        assert all(future.result(5).version == 0 for future in futures)
+
+        async def gather() -> List[List[str]]:
+            futures: List["asyncio.Future[List[str]]"] = [
+                client.get_children_async("/").as_asyncio_future()
+                for _ in range(1000)
+            ]
+            return await asyncio.gather(*futures)
+
+        assert all("futures" in c for c in asyncio.run(gather()))
+        client.stop()
+        client.close()
@@ -0,0 +1,204 @@
+import json
+import subprocess
+import sys
+import unittest
+from typing import Set
+
+import pytest
+
+from kazoo.bench import percentile, summarize
+from kazoo.bench.__main__ import main
+from kazoo.bench.load import WORKLOADS, LoadBenchmark, LoadDocument
+from kazoo.testing.fakeserver import FakeZooKeeperCluster
+
+
+class TestStatistics(unittest.TestCase):
+    def test_percentile(self) -> None:
+        values = list(range(1, 1001))
+        assert percentile(values, 0.5) == 500
+        assert percentile(values, 0.99) == 990
+        assert percentile(values, 0.999) == 999
+        assert percentile(values, 1.0) == 1000
+        assert percentile([7], 0.999) == 7
+        assert percentile([], 0.5) is None
+
+    def test_summarize(self) -> None:
+        summary = summarize([0.001, 0.002, 0.003, 0.004], 2.0, errors=1)
+        assert summary["count"] == 4
+        assert summary["errors"] == 1
+        assert summary["ops_per_sec"] == 2.0
+        assert summary["mean_ms"] == 2.5
+        assert summary["p50_ms"] == 2.0
+        assert summary["max_ms"] == 4.0
+
+    def test_summarize_empty(self) -> None:
+        summary = summarize([], 1.0, errors=3)
+        assert summary["count"] == 0
+        assert summary["p99_ms"] is None
+
+
+class TestLoadBenchmark(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cluster = FakeZooKeeperCluster(size=1)
+        self.cluster.start()
+
+    def tearDown(self) -> None:
+        self.cluster.terminate()
+
+    def _run(
+        self,
+        workload: str,
+        write_ratio: float = 0.0,
+        handler: str = "threading",
+    ) -> LoadDocument:
+        return LoadBenchmark(
+            self.cluster.hosts,
+            workload=workload,
+            clients=2,
+            concurrency=2,
+            duration=0.3,
+            warmup=0.05,
+            handler=handler,
+            keys=5,
+            write_ratio=write_ratio,
+        ).run()
+
+    def test_workloads(self) -> None:
+        expected = {
+            "read": {"get"},
+            "churn": {"create", "delete"},
+            "watch": {"set", "notify"},
+            "lock": {"acquire", "release"},
+            "queue": {"put", "get"},
+        }
+        for workload in WORKLOADS:
+            document = self._run(workload)
+            results = document["results"]
+            assert set(results) == expected[workload], workload
+            for result in results.values():
+                assert result["count"] > 0
+                assert result["errors"] == 0
+                p50, p999 = result["p50_ms"], result["p999_ms"]
+                assert p50 is not None and p999 is not None
+                assert p50 <= p999
+
+    def test_loop_handlers(self) -> None:
+        for handler in ("asyncio", "reactor"):
+            document = self._run("watch", handler=handler)
+            assert document["config"]["handler"] == handler
+            results = document["results"]
+            assert set(results) == {"set", "notify"}, handler
+            assert all(r["count"] > 0 for r in results.values())
+            assert all(r["errors"] == 0 for r in results.values())
+
+    def test_write_ratio(self) -> None:
+        document = self._run("read", write_ratio=0.5)
+        assert set(document["results"]) == {"get", "set"}
+
+    def test_cleanup(self) -> None:
+        bench = LoadBenchmark(
+            self.cluster.hosts, clients=1, concurrency=1, duration=0.1
+        )
+        bench.run()
+        tree = self.cluster.tree
+        assert bench.path not in tree.nodes
+
+    def test_unknown_workload(self) -> None:
+        with pytest.raises(ValueError):
+            LoadBenchmark(self.cluster.hosts, workload="bogus")
+
+
+class TestCommandLine(unittest.TestCase):
+    def test_json_export(self) -> None:
+        import tempfile
+
+        with tempfile.NamedTemporaryFile(suffix=".json") as fh:
+            rc = main(
+                [
+                    "load",
+                    "--servers=1",
+                    "--clients=1",
+                    "--concurrency=1",
+                    "--duration=0.2",
+                    "--warmup=0",
+                    "--json",
+                    fh.name,
+                ]
+            )
+            assert rc == 0
+            document = json.load(open(fh.name))
+        assert document["benchmark"] == "load"
+        assert document["config"]["workload"] == "read"
+        assert "get" in document["results"]
+        assert "python" in document["environment"]
+
+    def test_json_to_stdout(self) -> None:
+        process = subprocess.run(
+            [sys.executable, "-m", "kazoo.bench", "load"]
+            + ["--servers=1", "--clients=1", "--concurrency=1"]
+            + ["--duration=0.1", "--warmup=0", "--json", "-"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+        assert json.loads(process.stdout)["benchmark"] == "load"
+        assert b"ops/s" in process.stderr
+
+
+class TestSerializationBenchmark(unittest.TestCase):
+    def test_covers_every_type(self) -> None:
+        from kazoo.bench import serialization as bench
+        from kazoo.protocol import serialization
+
+        serialized: Set[object] = {
+            type(req) for _, req in bench.serialize_cases()
+        }
+        deserialized: Set[object] = {
+            response if isinstance(response, type) else type(response)
+            for _, response, _ in bench.deserialize_cases()
+        }
+        for name in dir(serialization):
+            obj = getattr(serialization, name)
+            if isinstance(obj, type) and issubclass(obj, tuple):
+                if obj.__dict__.get("serialize") and obj not in (
+                    serialization.Close,
+                    serialization.Ping,
+                ):
+                    assert obj in serialized, name
+                if obj.__dict__.get("deserialize"):
+                    assert obj in deserialized, name
+
+    def test_run(self) -> None:
+        from kazoo.bench import serialization as bench
+
+        document = bench.run("GetChildren\\[10\\]|Transaction\\[4\\]", 0.001)
+        names = [result["name"] for result in document["results"]]
+        assert names == [
+            "serialize Transaction[4]",
+            "deserialize GetChildren[10]",
+            "deserialize Transaction[4]",
+        ]
+        for result in document["results"]:
+            assert result["ns_per_op"] > 0
+            assert result["alloc_blocks"] >= 1
+            assert result["peak_bytes"] > 0
+
+    def test_lazy_stat(self) -> None:
+        from kazoo.bench import serialization as bench
+
+        document = bench.run("GetData\\[(eager|lazy) stat\\]", 0.001)
+        eager, lazy = document["results"]
+        assert eager["name"] == "deserialize GetData[eager stat]"
+        assert lazy["name"] == "deserialize GetData[lazy stat]"
+        assert lazy["alloc_bytes"] < eager["alloc_bytes"]
+
+
+class TestImportsBenchmark(unittest.TestCase):
+    def test_run(self) -> None:
+        from kazoo.bench import imports
+
+        document = imports.run(["kazoo.client:KazooClient()"], repeat=2)
+        (result,) = document["results"]
+        assert result["min_ms"] > 0
+        assert "kazoo.client" in result["kazoo_modules"]
+        assert "kazoo.recipe.lock" not in result["kazoo_modules"]
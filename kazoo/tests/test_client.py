@@ -131,6 +131,36 @@ class TestClientConstructor(unittest.TestCase):
         assert client._retry.max_tries == 99
         assert client._conn_retry.delay == 99
 
+    def test_recipes_bound_lazily(self):
+        from kazoo.recipe.lock import Lock
+
+        client = self._makeOne()
+        assert "Lock" not in client.__dict__
+        bound = client.Lock
+        assert bound.func is Lock
+        assert bound.args == (client,)
+        assert client.Lock is bound
+        assert self._makeOne().Lock is not bound
+
+    def test_recipes_module_attributes(self):
+        import kazoo.client
+        from kazoo.recipe.watchers import DataWatch
+
+        assert kazoo.client.DataWatch is DataWatch
+        with pytest.raises(AttributeError):
+            kazoo.client.NoSuchRecipe
+
+    def test_import_is_lazy(self):
+        import subprocess
+
+        code = (
+            "import sys, kazoo.client; kazoo.client.KazooClient(); "
+            "print(sorted(m for m in ('ssl', 'puresasl', 'kazoo.recipe') "
+            "if m in sys.modules))"
+        )
+        output = subprocess.check_output([sys.executable, "-c", code])
+        assert output.decode().strip() == "[]"
+
 
 class TestAuthentication(KazooTestCase):
     def _makeAuth(self, *args, **kwargs):
@@ -631,6 +661,49 @@ class TestClient(KazooTestCase):
         with pytest.raises(ConnectionLoss):
             self.client.server_version()
 
+    def test_prepare_create(self):
+        client = self.client
+        client.create("/queue")
+        entries = client.prepare_create("/queue/entry-", sequence=True)
+        assert entries.create(b"first") == "/queue/entry-0000000000"
+        assert entries.create(suffix="x-") == "/queue/entry-x-0000000001"
+        assert entries.create_async(None).get() == "/queue/entry-0000000002"
+        assert client.get("/queue/entry-0000000000")[0] == b"first"
+        assert client.get("/queue/entry-0000000002")[0] is None
+
+        nodes = client.prepare_create(
+            "/queue/", ephemeral=True, include_data=True
+        )
+        path, stat = nodes.create(b"node", suffix="node")
+        assert path == "/queue/node"
+        assert stat.ephemeralOwner == client.client_id[0]
+        with pytest.raises(NodeExistsError):
+            nodes.create(suffix="node")
+
+        results = []
+        ev = threading.Event()
+
+        def callback(result, exception):
+            results.append((result, exception))
+            ev.set()
+
+        nodes.create_nowait(suffix="other", callback=callback)
+        assert ev.wait(10)
+        ((path, stat), exception) = results[0]
+        assert path == "/queue/other" and exception is None
+
+    def test_prepare_create_invalid_arguments(self):
+        client = self.client
+        with pytest.raises(TypeError):
+            client.prepare_create(("a",))
+        with pytest.raises(TypeError):
+            client.prepare_create("/a", include_data="yes")
+        prepared = client.prepare_create("/a")
+        with pytest.raises(TypeError):
+            prepared.create(suffix=1)
+        with pytest.raises(TypeError):
+            prepared.create("value")
+
     def test_create_ephemeral(self):
         client = self.client
         client.create("/1", b"ephemeral", ephemeral=True)
@@ -707,6 +780,54 @@ class TestClient(KazooTestCase):
             alt_client.delete("/", recursive=True)
             alt_client.stop()
 
+    def test_gather(self):
+        from kazoo.handlers.utils import gather
+
+        client = self.client
+        for i in range(10):
+            client.create("/gather/%d" % i, b"%d" % i, makepath=True)
+        results = [client.get_async("/gather/%d" % i) for i in range(11)]
+        values = gather(results, timeout=10)
+        assert [data for data, stat in values[:10]] == [
+            b"%d" % i for i in range(10)
+        ]
+        assert isinstance(values[10], NoNodeError)
+
+    def test_nowait(self):
+        client = self.client
+        outcomes = []
+        done = threading.Event()
+
+        def callback(value, exception):
+            outcomes.append((value, exception))
+            if len(outcomes) == 5:
+                done.set()
+
+        client.create_nowait("/nowait", b"a", callback=callback)
+        client.set_nowait("/nowait", b"b")
+        client.get_nowait("/nowait", callback=callback)
+        client.get_children_nowait("/", callback=callback)
+        client.delete_nowait("/nowait", callback=callback)
+        client.exists_nowait("/nowait", callback=callback)
+        assert done.wait(10)
+        assert outcomes[0] == ("/nowait", None)
+        assert outcomes[1][0][0] == b"b"
+        assert "nowait" in outcomes[2][0]
+        assert outcomes[3:] == [(True, None), (None, None)]
+
+        errors = []
+        failed = threading.Event()
+
+        def errback(value, exception):
+            errors.append(exception)
+            failed.set()
+
+        client.get_nowait("/nowait", callback=errback)
+        assert failed.wait(10)
+        assert isinstance(errors[0], NoNodeError)
+        with pytest.raises(TypeError):
+            client.set_nowait("/nowait", b"b", callback=1)
+
     def test_create_no_makepath(self):
         with pytest.raises(NoNodeError):
             self.client.create("/1/2", b"val1")
@@ -761,6 +882,54 @@ class TestClient(KazooTestCase):
         assert newstat.children_count == stat.numChildren
         assert newstat.children_version == stat.cversion
 
+    def test_get_zero_copy(self):
+        client = self.client
+        value = os.urandom(256 * 1024)
+        client.create("/large", value)
+        client.create("/empty")
+
+        data, stat = client.get("/large", zero_copy=True)
+        assert isinstance(data, memoryview)
+        assert data.readonly
+        assert data == value
+        assert stat.dataLength == len(value)
+
+        data, stat = client.get_async("/empty", zero_copy=True).get()
+        assert data == b""
+        assert client.get("/large")[0] == value
+
+    def test_lazy_stats(self):
+        from kazoo.protocol.states import LazyZnodeStat
+
+        path = "/" + uuid.uuid4().hex
+        self.client.create(path, b"value")
+        self.client.create(path + "/child")
+        client = self._get_client(lazy_stats=True)
+        client.start()
+        try:
+            data, stat = client.get(path)
+            assert isinstance(stat, LazyZnodeStat)
+            assert stat.version == 0
+            assert stat.numChildren == stat.children_count == 1
+            assert stat.dataLength == len(data)
+            expected = self.client.get(path)[1]
+            assert stat == expected
+            assert stat.decode() is stat.decode()
+            assert tuple(stat) == expected
+            assert stat[4] == expected.version
+            assert hash(stat) == hash(expected)
+            assert repr(stat) == repr(expected)
+
+            new_stat = client.set(path, b"new value")
+            assert new_stat.version == 1
+            assert new_stat != stat
+            assert client.exists(path) == new_stat
+            assert client.exists(path + "/missing") is None
+            children, stat = client.get_children(path, include_data=True)
+            assert stat == new_stat
+        finally:
+            client.stop()
+
     def test_get_invalid_arguments(self):
         client = self.client
         with pytest.raises(TypeError):
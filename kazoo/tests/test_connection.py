@@ -1,15 +1,23 @@
 from collections import namedtuple, deque
+import contextlib
 import os
 import threading
 import time
 import uuid
+import unittest
+from unittest import mock
 from unittest.mock import patch
 import struct
 import sys
 
 import pytest
 
-from kazoo.exceptions import ConnectionLoss
+from kazoo.client import KazooClient
+from kazoo.exceptions import (
+    ConfigurationError,
+    ConnectionDropped,
+    ConnectionLoss,
+)
 from kazoo.protocol.serialization import (
     Connect,
     int_struct,
@@ -177,6 +185,44 @@ class TestConnectionHandler(KazooTestCase):
         assert ev.is_set()
         assert client.exists(path) is None
 
+    def test_scatter_gather_write(self):
+        client = self.client
+        connection = client._connection
+        value = os.urandom(512 * 1024)
+        writes = []
+        _write_buffers = connection._write_buffers
+
+        def write_buffers(buffers, timeout):
+            writes.append(list(buffers))
+            return _write_buffers(buffers, timeout)
+
+        with patch.object(connection, "_write_buffers", write_buffers):
+            client.create("/large", value)
+            client.set("/large", value[::-1])
+
+        # The values are written from the caller's bytes, not copies
+        assert [buffers[1] for buffers in writes[-2:]] == [value, value[::-1]]
+        assert writes[-2][1] is value
+        assert client.get("/large")[0] == value[::-1]
+
+    def test_small_write_single_frame(self):
+        client = self.client
+        connection = client._connection
+        writes = []
+        _write_buffers = connection._write_buffers
+
+        def write_buffers(buffers, timeout):
+            writes.append(list(buffers))
+            return _write_buffers(buffers, timeout)
+
+        with patch.object(connection, "_write_buffers", write_buffers):
+            client.create("/small", b"value")
+            client.set("/small", b"other")
+
+        # Small values are copied into a single frame
+        assert [len(buffers) for buffers in writes[-2:]] == [1, 1]
+        assert client.get("/small")[0] == b"other"
+
     def test_connection_close(self):
         with pytest.raises(Exception):
             self.client.close()
@@ -232,6 +278,53 @@ class TestConnectionHandler(KazooTestCase):
         wait(lambda: client.handler.select([read_sock], [], [], 0)[0] == [])
 
 
+class TestDeserializeOffload(KazooTestCase):
+    def setUp(self):
+        self.setup_zookeeper(deserialize_threshold=1024)
+
+    def test_large_response_offloaded(self):
+        client = self.client
+        connection = client._connection
+        client.create("/big", b"x" * 4096)
+        client.create("/small", b"y")
+
+        threads = {}
+        _deserialize = connection._deserialize_response
+
+        def deserialize(request, *args):
+            threads[request.path] = threading.current_thread()
+            return _deserialize(request, *args)
+
+        completed = []
+        ev = threading.Event()
+
+        def done(name):
+            def callback(result):
+                completed.append(name)
+                if len(completed) == 3:
+                    ev.set()
+
+            return callback
+
+        with patch.object(connection, "_deserialize_response", deserialize):
+            big = client.get_async("/big")
+            exists = client.exists_async("/small")
+            small = client.get_async("/small")
+            big.rawlink(done("big"))
+            exists.rawlink(done("exists"))
+            small.rawlink(done("small"))
+            assert ev.wait(10)
+
+        assert big.get()[0] == b"x" * 4096
+        assert exists.get().version == 0
+        assert small.get()[0] == b"y"
+        # Responses complete in order, including the ones received
+        # while the large one was deserialized by the completion worker
+        assert completed == ["big", "exists", "small"]
+        routine = connection._connection_routine
+        assert threads[client.chroot + "/big"] is not routine
+
+
 class TestConnectionDrop(KazooTestCase):
     def test_connection_dropped(self):
         ev = threading.Event()
@@ -254,6 +347,452 @@ class TestConnectionDrop(KazooTestCase):
         assert ev.is_set()
 
 
+class TestConnectRace(KazooTestCase):
+    def _get_racing_client(self, create_connection, delay):
+        client = self._get_client(
+            randomize_hosts=False, connect_attempt_delay=delay
+        )
+        # An unreachable host is tried first
+        client.hosts.insert(0, ("127.0.0.1", 1))
+        connection = client._connection
+        create = connection._create_connection
+
+        def _create_connection(hostip, port):
+            if port == 1:
+                return create_connection()
+            return create(hostip, port)
+
+        connection._create_connection = _create_connection
+        return client
+
+    def test_staggered_attempts(self):
+        released = threading.Event()
+
+        def blackholed():
+            released.wait(10)
+            raise ConnectionDropped("blackholed")
+
+        client = self._get_racing_client(blackholed, 0.05)
+        start = time.monotonic()
+        client.start(timeout=5)
+        assert time.monotonic() - start < 5
+        assert client.connected
+        assert client.exists("/") is not None
+        released.set()
+        client.stop()
+
+    def test_failed_attempt(self):
+        def refused():
+            raise ConnectionDropped("refused")
+
+        # The next attempt starts as soon as the previous one fails
+        client = self._get_racing_client(refused, 30)
+        client.start(timeout=5)
+        assert client.connected
+        client.stop()
+
+
+class TestLatencyProber(unittest.TestCase):
+    def _makeOne(self, rtts=None):
+        from kazoo.protocol.connection import LatencyProber
+
+        prober = LatencyProber(None, lambda: contextlib.nullcontext(), 10)
+        prober.rtts.update(rtts or {})
+        return prober
+
+    def test_order(self):
+        prober = self._makeOne(
+            {("a", 1): 0.050, ("b", 1): 0.001, ("c", 1): 0.0015}
+        )
+        host_ports = [(h, h + "ip", 1) for h in "dcab"]
+        assert [hp[0] for hp in prober.order(host_ports)] == list("cbad")
+        assert sorted(prober.nearest()) == [("b", 1), ("c", 1)]
+
+    def test_closer(self):
+        prober = self._makeOne({("a", 1): 0.050, ("b", 1): 0.001})
+        assert prober.closer(("a", 1)) == ("b", 1)
+        assert prober.closer(("b", 1)) is None
+        # Unmeasured servers are kept
+        assert prober.closer(("c", 1)) is None
+        assert self._makeOne().closer(("a", 1)) is None
+
+    def test_probe(self):
+        prober = self._makeOne({("a", 1): 0.050, ("b", 1): 0.001})
+        sock = mock.Mock()
+
+        def connection(host, port):
+            if host == "b":
+                raise ConnectionDropped("refused")
+            return sock
+
+        prober.connection = connection
+        prober.probe([("a", 1), ("b", 1)])
+        sock.sendall.assert_called_once_with(b"isro")
+        assert sock.close.called
+        # Smoothed towards the measured time, unreachable servers dropped
+        assert list(prober.rtts) == [("a", 1)]
+        assert prober.rtts[("a", 1)] < 0.050
+        assert not prober.due()
+        assert prober.next_probe > time.monotonic() + 9
+
+
+class TestLatencyAwareClient(KazooTestCase):
+    def test_probe_servers(self):
+        client = self._get_client(timeout=1.5, latency_probe_interval=0.1)
+        client.start()
+        rtts = client._connection._latency.rtts
+        wait(lambda: len(rtts) == len(client.hosts), timeout=10)
+        assert set(rtts) == set(client.hosts)
+        client.stop()
+
+    def test_move_to_nearer_server(self):
+        client = self._get_client(
+            timeout=1.5, randomize_hosts=False, latency_probe_interval=60
+        )
+        host, port = client.hosts[0]
+        client.hosts.append(("localhost", port))
+        connection = client._connection
+        # Measured times only, don't probe
+        connection._latency.next_probe = time.monotonic() + 60
+
+        client.start()
+        assert connection._server == (host, port)
+        client.ensure_path("/moved")
+        states = []
+        client.add_listener(states.append)
+        events = []
+        client.get("/moved", watch=events.append)
+
+        connection._latency.rtts.update(
+            {(host, port): 0.1, ("localhost", port): 0.001}
+        )
+        wait(lambda: connection._server == ("localhost", port), timeout=10)
+        # The session moved without losing its connected state or watches
+        assert states == []
+        client.set("/moved", b"value")
+        wait(lambda: events, timeout=5)
+        assert events[0].path == "/moved"
+        client.stop()
+
+
+class TestSessionRebalancer(unittest.TestCase):
+    def _makeOne(self, reports=None):
+        from kazoo.protocol.connection import SessionRebalancer
+
+        def command(host, port, cmd):
+            report = reports[(host, port)]
+            if isinstance(report, Exception):
+                raise report
+            return report.get(cmd, "")
+
+        return SessionRebalancer(command, 10)
+
+    def test_connections(self):
+        rejected = "%s is not executed because it is not in the whitelist.\n"
+        cons = " /127.0.0.1:1[1](queued=0)\n /127.0.0.1:2[1](queued=0)\n\n"
+        rebalancer = self._makeOne(
+            {
+                ("a", 1): {
+                    b"mntr": "zk_version\t3.8\nzk_num_alive_connections\t7\n"
+                },
+                ("b", 1): {b"cons": cons},
+                ("c", 1): {b"mntr": rejected % "mntr", b"cons": cons},
+                ("d", 1): {
+                    b"mntr": rejected % "mntr",
+                    b"cons": rejected % "cons",
+                },
+            }
+        )
+        assert rebalancer.connections("a", 1) == 7
+        # Counted from cons when mntr isn't allowed
+        assert rebalancer.connections("b", 1) == 2
+        assert rebalancer.connections("c", 1) == 2
+        with pytest.raises(ConfigurationError):
+            rebalancer.connections("d", 1)
+
+        # Servers allowing neither are left out
+        rebalancer.poll([("a", 1), ("d", 1)], ("a", 1))
+        assert rebalancer.loads == {("a", 1): 7}
+
+    @mock.patch("random.random", return_value=0.0)
+    def test_poll(self, _):
+        mntr = "zk_num_alive_connections\t%d\n"
+        rebalancer = self._makeOne(
+            {
+                ("a", 1): {b"mntr": mntr % 20},
+                ("b", 1): {b"mntr": mntr % 2},
+                ("c", 1): {b"mntr": mntr % 5},
+                ("d", 1): ConnectionDropped("refused"),
+            }
+        )
+        hosts = [("a", 1), ("b", 1), ("c", 1), ("d", 1)]
+        rebalancer.poll(hosts, ("a", 1))
+        assert rebalancer.loads == {("a", 1): 20, ("b", 1): 2, ("c", 1): 5}
+        assert rebalancer.move_to == ("b", 1)
+        assert not rebalancer.due()
+        assert time.monotonic() <= rebalancer.move_at
+        assert rebalancer.move_at <= time.monotonic() + 10
+
+        # Only towards the candidates
+        rebalancer.poll(hosts, ("a", 1), candidates=[("a", 1), ("c", 1)])
+        assert rebalancer.move_to == ("c", 1)
+        # Balanced enough servers stay
+        rebalancer.poll(hosts, ("c", 1))
+        assert rebalancer.move_to is None
+        assert rebalancer.move() is None
+
+    @mock.patch("random.random", return_value=0.99)
+    def test_probabilistic_move(self, _):
+        rebalancer = self._makeOne()
+        rebalancer.loads = {("a", 1): 20, ("b", 1): 2, ("c", 1): 5}
+        # Only a share of the sessions move
+        rebalancer._plan(("a", 1), None)
+        assert rebalancer.move_to is None
+
+    def test_move(self):
+        rebalancer = self._makeOne()
+        rebalancer.move_to = ("b", 1)
+        rebalancer.move_at = time.monotonic() + 60
+        assert rebalancer.move() is None
+        rebalancer.move_at = time.monotonic()
+        assert rebalancer.move() == ("b", 1)
+        assert rebalancer.move() is None
+
+
+class TestRebalancingClient(KazooTestCase):
+    def test_poll_loads(self):
+        client = self._get_client(rebalance_interval=0.1)
+        client.start()
+        rebalancer = client._connection._rebalancer
+        wait(lambda: len(rebalancer.loads) == len(client.hosts), timeout=10)
+        assert rebalancer.loads[client._connection._server] >= 1
+        client.stop()
+
+    def test_move_to_less_loaded_server(self):
+        client = self._get_client(
+            timeout=1.5, randomize_hosts=False, rebalance_interval=60
+        )
+        connection = client._connection
+        rebalancer = connection._rebalancer
+        # Planned moves only, don't poll
+        rebalancer.next_poll = time.monotonic() + 60
+
+        client.start()
+        server = connection._server
+        target = client.hosts[1]
+        client.ensure_path("/moved")
+        states = []
+        client.add_listener(states.append)
+        events = []
+        client.get_children("/moved", watch=events.append)
+
+        set_watches_requests = connection._set_watches_requests
+
+        def changed_while_moving():
+            self.client.create("/moved/child")
+            return set_watches_requests()
+
+        connection._set_watches_requests = changed_while_moving
+        rebalancer.move_to, rebalancer.move_at = target, time.monotonic()
+        wait(lambda: connection._server == target, timeout=10)
+        assert server != target
+        assert states == []
+        # The watch was restored with the zxid seen before the change
+        wait(lambda: events, timeout=5)
+        assert events[0].path == "/moved"
+        assert client.get_children("/moved") == ["child"]
+        client.stop()
+
+
+class TestHostResolver(unittest.TestCase):
+    def test_cache(self):
+        from kazoo.protocol.connection import HostResolver
+
+        resolver = HostResolver(10)
+        assert resolver.get("a", 1) == (None, False)
+        resolver.update("a", 1, [("10.0.0.1", 1)])
+        assert resolver.get("a", 1) == ([("10.0.0.1", 1)], False)
+
+        resolver.expires[("a", 1)] = time.monotonic()
+        assert resolver.get("a", 1) == ([("10.0.0.1", 1)], True)
+        resolver.refreshing.add(("a", 1))
+        assert resolver.get("a", 1) == ([("10.0.0.1", 1)], False)
+
+        # The last known addresses are kept until the next refresh
+        resolver.refreshing.clear()
+        resolver.failed("a", 1)
+        assert resolver.get("a", 1) == ([("10.0.0.1", 1)], False)
+        resolver.failed("b", 1)
+        assert resolver.get("b", 1) == (None, False)
+
+
+class TestDnsCache(KazooTestCase):
+    def test_cached_hosts(self):
+        import socket
+
+        client = self._get_client(dns_cache_ttl=60)
+        connection = client._connection
+        connection._resolve = mock.Mock(wraps=connection._resolve)
+        client.start()
+        assert connection._resolve.call_count == len(client.hosts)
+        client.stop()
+        client.start()
+        assert connection._resolve.call_count == len(client.hosts)
+
+        # Expired addresses are used while they fail to resolve again
+        resolver = connection._resolver
+        for key in resolver.expires:
+            resolver.expires[key] = 0
+        connection._resolve.side_effect = socket.gaierror("resolver down")
+        client.stop()
+        client.start()
+        assert client.exists("/") is not None
+        wait(lambda: connection._resolve.call_count == 2 * len(client.hosts))
+        wait(lambda: not resolver.refreshing)
+        assert set(resolver.addresses) == set(client.hosts)
+        assert all(e > time.monotonic() for e in resolver.expires.values())
+        client.stop()
+
+
+class TestSSLContextCache(unittest.TestCase):
+    def test_reuse(self):
+        from kazoo.client import KazooClient
+
+        client = KazooClient(use_ssl=True, verify_certs=False)
+        connection = client._connection
+        client.handler.create_connection = mock.Mock()
+        with mock.patch(
+            "kazoo.protocol.connection.create_ssl_context"
+        ) as create_ssl_context:
+            connection._create_connection("127.0.0.1", 2181)
+            sock = client.handler.create_connection.return_value
+            connection._save_ssl_session("127.0.0.1", 2181, sock)
+            connection._create_connection("127.0.0.1", 2181)
+            connection._create_connection("127.0.0.1", 2182)
+        create_ssl_context.assert_called_once_with(
+            ca=None,
+            certfile=None,
+            keyfile=None,
+            keyfile_password=None,
+            verify_certs=False,
+        )
+        calls = client.handler.create_connection.call_args_list
+        assert [c[1]["ssl_session"] for c in calls] == [
+            None,
+            sock.session,
+            None,
+        ]
+        assert all(
+            c[1]["ssl_context"] is create_ssl_context.return_value
+            for c in calls
+        )
+        client.close()
+
+
+class TestReconfigTarget(unittest.TestCase):
+    def _target(self, old, new, server):
+        from kazoo.protocol.connection import reconfig_target
+
+        return reconfig_target(old, new, server)
+
+    def test_grown_ensemble(self):
+        with mock.patch("random.random", return_value=0.49):
+            # Half of the sessions move to the added servers
+            assert self._target("ab", "abcd", "a") in "cd"
+        with mock.patch("random.random", return_value=0.5):
+            assert self._target("ab", "abcd", "a") is None
+        assert self._target("abcd", "abc", "a") is None
+
+    def test_removed_server(self):
+        assert self._target("abc", "ab", "c") in "ab"
+        assert self._target("ab", "cd", "a") in "cd"
+        # The remaining servers already have their share
+        assert self._target("abc", "bcd", "a") == "d"
+        with mock.patch("random.random", return_value=0.33):
+            # A third of the sessions go to the remaining servers
+            assert self._target("abcd", "cde", "a") in "cd"
+        with mock.patch("random.random", return_value=0.34):
+            assert self._target("abcd", "cde", "a") == "e"
+        assert self._target("ab", "", "a") is None
+
+
+class TestFollowConfig(unittest.TestCase):
+    def setUp(self) -> None:
+        from kazoo.testing.fakeserver import (
+            FakeZooKeeperCluster,
+            FakeZooKeeperServer,
+        )
+
+        self.cluster = FakeZooKeeperCluster(size=2)
+        self.cluster.start()
+        self.added = FakeZooKeeperServer(self.cluster.tree, server_id=3)
+        self.added.run()
+        self.clients = []
+
+    def tearDown(self) -> None:
+        for client in self.clients:
+            client.stop()
+            client.close()
+        self.added.stop()
+        self.cluster.terminate()
+
+    def _client(self, hosts: object = None, **kwargs: object) -> KazooClient:
+        client = KazooClient(hosts=hosts or self.cluster.hosts, **kwargs)
+        self.clients.append(client)
+        client.start()
+        return client
+
+    def _update_hosts(self, connection, old_hosts, new_hosts):
+        connection.update_hosts(old_hosts, new_hosts)
+
+    def test_follow_config(self):
+        client = self._client(
+            follow_config=True, randomize_hosts=False, timeout=1.5
+        )
+        first, second = client.hosts
+        wait(lambda: client._connection._server == first)
+        states = []
+        client.add_listener(states.append)
+        client.ensure_path("/watched")
+        events = []
+        client.get("/watched", watch=events.append)
+
+        # The first server leaves the ensemble, the third one joins it
+        config = "\n".join(
+            "server.%d=%s:0:0:participant;%s"
+            % (server.server_id, server.host, server.address)
+            for server in (self.cluster[1], self.added)
+        )
+        self._client().set("/zookeeper/config", config.encode("utf-8"))
+        added = (self.added.host, self.added.port)
+        wait(lambda: client.hosts == [second, added], timeout=5)
+        wait(lambda: client._connection._server in (second, added), timeout=10)
+        assert states == []
+        client.set("/watched", b"value")
+        wait(lambda: events, timeout=5)
+
+    def test_hosts_named_differently(self):
+        first, second = [(s.host, s.port) for s in self.cluster]
+        assert first[0] == "127.0.0.1"
+        client = self._client(
+            hosts="localhost:%d,localhost:%d" % (first[1], second[1]),
+            randomize_hosts=False,
+        )
+        connection = client._connection
+        wait(lambda: connection._server == ("localhost", first[1]))
+
+        # The configuration names the servers by address
+        added = (self.added.host, self.added.port)
+        old_hosts = [first, second]
+        with mock.patch("random.random", return_value=0.5):
+            self._update_hosts(connection, old_hosts, [first, second, added])
+        # The session stays, as with the server named as in the config
+        assert connection._move_to is None
+
+        self._update_hosts(connection, old_hosts, [second, added])
+        assert connection._move_to in (second, added)
+
+
 class TestReadOnlyMode(KazooTestCase):
     def setUp(self):
         os.environ["ZOOKEEPER_LOCAL_SESSION_RO"] = "true"
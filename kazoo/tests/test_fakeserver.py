@@ -0,0 +1,176 @@
+import threading
+import time
+import unittest
+from typing import List
+
+import pytest
+
+from kazoo.client import KazooClient
+from kazoo.exceptions import (
+    NoNodeError,
+    NodeExistsError,
+    NotEmptyError,
+    RolledBackError,
+)
+from kazoo.protocol.states import EventType, KazooState, WatchedEvent
+from kazoo.retry import KazooRetry
+from kazoo.testing.fakeserver import FakeZooKeeperCluster, FakeZooKeeperServer
+from kazoo.tests.util import wait
+
+
+class TestFakeZooKeeperServer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cluster = FakeZooKeeperCluster(size=2)
+        self.cluster.start()
+        self.clients: List[KazooClient] = []
+
+    def tearDown(self) -> None:
+        for client in self.clients:
+            client.stop()
+            client.close()
+        self.cluster.terminate()
+
+    def _client(self, **kwargs: object) -> KazooClient:
+        client = KazooClient(hosts=self.cluster.hosts, **kwargs)
+        self.clients.append(client)
+        client.start()
+        return client
+
+    def test_crud(self) -> None:
+        client = self._client()
+        client.create("/a", b"1")
+        assert client.get("/a")[0] == b"1"
+        stat = client.set("/a", b"22")
+        assert stat.version == 1
+        assert stat.dataLength == 2
+        assert sorted(client.get_children("/")) == ["a", "zookeeper"]
+        with pytest.raises(NodeExistsError):
+            client.create("/a")
+        client.create("/a/b")
+        with pytest.raises(NotEmptyError):
+            client.delete("/a")
+        client.delete("/a", recursive=True)
+        assert client.exists("/a") is None
+        with pytest.raises(NoNodeError):
+            client.get("/a")
+
+    def test_sequence_and_ephemeral(self) -> None:
+        client = self._client()
+        client.create("/q")
+        first = client.create("/q/n-", sequence=True)
+        second = client.create("/q/n-", sequence=True, ephemeral=True)
+        assert first == "/q/n-0000000000"
+        assert second == "/q/n-0000000001"
+        assert client.exists(second).owner_session_id == client.client_id[0]
+
+        client.stop()
+        client.start()
+        assert client.get_children("/q") == ["n-0000000000"]
+
+    def test_watches(self) -> None:
+        client = self._client()
+        other = self._client()
+        events: List[WatchedEvent] = []
+        ev = threading.Event()
+
+        def watch(event: WatchedEvent) -> None:
+            events.append(event)
+            ev.set()
+
+        client.exists("/w", watch=watch)
+        other.create("/w")
+        ev.wait(5)
+        assert events[0].type == EventType.CREATED
+        assert events[0].path == "/w"
+
+        ev.clear()
+        client.get_children("/w", watch=watch)
+        other.create("/w/c")
+        ev.wait(5)
+        assert events[1].type == EventType.CHILD
+
+    def test_transaction_rollback(self) -> None:
+        client = self._client()
+        t = client.transaction()
+        t.create("/t")
+        t.delete("/missing")
+        results = t.commit()
+        assert results[0].__class__ == RolledBackError
+        assert results[1].__class__ == NoNodeError
+        assert client.exists("/t") is None
+
+    def test_session_expiry(self) -> None:
+        client = self._client()
+        states: List[str] = []
+        client.add_listener(states.append)
+        client.create("/e", ephemeral=True)
+        session_id = client.client_id[0]
+
+        self.cluster.expire_session(session_id)
+        wait(lambda: client.connected and client.client_id[0] != session_id)
+        assert KazooState.LOST in states
+        assert client.exists("/e") is None
+
+    def test_session_timeout(self) -> None:
+        self.cluster.terminate()
+        self.cluster = FakeZooKeeperCluster(
+            size=1, tick_time=100, min_session_timeout=200
+        )
+        self.cluster.start()
+        client = self._client(timeout=0.2)
+        client.create("/e", ephemeral=True)
+        other = self._client()
+
+        # Stop the client from pinging so the session times out
+        self.cluster[0].latency = lambda op_type: 1 if op_type == 11 else 0
+        wait(lambda: other.exists("/e") is None, timeout=5)
+
+    def test_drop_connections(self) -> None:
+        client = self._client()
+        client.create("/d", ephemeral=True)
+        session_id = client.client_id[0]
+        states: List[str] = []
+        client.add_listener(states.append)
+
+        for server in self.cluster:
+            server.drop_connections()
+        wait(lambda: KazooState.SUSPENDED in states and client.connected)
+        assert client.client_id[0] == session_id
+        assert client.exists("/d")
+
+    def test_failover(self) -> None:
+        client = self._client()
+        client.create("/f", b"value")
+        self.cluster[0].stop()
+        self.cluster[1].drop_connections()
+        wait(lambda: client.connected)
+        assert KazooRetry(max_tries=-1)(client.get, "/f")[0] == b"value"
+        self.cluster[0].run()
+
+    def test_latency(self) -> None:
+        client = self._client()
+        client.create("/l")
+        for server in self.cluster:
+            server.latency = 0.05
+        start = time.monotonic()
+        client.get("/l")
+        assert time.monotonic() - start >= 0.05
+
+    def test_four_letter_words(self) -> None:
+        client = self._client()
+        assert client.command(b"ruok") == "imok"
+        assert "Mode: " in client.command(b"srvr")
+        assert "zk_znode_count" in client.command(b"mntr")
+        assert client.server_version()[0] == 3
+
+    def test_standalone_server(self) -> None:
+        server = FakeZooKeeperServer()
+        server.run()
+        try:
+            client = KazooClient(hosts=server.address)
+            self.clients.append(client)
+            client.start()
+            client.ensure_path("/s/t")
+            assert client.exists("/s/t")
+        finally:
+            server.destroy()
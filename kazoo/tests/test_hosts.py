@@ -1,6 +1,6 @@
 from unittest import TestCase
 
-from kazoo.hosts import collect_hosts
+from kazoo.hosts import collect_hosts, config_hosts
 
 
 class HostsTestCase(TestCase):
@@ -55,3 +55,18 @@ class HostsTestCase(TestCase):
         )
         assert hosts == expected1
         assert chroot == expected2
+
+    def test_config_hosts(self):
+        hosts = config_hosts(
+            b"server.2=10.0.0.2:2888:3888:participant;0.0.0.0:2181\n"
+            b"server.1=10.0.0.1:2888:3888:participant;10.0.1.1:2181\n"
+            b"server.3=[fe80::1]:2888:3888:observer;2182\n"
+            b"server.4=10.0.0.4:2888:3888\n"
+            b"version=100000000"
+        )
+        assert hosts == [
+            ("10.0.1.1", 2181),
+            ("10.0.0.2", 2181),
+            ("fe80::1", 2182),
+        ]
+        assert config_hosts("") == []
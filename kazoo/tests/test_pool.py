@@ -0,0 +1,188 @@
+import threading
+from typing import TYPE_CHECKING, Callable, Optional
+from unittest import mock
+
+import pytest
+
+from kazoo.client import KazooClient
+from kazoo.testing import KazooTestCase
+
+if TYPE_CHECKING:
+    from kazoo.pool import KazooClientPool
+
+
+class TestClientPool(KazooTestCase):
+    def _get_pool(
+        self,
+        size: Optional[int] = None,
+        read_strategy: str = "round_robin",
+        read_your_writes: bool = False,
+        handler_factory: Optional[Callable[[], object]] = None,
+        randomize_hosts: bool = True,
+        route_by_role: bool = False,
+    ) -> "KazooClientPool":
+        from kazoo.pool import KazooClientPool
+
+        pool = KazooClientPool(
+            self.hosts,
+            size=size,
+            read_strategy=read_strategy,
+            read_your_writes=read_your_writes,
+            handler_factory=handler_factory,
+            randomize_hosts=randomize_hosts,
+            route_by_role=route_by_role,
+            timeout=self.DEFAULT_CLIENT_TIMEOUT,
+        )
+        self._clients.extend(pool.clients)
+        return pool
+
+    def _spy(self, obj: object, name: str) -> mock.Mock:
+        """Wrap the method `name` of `obj` in a mock for the test"""
+        patcher = mock.patch.object(obj, name, wraps=getattr(obj, name))
+        spy: mock.Mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        return spy
+
+    def test_invalid_arguments(self) -> None:
+        from kazoo.handlers.threading import SequentialThreadingHandler
+        from kazoo.pool import KazooClientPool
+
+        with pytest.raises(ValueError):
+            self._get_pool(read_strategy="random")
+        with pytest.raises(ValueError):
+            self._get_pool(size=0)
+        with pytest.raises(TypeError):
+            KazooClientPool(self.hosts, handler=SequentialThreadingHandler())
+
+    def test_hosts(self) -> None:
+        from kazoo.handlers.threading import SequentialThreadingHandler
+
+        pool = self._get_pool(
+            size=4,
+            randomize_hosts=False,
+            handler_factory=SequentialThreadingHandler,
+        )
+        hosts = pool.primary.hosts
+        assert hosts is not None
+        assert len(pool.clients) == 4
+        assert len(set(map(id, [c.handler for c in pool.clients]))) == 4
+        for index, client in enumerate(pool.clients):
+            assert not client.randomize_hosts
+            assert client.chroot == pool.primary.chroot
+            offset = index % len(hosts)
+            assert client.hosts == hosts[offset:] + hosts[:offset]
+
+    def test_ipv6_hosts(self) -> None:
+        from kazoo.pool import KazooClientPool
+
+        pool = KazooClientPool("[::1]:2181,[::1]:2182/chroot", size=2)
+        hosts = pool.clients[1].hosts
+        assert hosts is not None
+        assert sorted(hosts) == [("::1", 2181), ("::1", 2182)]
+        assert pool.clients[1].chroot == "/chroot"
+
+    def test_reads_and_writes(self) -> None:
+        pool = self._get_pool(size=3)
+        pool.start()
+        assert all(client.connected for client in pool.clients)
+
+        # The pool stands in for a client, writing with its primary
+        zk: KazooClient = pool
+        zk.create("/pooled", b"value")
+        calls = [self._spy(client, "get_async") for client in pool.clients]
+        for _ in range(6):
+            assert pool.get("/pooled")[0] == b"value"
+        assert [c.call_count for c in calls] == [2, 2, 2]
+
+        stat = pool.exists("/pooled")
+        assert stat is not None and stat.version == 0
+        assert pool.get_children("/") == ["pooled"]
+        ev = threading.Event()
+        pool.get_nowait("/pooled", callback=lambda result, exc: ev.set())
+        assert ev.wait(5)
+
+        # Recipes are bound to the primary session
+        lock = pool.Lock("/lock")
+        assert lock.client is pool.primary
+        with lock:
+            assert pool.get_children("/lock")
+
+        pool.stop()
+        assert not any(client.connected for client in pool.clients)
+        pool.close()
+
+    def test_least_pending(self) -> None:
+        pool = self._get_pool(size=3, read_strategy="least_pending")
+        pool.start()
+        for client in pool.clients:
+            client._queue.append(None)
+        pool.clients[0]._queue.append(None)
+        pool.clients[2]._queue.append(None)
+        assert pool._reader("/") is pool.clients[1]
+        for client in pool.clients:
+            client._queue.clear()
+        pool.stop()
+
+    def test_disconnected_readers(self) -> None:
+        pool = self._get_pool(size=3)
+        pool.start()
+        pool.clients[1].stop()
+        pool.clients[2].stop()
+        assert [pool._reader("/") for _ in range(3)] == [pool.primary] * 3
+        pool.stop()
+
+    def test_read_your_writes(self) -> None:
+        pool = self._get_pool(size=2, read_your_writes=True)
+        pool.start()
+        reader = pool.clients[1]
+        sync_async = self._spy(reader, "sync_async")
+
+        pool.primary.create("/written", b"value")
+        assert reader.last_zxid < pool.primary.last_zxid
+        results = [pool.get("/written")[0] for _ in range(2)]
+        assert results == [b"value", b"value"]
+        sync_async.assert_called_once_with("/written")
+
+        # Up to date readers don't sync
+        assert reader.last_zxid >= pool.primary.last_zxid
+        pool.get("/written")
+        pool.get("/written")
+        sync_async.assert_called_once_with("/written")
+        pool.stop()
+
+    def test_discover_roles(self) -> None:
+        pool = self._get_pool(size=2)
+        roles = pool._discover_roles()
+        assert set(roles) == set(pool.servers)
+        assert set(roles.values()) <= set(
+            ["leader", "follower", "standalone", "observer"]
+        )
+
+    def test_route_by_role(self) -> None:
+        pool = self._get_pool(size=3, route_by_role=True)
+        observer = pool.servers[-1]
+        roles = dict.fromkeys(pool.servers, "follower")
+        roles[observer] = "observer"
+        with mock.patch.object(pool, "_discover_roles", return_value=roles):
+            pool.start()
+        assert pool.roles == roles
+        assert observer not in (pool.primary.hosts or [])
+        for client in pool.clients[1:]:
+            assert client.hosts == [observer]
+            assert client._connection._server == observer
+
+        calls = [self._spy(client, "get_async") for client in pool.clients]
+        pool.primary.create("/routed", b"value")
+        for _ in range(4):
+            assert pool.get("/routed")[0] == b"value"
+        assert [c.call_count for c in calls] == [0, 2, 2]
+        pool.stop()
+
+    def test_route_without_observers(self) -> None:
+        pool = self._get_pool(size=2, route_by_role=True)
+        roles = dict.fromkeys(pool.servers, "follower")
+        with mock.patch.object(pool, "_discover_roles", return_value=roles):
+            pool.start()
+        assert pool._readers is pool.clients
+        assert pool.clients[1].hosts == pool.servers[1:] + pool.servers[:1]
+        pool.stop()
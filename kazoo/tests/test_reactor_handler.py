@@ -0,0 +1,153 @@
+import threading
+from typing import TYPE_CHECKING, List, Optional, Tuple
+import unittest
+
+import pytest
+
+from kazoo.client import KazooClient
+from kazoo.protocol.states import Callback, WatchedEvent
+from kazoo.recipe.watchers import DataWatch
+from kazoo.testing import KazooTestCase
+from kazoo.tests import test_client
+
+if TYPE_CHECKING:
+    from kazoo.handlers.reactor import ReactorHandler
+
+    _TestCase = KazooTestCase
+else:
+    _TestCase = object
+
+
+class TestReactor(unittest.TestCase):
+    def setUp(self) -> None:
+        from kazoo.handlers.reactor import Reactor
+
+        self.reactor = Reactor(callback_workers=2)
+
+    def tearDown(self) -> None:
+        self.reactor.stop()
+
+    def test_start_stop(self) -> None:
+        reactor = self.reactor
+        running = [reactor.running]
+        handler = reactor.handler()
+        running.append(reactor.running)
+        assert handler.loop is reactor.loop
+        assert reactor.loop is not None and reactor.loop.is_running()
+        reactor.stop()
+        running.append(reactor.running)
+        assert running == [False, True, False]
+        reactor.stop()
+
+    def test_invalid_workers(self) -> None:
+        from kazoo.handlers.reactor import Reactor
+
+        with pytest.raises(ValueError):
+            Reactor(callback_workers=0)
+
+    def test_callback_workers(self) -> None:
+        handlers = [self.reactor.handler() for _ in range(4)]
+        assert handlers[0].callback_queue is handlers[2].callback_queue
+        assert handlers[0].callback_queue is not handlers[1].callback_queue
+
+        calls: List[Tuple[int, threading.Thread]] = []
+        ev = threading.Event()
+
+        def callback(index: int) -> None:
+            calls.append((index, threading.current_thread()))
+            if len(calls) == 40:
+                ev.set()
+
+        for index in range(10):
+            for handler in handlers:
+                handler.dispatch_callback(
+                    Callback("watch", callback, (index,))
+                )
+        assert ev.wait(5)
+        threads = set(thread for _, thread in calls)
+        assert len(threads) == 2
+        assert self.reactor._thread not in threads
+        for thread in threads:
+            # Callbacks run in order on each worker
+            indexes = [index for index, t in calls if t is thread]
+            assert indexes == sorted(indexes)
+
+
+class ReactorClientMixin(_TestCase):
+    def setUp(self) -> None:
+        from kazoo.handlers.reactor import Reactor
+
+        self.reactor = Reactor()
+        super(ReactorClientMixin, self).setUp()
+
+    def tearDown(self) -> None:
+        super(ReactorClientMixin, self).tearDown()
+        self.reactor.stop()
+
+    def _makeOne(self) -> "ReactorHandler":
+        return self.reactor.handler()
+
+    def _get_client(self, **kwargs: object) -> KazooClient:
+        kwargs["handler"] = self._makeOne()
+        return KazooClient(self.hosts, **kwargs)
+
+
+class TestReactorClients(ReactorClientMixin, KazooTestCase):
+    def _threads(self) -> List[threading.Thread]:
+        # Leave out the threads of the loop executor resolving the hosts,
+        # and those of the fake server when testing with it
+        return [
+            t
+            for t in threading.enumerate()
+            if not t.name.startswith("asyncio_")
+            and "process_request_thread" not in t.name
+        ]
+
+    def test_many_clients(self) -> None:
+        threads = self._threads()
+        clients = [self._get_client() for _ in range(10)]
+        for client in clients:
+            client.start()
+        # The clients share the loop thread and the callback worker
+        assert self._threads() == threads
+
+        clients[0].ensure_path("/shared")
+        ev = threading.Event()
+        values: List[bytes] = []
+
+        def watch(event: WatchedEvent) -> None:
+            # Watch callbacks may block
+            values.append(clients[1].get(event.path)[0])
+            ev.set()
+
+        for client in clients:
+            assert client.exists("/shared")
+        clients[1].get("/shared", watch=watch)
+        clients[2].set("/shared", b"value")
+        assert ev.wait(5)
+        assert values == [b"value"]
+
+        for client in clients:
+            client.stop()
+            client.close()
+
+    def test_data_watch(self) -> None:
+        client = self.client
+        assert client is not None
+        client.ensure_path("/watched")
+        ev = threading.Event()
+        values: List[Optional[bytes]] = []
+
+        @DataWatch(client, "/watched")
+        def changed(data: Optional[bytes], stat: object) -> None:
+            values.append(data)
+            if data == b"new":
+                ev.set()
+
+        client.set("/watched", b"new")
+        assert ev.wait(5)
+        assert values == [b"", b"new"]
+
+
+class TestReactorClient(ReactorClientMixin, test_client.TestClient):
+    pass
@@ -59,6 +59,25 @@ class TestRetrySleeper(unittest.TestCase):
         rcopy = retry.copy()
         assert rcopy.sleep_func is _sleep
 
+    def test_acall(self):
+        import asyncio
+
+        from kazoo.retry import RetryFailedError
+
+        failing = self._fail(times=2)
+
+        async def coro():
+            failing()
+            return "done"
+
+        retry = self._makeOne(delay=0, max_tries=2)
+        assert asyncio.run(retry.acall(coro)) == "done"
+        assert retry._attempts == 2
+
+        failing = self._fail(times=3)
+        with pytest.raises(RetryFailedError):
+            asyncio.run(retry.acall(coro))
+
 
 class TestKazooRetry(unittest.TestCase):
     def _makeOne(self, **kw):
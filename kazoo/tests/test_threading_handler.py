@@ -308,6 +308,19 @@ class TestThreadingAsync(unittest.TestCase):
         async_result.rawlink(add_on)
         assert mock_handler.completion_queue.put.called
 
+    def test_linkage_ready_only_new_callback(self):
+        mock_handler = Mock()
+        mock_handler.running = False
+        async_result = self._makeOne(mock_handler)
+        first = Mock()
+        second = Mock()
+
+        async_result.rawlink(first)
+        async_result.set("fred")
+        async_result.rawlink(second)
+        first.assert_called_once_with(async_result)
+        second.assert_called_once_with(async_result)
+
     def test_link_and_unlink(self):
         mock_handler = Mock()
         async_result = self._makeOne(mock_handler)
@@ -395,3 +408,110 @@ class TestThreadingAsync(unittest.TestCase):
 
         mockback2.assert_called_once_with(async_result)
         mockback1.assert_called_once_with(async_result)
+
+    def test_as_future(self):
+        handler = self._makeHandler()
+        handler.start()
+
+        async_result = self._makeOne(handler)
+        future = async_result.as_future()
+        assert not future.done()
+        async_result.set("howdy")
+        assert future.result(timeout=5) == "howdy"
+
+        async_result = self._makeOne(handler)
+        async_result.set_exception(ImportError("Error occured"))
+        with pytest.raises(ImportError):
+            async_result.as_future().result(timeout=0)
+
+        async_result = self._makeOne(handler)
+        future = async_result.as_future()
+        assert future.cancel()
+        assert async_result._callbacks == []
+        handler.stop()
+
+    def test_as_asyncio_future(self):
+        import asyncio
+
+        handler = self._makeHandler()
+        handler.start()
+
+        async def wait():
+            results = [self._makeOne(handler) for _ in range(100)]
+            futures = [result.as_asyncio_future() for result in results]
+            for i, result in enumerate(results):
+                handler.spawn(result.set, i)
+            failed = self._makeOne(handler)
+            failed.set_exception(ImportError("Error occured"))
+            with pytest.raises(ImportError):
+                await failed.as_asyncio_future()
+            return await asyncio.gather(*futures)
+
+        assert asyncio.run(wait()) == list(range(100))
+        handler.stop()
+
+    def test_gather(self):
+        from kazoo.handlers.utils import gather
+
+        handler = self._makeHandler()
+        handler.start()
+
+        results = [self._makeOne(handler) for _ in range(100)]
+        results[0].set(0)
+        for i, result in enumerate(results[1:], 1):
+            if i == 50:
+                handler.spawn(result.set_exception, ImportError("Error"))
+            else:
+                handler.spawn(result.set, i)
+        values = gather(results + results[:2], timeout=5)
+        assert isinstance(values.pop(50), ImportError)
+        assert values == list(range(50)) + list(range(51, 100)) + [0, 1]
+
+        pending = self._makeOne(handler)
+        with pytest.raises(handler.timeout_exception):
+            gather([results[0], pending], timeout=0.01)
+        assert pending._callbacks == []
+        assert gather([]) == []
+        handler.stop()
+
+    def test_as_completed(self):
+        from kazoo.handlers.utils import as_completed, wait_any
+
+        handler = self._makeHandler()
+        handler.start()
+
+        first, second, third = [self._makeOne(handler) for _ in range(3)]
+        second.set(2)
+        completed = as_completed([first, second, third, second])
+        assert next(completed) is second
+        with pytest.raises(handler.timeout_exception):
+            wait_any([first, third], timeout=0.01)
+        third.set(3)
+        assert wait_any([first, third]) is third
+        first.set(1)
+        assert list(completed) == [third, first]
+
+        pending = self._makeOne(handler)
+        with pytest.raises(handler.timeout_exception):
+            list(as_completed([first, pending], timeout=0.01))
+        assert pending._callbacks == []
+        with pytest.raises(ValueError):
+            wait_any([])
+        handler.stop()
+
+    def test_wait_without_handler(self):
+        from kazoo.handlers.utils import as_completed, gather
+
+        handler = self._makeHandler()
+        handler.start()
+        # The results of some handlers don't keep it
+        foreign = Mock(spec=["ready", "rawlink", "unlink"])
+        foreign.ready.return_value = False
+        with pytest.raises(TypeError):
+            gather([foreign])
+        with pytest.raises(TypeError):
+            next(as_completed([foreign]))
+        with pytest.raises(handler.timeout_exception):
+            gather([foreign], timeout=0.01, handler=handler)
+        foreign.unlink.assert_called_once()
+        handler.stop()
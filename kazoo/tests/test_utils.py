@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 
@@ -80,3 +80,115 @@ class TestCreateTCPConnection(unittest.TestCase):
         with patch.object(time, "time", return_value=time.time()):
             with pytest.raises(socket.error):
                 create_tcp_connection(socket, ("127.0.0.1", 2181), timeout=0)
+
+    def test_ssl_context_reuse(self):
+        from kazoo.handlers import utils
+        from kazoo.handlers.utils import create_tcp_connection
+
+        context, session = Mock(), Mock()
+        module = Mock(getdefaulttimeout=Mock(return_value=None))
+        with patch.object(utils, "create_ssl_context") as create_ssl_context:
+            with patch.object(utils, "_set_default_tcpsock_options"):
+                sock = create_tcp_connection(
+                    module,
+                    ("127.0.0.1", 2181),
+                    use_ssl=True,
+                    ssl_context=context,
+                    ssl_session=session,
+                )
+        create_ssl_context.assert_not_called()
+        context.wrap_socket.assert_called_once_with(
+            module.socket.return_value, session=session
+        )
+        assert sock is context.wrap_socket.return_value
+        sock.connect.assert_called_once_with(("127.0.0.1", 2181))
+
+
+class TestSSLSessionResumption(unittest.TestCase):
+    def setUp(self):
+        try:
+            from cryptography import x509
+            from cryptography.hazmat.primitives import hashes, serialization
+            from cryptography.hazmat.primitives.asymmetric import ec
+        except ImportError:
+            pytest.skip("cryptography not available.")
+        import datetime
+        import os
+        import tempfile
+
+        key = ec.generate_private_key(ec.SECP256R1())
+        name = x509.Name(
+            [x509.NameAttribute(x509.oid.NameOID.COMMON_NAME, "localhost")]
+        )
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=1))
+            .sign(key, hashes.SHA256())
+        )
+        path = tempfile.mkdtemp()
+        self.certfile = os.path.join(path, "cert.pem")
+        self.keyfile = os.path.join(path, "key.pem")
+        with open(self.certfile, "wb") as f:
+            f.write(cert.public_bytes(serialization.Encoding.PEM))
+        with open(self.keyfile, "wb") as f:
+            f.write(
+                key.private_bytes(
+                    serialization.Encoding.PEM,
+                    serialization.PrivateFormat.PKCS8,
+                    serialization.NoEncryption(),
+                )
+            )
+
+    def test_resume_session(self):
+        import socket
+        import ssl
+        import threading
+
+        from kazoo.handlers.utils import (
+            create_ssl_context,
+            create_tcp_connection,
+        )
+
+        server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_context.load_cert_chain(self.certfile, self.keyfile)
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(2)
+        self.addCleanup(listener.close)
+
+        def serve():
+            for _ in range(2):
+                conn, _ = listener.accept()
+                with server_context.wrap_socket(conn, server_side=True) as c:
+                    c.sendall(b"imok")
+                    c.recv(1)
+
+        thread = threading.Thread(target=serve)
+        thread.daemon = True
+        thread.start()
+
+        context = create_ssl_context(ca=self.certfile)
+        address = listener.getsockname()
+        session = None
+        reused = []
+        for _ in range(2):
+            sock = create_tcp_connection(
+                socket,
+                address,
+                timeout=5,
+                use_ssl=True,
+                ssl_context=context,
+                ssl_session=session,
+            )
+            assert sock.recv(4) == b"imok"
+            reused.append(sock.session_reused)
+            session = sock.session
+            sock.close()
+        thread.join(5)
+        assert reused == [False, True]
@@ -0,0 +1,92 @@
+import sys
+import unittest
+
+from kazoo.protocol.states import WatchedEvent
+from kazoo.protocol.watches import Watcher, WatchRegistry
+
+
+def _watcher() -> Watcher:
+    def watcher(event: WatchedEvent) -> None:
+        pass
+
+    return watcher
+
+
+class TestWatchRegistry(unittest.TestCase):
+    def _makeOne(self) -> WatchRegistry:
+        return WatchRegistry()
+
+    def test_single_watcher_slot(self) -> None:
+        registry = self._makeOne()
+
+        def watcher(event: WatchedEvent) -> None:
+            pass
+
+        registry.add("/a", watcher)
+        registry.add("/a", watcher)
+        assert registry._slots["/a"] is watcher
+        assert registry["/a"] == {watcher}
+        assert registry.get("/a") == (watcher,)
+        assert len(registry) == 1
+
+    def test_promote_and_demote(self) -> None:
+        registry = self._makeOne()
+        w1, w2 = _watcher(), _watcher()
+
+        registry.add("/a", w1)
+        registry.add("/a", w2)
+        assert registry._slots["/a"] == {w1, w2}
+        assert registry["/a"] == {w1, w2}
+
+        registry.discard("/a", w1)
+        assert registry._slots.get("/a") is w2
+
+        registry.discard("/a", w2)
+        assert "/a" not in registry
+        assert registry["/a"] == set()
+
+    def test_missing_path(self) -> None:
+        registry = self._makeOne()
+        assert registry["/missing"] == set()
+        assert registry.get("/missing") is None
+        assert list(registry.pop("/missing")) == []
+        registry.discard("/missing", _watcher())
+        assert len(registry) == 0
+
+    def test_pop(self) -> None:
+        registry = self._makeOne()
+        w1, w2 = _watcher(), _watcher()
+        registry.add("/a", w1)
+        registry.add("/b", w1)
+        registry.add("/b", w2)
+
+        assert list(registry.pop("/a")) == [w1]
+        assert set(registry.pop("/b")) == {w1, w2}
+        assert len(registry) == 0
+
+    def test_interned_paths(self) -> None:
+        registry = self._makeOne()
+        path = "".join(["/some", "/path"])
+        registry.add(path, _watcher())
+        assert next(iter(registry)) is sys.intern("/some/path")
+
+    def test_reset(self) -> None:
+        registry = self._makeOne()
+        w1, w2, w3 = _watcher(), _watcher(), _watcher()
+        registry.add("/a", w1)
+        registry.add("/b", w2)
+        registry.add("/b", w3)
+
+        watchers = registry.reset()
+        assert len(registry) == 0
+        registry.add("/c", w1)
+        assert sorted(map(id, watchers)) == sorted(map(id, (w1, w2, w3)))
+        assert list(registry) == ["/c"]
+
+    def test_memory_usage(self) -> None:
+        registry = self._makeOne()
+        empty = registry.memory_usage()
+        registry.add("/a", _watcher())
+        single = registry.memory_usage()
+        registry.add("/a", _watcher())
+        assert empty < single < registry.memory_usage()